@@ -0,0 +1,151 @@
+"""
+Benchmark del formato de metadatos de los chunks: copia completa por chunk vs normalizado.
+
+Indexa los corpus JSON dos veces en BDs temporales con los mismos vectores (aleatorios,
+para no depender del modelo): una con el formato anterior (metadatos completos del padre
+más `chunk_id`, `chunk_size` y `total_chunks` en cada chunk) y otra con el formato actual
+(solo campos filtrables y posición; el resto en el almacén de padres). Reporta el tamaño
+en disco y, para consultas con un pool de sobre-recuperación, la latencia y el pico de
+memoria (tracemalloc) de materializar `Document`s frente a `ChunkBatch`.
+
+Uso:
+    python benchmarks/chunk_metadata.py --overfetch-k 200 --queries 50
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_chroma import Chroma
+
+from src.indexing_logic import iter_json_array, iter_json_chunks
+from src.io.chunk_records import query_chunks
+from src.io.parent_store import ParentStoreWriter
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "datajson"
+CORPORA = ["constitucion_unificada.json", "preguntas_laborales_unificado.json", "compendio_unificada.json"]
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def legacy_metadata(chunk, parent_metadata, total_chunks):
+    return {
+        **parent_metadata,
+        "chunk_id": chunk.id,
+        "corpus": chunk.metadata["corpus"],
+        "chunk_index": chunk.metadata["chunk_index"],
+        "total_chunks": total_chunks,
+        "original_doc_index": chunk.metadata["original_doc_index"],
+        "chunk_size": len(chunk.page_content)
+    }
+
+
+def build_databases(root: Path, dimension: int, chunk_size: int, chunk_overlap: int):
+    rng = np.random.default_rng(0)
+    stores = {
+        "anterior": Chroma(persist_directory=str(root / "legacy")),
+        "normalizado": Chroma(persist_directory=str(root / "normalized"))
+    }
+    
+    for corpus_file in CORPORA:
+        corpus_path = DATA_DIR / corpus_file
+        docs = list(iter_json_array(str(corpus_path)))
+        writer = ParentStoreWriter(root / "normalized", corpus_path.stem)
+        chunks = list(iter_json_chunks(docs, corpus_path.stem, chunk_size, chunk_overlap, writer))
+        writer.close()
+        
+        totals = {}
+        for chunk in chunks:
+            totals[chunk.metadata["original_doc_index"]] = totals.get(chunk.metadata["original_doc_index"], 0) + 1
+        
+        vectors = rng.standard_normal((len(chunks), dimension)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        for start in range(0, len(chunks), 1000):
+            batch = chunks[start:start + 1000]
+            ids = [chunk.id for chunk in batch]
+            texts = [chunk.page_content for chunk in batch]
+            embeddings = vectors[start:start + 1000].tolist()
+            stores["anterior"]._collection.add(
+                ids=ids, embeddings=embeddings, documents=texts,
+                metadatas=[
+                    legacy_metadata(chunk, docs[chunk.metadata["original_doc_index"]].get("metadata", {}),
+                                    totals[chunk.metadata["original_doc_index"]])
+                    for chunk in batch
+                ]
+            )
+            stores["normalizado"]._collection.add(
+                ids=ids, embeddings=embeddings, documents=texts, metadatas=[chunk.metadata for chunk in batch]
+            )
+    
+    return stores
+
+
+def measure(run, queries):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for query in queries:
+        run(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño de BD y memoria por consulta según el formato de metadatos")
+    parser.add_argument("--dimension", type=int, default=1024, help="Dimensión de los vectores sintéticos")
+    parser.add_argument("--overfetch-k", dest="overfetch_k", type=int, default=200)
+    parser.add_argument("--top-k", dest="top_k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        stores = build_databases(root, args.dimension, 500, 50)
+        
+        legacy_size = directory_size(root / "legacy")
+        normalized_size = directory_size(root / "normalized")
+        parents_size = directory_size(root / "normalized" / "parents")
+        print(f"Tamaño en disco  anterior: {legacy_size / 1e6:7.2f} MB")
+        print(f"Tamaño en disco  normalizado: {normalized_size / 1e6:7.2f} MB "
+              f"(almacén de padres {parents_size / 1e6:.2f} MB)  {normalized_size / legacy_size - 1:+.1%}\n")
+        
+        rng = np.random.default_rng(1)
+        queries = rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).tolist()
+        
+        def legacy_query(query):
+            pool = stores["anterior"].similarity_search_by_vector(query, k=args.overfetch_k)
+            return pool[:args.top_k]
+        
+        def normalized_query(query):
+            pool = query_chunks(stores["normalizado"], query, args.overfetch_k)
+            return pool.to_documents(range(min(args.top_k, len(pool))))
+        
+        for label, run in (("Document por candidato", legacy_query), ("ChunkBatch normalizado", normalized_query)):
+            run(queries[0])
+            elapsed_ms, peak = measure(run, queries)
+            print(f"{label:<24} {elapsed_ms:7.2f} ms/consulta  pico tracemalloc {peak / 1024:8.1f} KiB")
+        
+        same = all(
+            [doc.page_content for doc in legacy_query(query)] == [doc.page_content for doc in normalized_query(query)]
+            for query in queries[:10]
+        )
+        print(f"\nMismos resultados: {'sí' if same else 'NO'}")
+        print(json.dumps(normalized_query(queries[0])[0].metadata, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark de throughput de embeddings en CPU: un proceso vs pool de N procesos.
+
+Toma los chunks de un corpus JSON (mismo splitter que la indexación), los codifica con el
+modelo en el proceso actual y con `EmbeddingPool` para cada número de workers, y reporta
+chunks/s, aceleración y la diferencia máxima entre vectores. La carga del modelo no entra
+en la medición.
+
+Uso:
+    python benchmarks/embedding_pool.py --workers 1,2,4,8 --limit 2000
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.indexing_logic import iter_json_array, iter_json_chunks, get_embedding_model
+from src.io.embedding_pool import EmbeddingPool
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "datajson"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del pool de embeddings por número de workers")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--corpus", default="compendio_unificada.json", help="Archivo de datajson")
+    parser.add_argument("--limit", type=int, default=1000, help="Número máximo de chunks")
+    parser.add_argument("--workers", default="2,4", help="Números de workers a probar, separados por coma")
+    parser.add_argument("--batch-size", dest="batch_size", type=int, default=32)
+    args = parser.parse_args()
+    # Se mide el modelo, no el caché persistente de embeddings
+    settings.ENABLE_EMBEDDING_CACHE = False
+    
+    corpus_path = DATA_DIR / args.corpus
+    chunks = list(itertools.islice(
+        iter_json_chunks(iter_json_array(str(corpus_path)), corpus_path.stem, 500, 50), args.limit
+    ))
+    texts = [chunk.page_content for chunk in chunks]
+    print(f"{len(texts)} chunks de {args.corpus}, {os.cpu_count()} CPUs\n")
+    
+    single = get_embedding_model(args.embedding_model, batch_size=args.batch_size)
+    single.embed_query("calentamiento")
+    start = time.perf_counter()
+    reference = np.array(single.embed_documents(texts))
+    baseline = len(texts) / (time.perf_counter() - start)
+    print(f"workers=1 (proceso actual): {baseline:8.1f} chunks/s")
+    
+    for workers in [int(value) for value in args.workers.split(",")]:
+        with EmbeddingPool(args.embedding_model, workers=workers, batch_size=args.batch_size) as pool:
+            pool.embed_documents(["calentamiento"] * workers)
+            start = time.perf_counter()
+            vectors = np.array(pool.embed_documents(texts))
+            throughput = len(texts) / (time.perf_counter() - start)
+        
+        print(
+            f"workers={workers:<2} ({pool.threads_per_worker} hilos c/u): {throughput:8.1f} chunks/s  "
+            f"x{throughput / baseline:.2f}  max|Δ|={np.abs(vectors - reference).max():.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
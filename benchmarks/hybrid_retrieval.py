@@ -0,0 +1,99 @@
+"""
+Benchmark de recuperación híbrida: densa vs BM25 + densa fusionadas con RRF.
+
+Genera preguntas que dependen de tokens exactos (números de artículo, títulos de
+decretos y de preguntas frecuentes) a partir de los JSON indexados y mide, para cada
+modo, el hit@k del documento padre esperado y la latencia por consulta, además del
+coste de la búsqueda léxica por sí sola.
+
+Uso:
+    python benchmarks/hybrid_retrieval.py --db db_BAAI_bge-m3_json_metadata --top_k 15
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.io.chunk_records import query_chunks
+from src.io.lexical_index import load_lexical_index
+from src.io.vectordb import get_vector_store
+from src.steps.hybrid import HybridSearcher
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "datajson"
+
+
+def build_cases(limit: int, seed: int = 13):
+    """(pregunta, corpus, original_doc_index) del documento que debe aparecer."""
+    cases = []
+    
+    with open(DATA_DIR / "constitucion_unificada.json", encoding="utf-8") as f:
+        for i, doc in enumerate(json.load(f)):
+            cases.append((f"¿Qué dice el artículo {doc['metadata']['article_number']}?", "constitucion_unificada", i))
+    
+    with open(DATA_DIR / "compendio_unificada.json", encoding="utf-8") as f:
+        for i, doc in enumerate(json.load(f)):
+            cases.append((f"¿Qué establece {doc['metadata']['title']}?", "compendio_unificada", i))
+    
+    with open(DATA_DIR / "preguntas_laborales_unificado.json", encoding="utf-8") as f:
+        for i, doc in enumerate(json.load(f)):
+            title = doc["metadata"]["title"].split(":")[-1].strip()
+            cases.append((title, "preguntas_laborales_unificado", i))
+    
+    random.Random(seed).shuffle(cases)
+    return cases[:limit]
+
+
+def percentile(values, q):
+    return float(np.percentile(np.array(values), q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la recuperación densa con la híbrida (BM25 + RRF)")
+    parser.add_argument("--db", default="db_BAAI_bge-m3_json_metadata", help="Carpeta de la BD vectorial")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--top_k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    
+    vectorstore = get_vector_store(args.db, args.embedding_model)
+    lexical_index = load_lexical_index(args.db)
+    if lexical_index is None:
+        raise SystemExit("La búsqueda híbrida está desactivada (ENABLE_HYBRID_SEARCH=false) o la BD no existe")
+    cases = build_cases(args.queries)
+    print(f"Consultas: {len(cases)}  top_k={args.top_k}  chunks en el índice léxico={len(lexical_index)}")
+    
+    hits = {"densa": 0, "híbrida": 0}
+    latencies = {"densa": [], "híbrida": [], "solo BM25": []}
+    
+    for question, corpus, doc_index in cases:
+        query_embedding = vectorstore.embeddings.embed_query(question)
+        searchers = {"densa": vectorstore, "híbrida": HybridSearcher(vectorstore, lexical_index, question)}
+        
+        for mode, searcher in searchers.items():
+            start = time.perf_counter()
+            batch = query_chunks(searcher, query_embedding, args.top_k)
+            latencies[mode].append((time.perf_counter() - start) * 1000)
+            hits[mode] += any(
+                (metadata or {}).get("corpus") == corpus and (metadata or {}).get("original_doc_index") == doc_index
+                for metadata in batch.metadatas
+            )
+        
+        start = time.perf_counter()
+        lexical_index.search(question, args.top_k)
+        latencies["solo BM25"].append((time.perf_counter() - start) * 1000)
+    
+    for mode, values in latencies.items():
+        hit_rate = f"  hit@{args.top_k}={hits[mode] / len(cases):.3f}" if mode in hits else ""
+        print(f"{mode:>10}: p50={percentile(values, 50):.3f} ms  p95={percentile(values, 95):.3f} ms{hit_rate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark del micro-batching entre peticiones: throughput vs latencia con clientes concurrentes.
+
+Cada cliente (un hilo) repite la parte de inferencia de una petición: el embedding de la
+pregunta y el re-ranking de `--pairs` chunks. Para 1, 8 y 32 clientes se compara la
+llamada directa al modelo con el paso por `MicroBatcher`, reportando peticiones/s,
+latencia p50/p95 por petición y el tamaño medio de los lotes. Las cachés de embeddings y
+de puntuaciones se desactivan para medir el modelo.
+
+Uso:
+    python benchmarks/micro_batching.py --clients 1,8,32 --requests 10 --max_wait_ms 3
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.indexing_logic import iter_json_array, iter_json_chunks
+from src.io.micro_batcher import BatchedEmbeddings, MicroBatcher
+from src.io.vectordb import get_embedding_function
+from src.steps.rerank import create_reranker
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "datajson"
+
+
+def load_workload(pairs: int, seed: int = 7):
+    with open(DATA_DIR / "preguntas_laborales_unificado.json", encoding="utf-8") as f:
+        questions = [doc["metadata"]["title"].split(":")[-1].strip() for doc in json.load(f)]
+    corpus_path = DATA_DIR / "compendio_unificada.json"
+    chunks = [
+        chunk.page_content
+        for chunk in itertools.islice(iter_json_chunks(iter_json_array(str(corpus_path)), corpus_path.stem, 500, 50), 2000)
+    ]
+    rng = random.Random(seed)
+    return [(question, rng.sample(chunks, pairs)) for question in questions]
+
+
+def run(clients: int, requests: int, workload, embed_query, predict):
+    def client(index: int):
+        latencies = []
+        for question, texts in workload[index * requests:(index + 1) * requests]:
+            start = time.perf_counter()
+            embed_query(question)
+            predict([(question, text) for text in texts])
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = [value for values in pool.map(client, range(clients)) for value in values]
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y latencia con y sin micro-batching")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--clients", default="1,8,32", help="Clientes concurrentes, separados por coma")
+    parser.add_argument("--requests", type=int, default=10, help="Peticiones por cliente")
+    parser.add_argument("--pairs", type=int, default=15, help="Chunks re-rankeados por petición")
+    parser.add_argument("--max_wait_ms", type=float, default=settings.MICRO_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--max_batch_size", type=int, default=settings.MICRO_BATCH_MAX_SIZE)
+    args = parser.parse_args()
+    settings.ENABLE_EMBEDDING_CACHE = False
+    settings.ENABLE_RERANK_CACHE = False
+    settings.ENABLE_MICRO_BATCHING = False
+    
+    embeddings = get_embedding_function(args.embedding_model)
+    reranker = create_reranker()
+    batched = BatchedEmbeddings(embeddings, args.max_batch_size, args.max_wait_ms)
+    rerank_batcher = MicroBatcher(
+        reranker.predict_batch, args.max_batch_size, args.max_wait_ms,
+        sort_key=lambda pair: len(pair[0]) + len(pair[1])
+    )
+    
+    workload = load_workload(args.pairs)
+    embeddings.embed_query("calentamiento")
+    reranker.predict_batch([("calentamiento", "calentamiento")])
+    print(f"{args.pairs} pares por petición, espera máxima {args.max_wait_ms} ms, lote máximo {args.max_batch_size}\n")
+    
+    print(f"{'clientes':>8} {'modo':>14} {'pet/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'lote emb':>9} {'lote rr':>8}")
+    for clients in [int(value) for value in args.clients.split(",")]:
+        requests = min(args.requests, len(workload) // clients)
+        modes = {
+            "directo": (embeddings.embed_query, reranker.predict_batch),
+            "micro-batch": (batched.embed_query, rerank_batcher.call_many)
+        }
+        for mode, (embed_query, predict) in modes.items():
+            before = (batched.batcher.stats(), rerank_batcher.stats())
+            throughput, p50, p95 = run(clients, requests, workload, embed_query, predict)
+            sizes = ["-", "-"]
+            if mode == "micro-batch":
+                for i, (batcher, previous) in enumerate(zip((batched.batcher, rerank_batcher), before)):
+                    stats = batcher.stats()
+                    batches = stats["batches"] - previous["batches"]
+                    sizes[i] = f"{(stats['items'] - previous['items']) / max(batches, 1):.1f}"
+            print(f"{clients:>8} {mode:>14} {throughput:>8.2f} {p50:>9.1f} {p95:>9.1f} {sizes[0]:>9} {sizes[1]:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark del backend de inferencia en CPU: PyTorch fp32 vs ONNX con cuantización int8.
+
+Cada backend corre en su propio proceso (la memoria de uno no contamina la del otro) y
+procesa las preguntas frecuentes laborales: embedding de la pregunta, embedding de los
+chunks candidatos y re-ranking de `--candidates` chunks (los de la propia respuesta más
+otros al azar). Reporta la latencia p50/p95 de cada etapa, el pico de memoria residente y
+la concordancia de los rankings int8 con los fp32 (top-1 y solapamiento del top-k, tanto
+de la búsqueda densa como del re-ranker). La primera ejecución con onnx-int8 exporta y
+cuantiza los modelos; esa exportación no entra en la medición.
+
+Uso:
+    python benchmarks/quantized_inference.py --embedding_model BAAI/bge-m3 --questions 100
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.indexing_logic import iter_json_array, iter_json_chunks
+
+
+FAQ_FILE = Path(__file__).resolve().parent.parent / "datajson" / "preguntas_laborales_unificado.json"
+BACKENDS = ("torch", "onnx-int8")
+
+
+def build_workload(questions: int, candidates: int, seed: int = 11):
+    chunks = list(iter_json_chunks(iter_json_array(str(FAQ_FILE)), FAQ_FILE.stem, 500, 50))
+    by_doc = {}
+    for chunk in chunks:
+        by_doc.setdefault(chunk.metadata["original_doc_index"], []).append(chunk.page_content)
+    titles = {}
+    for i, doc in enumerate(iter_json_array(str(FAQ_FILE))):
+        titles[i] = doc["metadata"]["title"].split(":")[-1].strip()
+    
+    rng = random.Random(seed)
+    texts = [chunk.page_content for chunk in chunks]
+    workload = []
+    for doc_index in itertools.islice(sorted(by_doc), questions):
+        own = by_doc[doc_index][:candidates]
+        others = [text for text in rng.sample(texts, candidates * 2) if text not in own]
+        workload.append((titles[doc_index], own + others[:candidates - len(own)]))
+    return workload
+
+
+def run_backend(backend: str, embedding_model: str, workload):
+    settings.INFERENCE_BACKEND = backend
+    settings.ENABLE_EMBEDDING_CACHE = False
+    settings.ENABLE_RERANK_CACHE = False
+    settings.ENABLE_MICRO_BATCHING = False
+    from src.io.vectordb import get_embedding_function
+    from src.steps.rerank import create_reranker
+    
+    embeddings = get_embedding_function(embedding_model)
+    reranker = create_reranker()
+    embeddings.embed_query("calentamiento")
+    reranker.predict_batch([("calentamiento", "calentamiento")])
+    loaded_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    
+    latencies = {"embed_query": [], "embed_chunks": [], "rerank": []}
+    query_vectors, chunk_vectors, rerank_scores = [], [], []
+    for question, texts in workload:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(question))
+        latencies["embed_query"].append((time.perf_counter() - start) * 1000)
+        
+        start = time.perf_counter()
+        chunk_vectors.append(embeddings.embed_documents(texts))
+        latencies["embed_chunks"].append((time.perf_counter() - start) * 1000)
+        
+        start = time.perf_counter()
+        rerank_scores.append(reranker.predict_batch([(question, text) for text in texts]))
+        latencies["rerank"].append((time.perf_counter() - start) * 1000)
+    
+    return {
+        "latencies": latencies,
+        "query_vectors": np.asarray(query_vectors, dtype=np.float32),
+        "chunk_vectors": np.asarray(chunk_vectors, dtype=np.float32),
+        "rerank_scores": np.asarray(rerank_scores, dtype=np.float32),
+        "loaded_rss_mb": loaded_rss_mb,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def agreement(reference: np.ndarray, candidate: np.ndarray, k: int):
+    """Coincidencia del top-1 y solapamiento medio del top-k entre dos matrices de puntuaciones."""
+    reference_order = np.argsort(-reference, axis=1, kind="stable")
+    candidate_order = np.argsort(-candidate, axis=1, kind="stable")
+    top1 = float(np.mean(reference_order[:, 0] == candidate_order[:, 0]))
+    overlap = np.mean([
+        len(set(ref[:k]) & set(cand[:k])) / k for ref, cand in zip(reference_order, candidate_order)
+    ])
+    return top1, float(overlap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los backends torch (fp32) y onnx-int8 en CPU")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--candidates", type=int, default=15, help="Chunks por pregunta")
+    parser.add_argument("--k", type=int, default=5, help="Tamaño del top-k comparado")
+    args = parser.parse_args()
+    
+    workload = build_workload(args.questions, args.candidates)
+    print(f"{len(workload)} preguntas, {args.candidates} candidatos c/u, cuantización {settings.ONNX_QUANTIZATION_CONFIG}\n")
+    
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in BACKENDS:
+        with context.Pool(processes=1) as pool:
+            results[backend] = pool.apply(run_backend, (backend, args.embedding_model, workload))
+    
+    print(f"{'backend':>10} {'etapa':>13} {'p50 ms':>9} {'p95 ms':>9}")
+    for backend, result in results.items():
+        for stage, values in result["latencies"].items():
+            print(f"{backend:>10} {stage:>13} {np.percentile(values, 50):>9.2f} {np.percentile(values, 95):>9.2f}")
+    
+    print(f"\n{'backend':>10} {'RSS cargado MB':>15} {'RSS pico MB':>12}")
+    for backend, result in results.items():
+        print(f"{backend:>10} {result['loaded_rss_mb']:>15.0f} {result['peak_rss_mb']:>12.0f}")
+    
+    fp32, int8 = results["torch"], results["onnx-int8"]
+    cosine = np.sum(fp32["query_vectors"] * int8["query_vectors"], axis=1)
+    dense_fp32 = np.einsum("qd,qcd->qc", fp32["query_vectors"], fp32["chunk_vectors"])
+    dense_int8 = np.einsum("qd,qcd->qc", int8["query_vectors"], int8["chunk_vectors"])
+    
+    print(f"\nCoseno fp32 vs int8 de los embeddings de las preguntas: media={cosine.mean():.4f}  mínimo={cosine.min():.4f}")
+    for label, reference, candidate in (
+        ("búsqueda densa", dense_fp32, dense_int8),
+        ("re-ranker", fp32["rerank_scores"], int8["rerank_scores"])
+    ):
+        top1, overlap = agreement(reference, candidate, args.k)
+        print(f"{label:>15}: top-1 igual={top1:.3f}  solapamiento top-{args.k}={overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
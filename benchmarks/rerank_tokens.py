@@ -0,0 +1,94 @@
+"""
+Benchmark de la caché de tokens del re-ranker: tokenizar cada par vs solo la pregunta.
+
+Recupera los `--top_k` chunks candidatos de cada pregunta frecuente en la BD indexada y
+mide la etapa de re-ranking con y sin los tokens pre-calculados al indexar: latencia
+p50/p95, tiempo de tokenización por petición y la diferencia máxima entre puntuaciones
+(debe ser ~0: las entradas del modelo son las mismas). Las cachés de puntuaciones y el
+micro-batching se desactivan para medir solo el modelo.
+
+Uso:
+    python benchmarks/rerank_tokens.py --db db_BAAI_bge-m3_json_metadata --top_k 15
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.io.chunk_records import query_chunks
+from src.io.rerank_tokens import load_rerank_token_cache
+from src.io.vectordb import get_vector_store
+from src.steps.rerank import create_reranker
+
+
+FAQ_FILE = Path(__file__).resolve().parent.parent / "datajson" / "preguntas_laborales_unificado.json"
+
+
+def percentile(values, q):
+    return float(np.percentile(np.array(values), q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Etapa de re-ranking con y sin tokens pre-calculados")
+    parser.add_argument("--db", default="db_BAAI_bge-m3_json_metadata", help="Carpeta de la BD vectorial")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--top_k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    settings.ENABLE_RERANK_CACHE = False
+    settings.ENABLE_MICRO_BATCHING = False
+    
+    vectorstore = get_vector_store(args.db, args.embedding_model)
+    token_cache = load_rerank_token_cache(args.db)
+    if token_cache is None:
+        raise SystemExit("La caché de tokens está desactivada (ENABLE_RERANK_TOKEN_CACHE=false) o la BD no existe")
+    reranker = create_reranker()
+    tokenizer = reranker.model.tokenizer
+    
+    with open(FAQ_FILE, encoding="utf-8") as f:
+        questions = [doc["metadata"]["title"].split(":")[-1].strip() for doc in json.load(f)][:args.queries]
+    workload = []
+    for question in questions:
+        batch = query_chunks(vectorstore, vectorstore.embeddings.embed_query(question), args.top_k)
+        workload.append([(question, text, chunk_id) for chunk_id, text in zip(batch.ids, batch.texts)])
+    cached = sum(token_cache.get(chunk_id, text) is not None for pairs in workload for _, text, chunk_id in pairs)
+    print(f"{len(workload)} preguntas x {args.top_k} chunks, {cached} pares con tokens en caché")
+    reranker.predict_batch(workload[0])
+    
+    results = {}
+    for mode, cache in (("sin caché", None), ("con caché", token_cache)):
+        reranker.token_cache = cache
+        latencies, tokenization, scores = [], [], []
+        for pairs in workload:
+            start = time.perf_counter()
+            if cache is None:
+                tokenizer([q for q, _, _ in pairs], [text for _, text, _ in pairs], truncation=True)
+            else:
+                tokenizer(pairs[0][0], add_special_tokens=False)
+            tokenization.append((time.perf_counter() - start) * 1000)
+            
+            start = time.perf_counter()
+            scores.append(reranker.predict_batch(pairs))
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[mode] = scores
+        print(
+            f"{mode:>10}: re-ranking p50={percentile(latencies, 50):.2f} ms  p95={percentile(latencies, 95):.2f} ms  "
+            f"tokenización p50={percentile(tokenization, 50):.3f} ms"
+        )
+    
+    difference = max(
+        float(np.abs(np.array(plain) - np.array(tokenized)).max())
+        for plain, tokenized in zip(results["sin caché"], results["con caché"])
+    )
+    print(f"max|Δ puntuación| = {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark de latencia del ensamblador de recuperación: cascada vs over-fetch.
+
+Genera consultas sintéticas a partir de los metadatos de los JSON indexados
+(artículos de la Constitución, títulos del compendio y de las preguntas frecuentes),
+ejecuta ambos modos sobre el mismo embedding y reporta p50/p95 y la concordancia
+de la estrategia elegida.
+
+Uso:
+    python benchmarks/retrieval_modes.py --db db_BAAI_bge-m3_json_metadata
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.io.vectordb import get_vector_store
+from src.steps.self_query import (
+    validate_and_normalize_filters,
+    create_filter_strategies,
+    run_strategy_cascade,
+    run_overfetch_strategies
+)
+from src.types import ExtractedFilters
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "datajson"
+
+
+def build_cases(limit: int, seed: int = 13):
+    cases = []
+    
+    with open(DATA_DIR / "constitucion_unificada.json", encoding="utf-8") as f:
+        for doc in json.load(f):
+            number = doc["metadata"]["article_number"]
+            cases.append((
+                f"¿Qué dice el artículo {number} de la Constitución?",
+                "constitucion",
+                ExtractedFilters(article_number=number)
+            ))
+    
+    with open(DATA_DIR / "compendio_unificada.json", encoding="utf-8") as f:
+        for doc in json.load(f):
+            metadata = doc["metadata"]
+            cases.append((
+                f"¿Qué establece {metadata['title']}?",
+                "derecho_laboral",
+                ExtractedFilters(title=metadata["title"], year=metadata.get("year"))
+            ))
+    
+    with open(DATA_DIR / "preguntas_laborales_unificado.json", encoding="utf-8") as f:
+        for doc in json.load(f):
+            title = doc["metadata"]["title"]
+            cases.append((f"{title.split(':')[-1].strip().lower()}", "faq", ExtractedFilters()))
+    
+    cases.append(("¿Cómo funciona el gobierno?", "general", ExtractedFilters()))
+    
+    random.Random(seed).shuffle(cases)
+    return cases[:limit]
+
+
+def percentile(values, q):
+    return float(np.percentile(np.array(values), q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los modos cascade y overfetch del ensamblador")
+    parser.add_argument("--db", default="db_BAAI_bge-m3_json_metadata", help="Carpeta de la BD vectorial")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--top_k", type=int, default=15)
+    parser.add_argument("--overfetch_k", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    
+    vectorstore = get_vector_store(args.db, args.embedding_model)
+    cases = build_cases(args.queries)
+    
+    latencies = {"cascade": [], "overfetch": []}
+    queries = {"cascade": [], "overfetch": []}
+    agreement = 0
+    
+    for question, category, filters in cases:
+        validated_filters, _ = validate_and_normalize_filters(filters)
+        strategies = create_filter_strategies(validated_filters, category)
+        query_embedding = vectorstore.embeddings.embed_query(question)
+        
+        chosen = {}
+        for mode in ("cascade", "overfetch"):
+            metrics = {}
+            start = time.perf_counter()
+            if mode == "cascade":
+                run_strategy_cascade(vectorstore, query_embedding, strategies, args.top_k, metrics)
+            else:
+                run_overfetch_strategies(
+                    vectorstore, query_embedding, strategies, args.top_k, args.overfetch_k, metrics
+                )
+            latencies[mode].append((time.perf_counter() - start) * 1000)
+            queries[mode].append(metrics.get("vector_queries", 0))
+            chosen[mode] = metrics.get("strategy")
+        
+        agreement += int(chosen["cascade"] == chosen["overfetch"])
+    
+    print(f"Consultas: {len(cases)}  top_k={args.top_k}  overfetch_k={args.overfetch_k}")
+    for mode, values in latencies.items():
+        print(
+            f"{mode:>10}: p50={percentile(values, 50):.2f} ms  p95={percentile(values, 95):.2f} ms  "
+            f"consultas_vectoriales/req={np.mean(queries[mode]):.2f}"
+        )
+    print(f"Estrategia coincidente: {agreement}/{len(cases)}")
+
+
+if __name__ == "__main__":
+    main()
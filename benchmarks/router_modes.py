@@ -0,0 +1,77 @@
+"""
+Benchmark de latencia y tokens del enrutamiento: routers separados vs router fusionado.
+
+Ejecuta sobre el host de Ollama configurado el corrector ortográfico, el router
+semántico y el extractor de filtros en secuencia (modo "separate") y el router
+fusionado (modo "fused"), y reporta por petición las llamadas, la latencia y los
+tokens de entrada/salida de cada modo.
+
+Uso:
+    python benchmarks/router_modes.py --model llama3.1:8b --repeats 3
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.io.llm import get_llm, summarize_llm_usage
+from src.pipelines.dinamic import ROUTER_STAGES
+from src.steps.routing import create_quality_router
+from src.steps.self_query import create_semantic_router, create_filter_extractor, create_fused_router
+
+
+QUESTIONS = [
+    "¿Qué dice el artículo 2 de la Constitución?",
+    "q derechos tiene un trabajador despedido arbitrariamente",
+    "¿Cuántos días de vacaciones me corresponden?",
+    "¿Qué establece el Decreto Supremo N.º 003-97-TR?",
+    "¿Cómo se calcula la gratificación de julio?",
+    "cual es la jornada maxima de trabajo",
+    "¿Qué es la CTS y cuándo se deposita?",
+    "¿Cómo se organiza el Poder Judicial?",
+]
+
+
+def run_separate(llm, question):
+    metrics = {}
+    state = create_quality_router(llm).invoke({"question": question, "metrics": metrics})
+    state = create_semantic_router(llm).invoke(state)
+    create_filter_extractor(llm).invoke(state)
+    return metrics
+
+
+def run_fused(llm, question):
+    metrics = {}
+    create_fused_router(llm).invoke({"question": question, "metrics": metrics})
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el enrutamiento separado y fusionado")
+    parser.add_argument("--model", default="llama3.1:8b", help="Modelo de Ollama")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    llm = get_llm(model_name=args.model, temperature=0.0)
+    
+    for mode, runner in (("separate", run_separate), ("fused", run_fused)):
+        summaries = []
+        for _ in range(args.repeats):
+            for question in QUESTIONS:
+                summaries.append(summarize_llm_usage(runner(llm, question), ROUTER_STAGES))
+        
+        latencies = np.array([summary["ms"] for summary in summaries])
+        print(
+            f"{mode:>8}: llamadas/req={np.mean([s['calls'] for s in summaries]):.1f}  "
+            f"p50={np.percentile(latencies, 50):.0f} ms  p95={np.percentile(latencies, 95):.0f} ms  "
+            f"tokens_in/req={np.mean([s['input_tokens'] for s in summaries]):.0f}  "
+            f"tokens_out/req={np.mean([s['output_tokens'] for s in summaries]):.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
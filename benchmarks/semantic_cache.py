@@ -0,0 +1,133 @@
+"""
+Benchmark de la caché semántica de paráfrasis sobre las preguntas frecuentes laborales.
+
+Extrae las preguntas de `datajson/preguntas_laborales_unificado.json`, llena la caché con
+la mitad de ellas y consulta:
+  - paráfrasis de las preguntas cacheadas (un acierto con la pregunta correcta es útil;
+    con otra pregunta es un falso positivo);
+  - las preguntas no cacheadas (cualquier acierto es un falso positivo).
+
+Reporta, para cada umbral de similitud coseno, la tasa de aciertos útiles y de falsos
+positivos, además de la latencia de embedding y de búsqueda.
+
+Uso:
+    python benchmarks/semantic_cache.py --embedding_model BAAI/bge-m3
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.io.vectordb import get_embedding_function
+from src.steps.semantic_cache import SemanticAnswerCache
+from src.text import fold_accents
+from src.types import PipelineOutput
+
+
+FAQ_FILE = Path(__file__).resolve().parent.parent / "datajson" / "preguntas_laborales_unificado.json"
+QUESTION_PATTERN = re.compile(r"^\s*\d+\.\s*(.*?\?)", re.DOTALL)
+
+SYNONYMS = [
+    ("me corresponden", "tengo"),
+    ("me corresponde", "tengo derecho a"),
+    ("empleador", "empresa"),
+    ("trabajador", "empleado"),
+    ("¿Debo", "¿Tengo que"),
+    ("¿Puedo", "¿Es posible"),
+    ("¿Cuál es", "¿Cuál sería"),
+    ("¿Qué", "¿Me podrían decir qué"),
+]
+
+
+def load_faq_questions():
+    with open(FAQ_FILE, encoding="utf-8") as f:
+        documents = json.load(f)
+    
+    questions = []
+    for document in documents:
+        match = QUESTION_PATTERN.match(document.get("content", ""))
+        if match:
+            question = " ".join(match.group(1).split())
+            if "¿" in question and len(question) < 400:
+                questions.append(question)
+    return list(dict.fromkeys(questions))
+
+
+def paraphrase(question: str, variant: int) -> str:
+    if variant == 0:
+        return fold_accents(question).lower().replace("¿", "").replace("?", "")
+    if variant == 1:
+        return "Hola, tengo una consulta. " + question
+    for source, target in SYNONYMS:
+        if source in question:
+            return question.replace(source, target, 1)
+    return question.rstrip("?") + ", por favor?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tasa de aciertos de la caché semántica según el umbral")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--thresholds", default="0.85,0.88,0.90,0.92,0.94,0.95,0.96,0.98")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    # Se mide el modelo, no el caché persistente de embeddings
+    settings.ENABLE_EMBEDDING_CACHE = False
+    
+    questions = load_faq_questions()
+    random.Random(args.seed).shuffle(questions)
+    cached_questions = questions[: len(questions) // 2]
+    unseen_questions = questions[len(questions) // 2:]
+    paraphrases = [(paraphrase(q, i % 3), i) for i, q in enumerate(cached_questions)]
+    
+    embeddings = get_embedding_function(args.embedding_model)
+    start = time.perf_counter()
+    cached_vectors = embeddings.embed_documents(cached_questions)
+    paraphrase_vectors = [embeddings.embed_query(q) for q, _ in paraphrases]
+    unseen_vectors = [embeddings.embed_query(q) for q in unseen_questions]
+    embed_ms = (time.perf_counter() - start) * 1000 / (len(cached_questions) + len(paraphrases) + len(unseen_questions))
+    
+    print(f"Preguntas frecuentes: {len(questions)} ({len(cached_questions)} en caché, {len(unseen_questions)} no vistas)")
+    print(f"Embedding medio por pregunta: {embed_ms:.1f} ms\n")
+    print("Umbral  aciertos_útiles  falsos(paráfrasis)  falsos(no vistas)  búsqueda_p50")
+    
+    for threshold in [float(value) for value in args.thresholds.split(",")]:
+        cache = SemanticAnswerCache(
+            embeddings, threshold=threshold, max_entries=len(cached_questions), ttl_seconds=3600, audit_log_path=""
+        )
+        for index, (question, vector) in enumerate(zip(cached_questions, cached_vectors)):
+            cache.add(question, vector, PipelineOutput(question=question, generated_answer=str(index), retrieved_context=[]), "benchmark")
+        
+        useful_hits = wrong_hits = unseen_hits = 0
+        lookup_ms = []
+        for (question, expected), vector in zip(paraphrases, paraphrase_vectors):
+            start = time.perf_counter()
+            output, _ = cache.lookup(question, vector, "benchmark")
+            lookup_ms.append((time.perf_counter() - start) * 1000)
+            if output is not None:
+                if output.generated_answer == str(expected):
+                    useful_hits += 1
+                else:
+                    wrong_hits += 1
+        
+        for question, vector in zip(unseen_questions, unseen_vectors):
+            output, _ = cache.lookup(question, vector, "benchmark")
+            unseen_hits += output is not None
+        
+        print(
+            f"  {threshold:.2f}     {useful_hits / len(paraphrases):>6.1%}          "
+            f"{wrong_hits / len(paraphrases):>6.1%}             {unseen_hits / len(unseen_questions):>6.1%}"
+            f"          {np.percentile(lookup_ms, 50):.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
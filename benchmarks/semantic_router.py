@@ -0,0 +1,134 @@
+"""
+Comparación offline del router semántico local (kNN sobre embeddings) con el router LLM.
+
+Para un conjunto de preguntas etiquetadas reporta exactitud, latencia p50/p95,
+la exactitud por tramo de confianza del clasificador local y, para varios
+umbrales, qué fracción de preguntas recurriría al LLM y la exactitud combinada.
+
+Uso:
+    python benchmarks/semantic_router.py --db db_BAAI_bge-m3_json_metadata
+    python benchmarks/semantic_router.py --skip_llm
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config.settings import settings
+from src.io.vectordb import get_vector_store
+from src.io.llm import get_llm
+from src.steps.self_query import create_semantic_router
+from src.steps.semantic_classifier import EmbeddingCategoryClassifier
+
+
+LABELED_QUESTIONS = [
+    ("¿Qué dice el artículo 2 de la Constitución?", "constitucion"),
+    ("¿Cuáles son los derechos fundamentales de la persona?", "constitucion"),
+    ("¿Cómo se elige al Presidente de la República?", "constitucion"),
+    ("¿Cuántos congresistas tiene el Congreso?", "constitucion"),
+    ("¿Qué funciones tiene el Tribunal Constitucional?", "constitucion"),
+    ("¿Qué es el hábeas corpus?", "constitucion"),
+    ("¿Cuál es el régimen económico del Perú según la Constitución?", "constitucion"),
+    ("¿Quién puede ser elegido alcalde?", "constitucion"),
+    ("¿Cómo se reforma la Constitución?", "constitucion"),
+    ("¿Qué establece la Constitución sobre la educación?", "constitucion"),
+    ("¿Cuál es el plazo del periodo de prueba en el contrato de trabajo?", "derecho_laboral"),
+    ("¿Qué dice la ley sobre el despido arbitrario?", "derecho_laboral"),
+    ("¿Qué requisitos tiene el contrato de trabajo sujeto a modalidad?", "derecho_laboral"),
+    ("¿Qué regula el Decreto Legislativo 728?", "derecho_laboral"),
+    ("¿Qué establece la ley de prevención del hostigamiento sexual?", "derecho_laboral"),
+    ("¿Cómo se regula la jornada de trabajo en sobretiempo?", "derecho_laboral"),
+    ("¿Qué dice el convenio de la OIT sobre trabajo forzoso?", "derecho_laboral"),
+    ("¿Cómo se calcula la indemnización por despido arbitrario?", "derecho_laboral"),
+    ("¿Cuál es el reglamento de la ley de seguridad y salud en el trabajo?", "derecho_laboral"),
+    ("¿Qué establece la ley de modalidades formativas laborales?", "derecho_laboral"),
+    ("¿Debo firmar un contrato si ya trabajo más de un año sin contrato?", "faq"),
+    ("¿Qué hago si mi empleador no me registra en planilla?", "faq"),
+    ("¿Cuántos días de vacaciones me corresponden?", "faq"),
+    ("¿Cuándo me deben pagar la gratificación?", "faq"),
+    ("¿Me corresponde asignación familiar si tengo un hijo?", "faq"),
+    ("¿Puedo pedir licencia por paternidad?", "faq"),
+    ("¿Dónde denuncio si no me pagan la CTS?", "faq"),
+    ("¿Mi empleador debe implementar un lactario?", "faq"),
+    ("¿Cómo se calcula mi liquidación de beneficios sociales?", "faq"),
+    ("¿Qué pasa si trabajo en mi día de descanso?", "faq"),
+]
+
+
+def percentile(values, q):
+    return float(np.percentile(np.array(values), q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el router semántico local con el router LLM")
+    parser.add_argument("--db", default="db_BAAI_bge-m3_json_metadata", help="Carpeta de la BD vectorial")
+    parser.add_argument("--embedding_model", default="BAAI/bge-m3", help="Modelo de embeddings")
+    parser.add_argument("--model", default="llama3.1:8b", help="Modelo de Ollama para el router LLM")
+    parser.add_argument("--skip_llm", action="store_true", help="Solo evalúa el clasificador local")
+    args = parser.parse_args()
+    # Se mide el modelo, no el caché persistente de embeddings
+    settings.ENABLE_EMBEDDING_CACHE = False
+    
+    vectorstore = get_vector_store(args.db, args.embedding_model)
+    classifier = EmbeddingCategoryClassifier.from_vectorstore(vectorstore)
+    llm_router = None if args.skip_llm else create_semantic_router(get_llm(model_name=args.model, temperature=0.0))
+    
+    rows = []
+    for question, label in LABELED_QUESTIONS:
+        start = time.perf_counter()
+        embedding = vectorstore.embeddings.embed_query(question)
+        embed_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        category, confidence, _ = classifier.classify(embedding)
+        classify_ms = (time.perf_counter() - start) * 1000
+        
+        llm_category, llm_ms = None, None
+        if llm_router is not None:
+            start = time.perf_counter()
+            llm_category = llm_router.invoke({"question": question})["semantic_category"]
+            llm_ms = (time.perf_counter() - start) * 1000
+        
+        rows.append((label, category, confidence, embed_ms, classify_ms, llm_category, llm_ms))
+    
+    local_correct = np.array([row[0] == row[1] for row in rows])
+    confidences = np.array([row[2] for row in rows])
+    
+    print(f"Preguntas etiquetadas: {len(rows)}")
+    print(
+        f"local: exactitud={local_correct.mean():.3f}  "
+        f"clasificación p50={percentile([r[4] for r in rows], 50):.3f} ms p95={percentile([r[4] for r in rows], 95):.3f} ms  "
+        f"(embedding p50={percentile([r[3] for r in rows], 50):.1f} ms, compartido con la recuperación)"
+    )
+    
+    if llm_router is not None:
+        llm_correct = np.array([row[0] == row[5] for row in rows])
+        print(
+            f"  llm: exactitud={llm_correct.mean():.3f}  "
+            f"p50={percentile([r[6] for r in rows], 50):.0f} ms p95={percentile([r[6] for r in rows], 95):.0f} ms"
+        )
+    
+    print("\nExactitud local por tramo de confianza:")
+    for low, high in ((0.0, 0.5), (0.5, 0.75), (0.75, 0.9), (0.9, 1.01)):
+        mask = (confidences >= low) & (confidences < high)
+        if mask.any():
+            print(f"  [{low:.2f}, {min(high, 1.0):.2f}): n={mask.sum():>3}  exactitud={local_correct[mask].mean():.3f}")
+    
+    print("\nUmbral  respaldo_llm  exactitud_combinada")
+    for threshold in (0.5, 0.6, 0.7, 0.75, 0.8, 0.9):
+        fallback = confidences < threshold
+        if llm_router is not None:
+            combined = np.where(fallback, llm_correct, local_correct).mean()
+            combined_text = f"{combined:.3f}"
+        else:
+            combined_text = f"{local_correct[~fallback].mean():.3f} (solo aceptadas)" if (~fallback).any() else "-"
+        print(f"  {threshold:.2f}    {fallback.mean():>6.1%}       {combined_text}")
+
+
+if __name__ == "__main__":
+    main()
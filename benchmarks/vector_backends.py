@@ -0,0 +1,110 @@
+"""
+Benchmark de backends vectoriales: Chroma (HNSW + SQLite) vs búsqueda exacta con NumPy.
+
+Para cada tamaño de corpus crea una colección de Chroma temporal con vectores sintéticos
+agrupados (temas) y metadatos de tipo catálogo, la exporta con `NumpyVectorStore` y mide
+la latencia por consulta (p50/p95) y el recall@k de cada backend frente al top-k exacto,
+con y sin filtro de metadatos.
+
+Uso:
+    python benchmarks/vector_backends.py --sizes 1000 5000 20000 --queries 200 --k 15
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_chroma import Chroma
+
+from src.io.chunk_records import query_chunks
+from src.io.numpy_store import NumpyVectorStore
+
+
+SOURCES = ["Constitución Política del Perú", "Compendio Derecho Laboral", "Preguntas Frecuentes"]
+FILTER = {"$and": [{"source": {"$eq": SOURCES[1]}}, {"year": {"$eq": 2001}}]}
+
+
+def synthetic_corpus(size: int, dimension: int, topics: int, rng: np.random.Generator):
+    centers = rng.standard_normal((topics, dimension)).astype(np.float32)
+    labels = rng.integers(0, topics, size)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((size, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = [
+        {"source": SOURCES[i % len(SOURCES)], "year": int(rng.choice([1993, 1997, 2001])), "chunk_index": i}
+        for i in range(size)
+    ]
+    return vectors, metadatas, centers
+
+
+def build_chroma(path: Path, vectors: np.ndarray, metadatas) -> Chroma:
+    chroma = Chroma(persist_directory=str(path))
+    for start in range(0, len(vectors), 5000):
+        end = start + 5000
+        chroma._collection.add(
+            ids=[f"chunk-{i}" for i in range(start, min(end, len(vectors)))],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"texto {i}" for i in range(start, min(end, len(vectors)))],
+            metadatas=metadatas[start:end]
+        )
+    return chroma
+
+
+def exact_top_k(vectors, metadatas, query, k, where):
+    scores = vectors @ query
+    if where:
+        allowed = np.array([
+            metadata["source"] == SOURCES[1] and metadata["year"] == 2001 for metadata in metadatas
+        ])
+        scores = np.where(allowed, scores, -np.inf)
+    order = np.argsort(-scores)[:k]
+    return {f"chunk-{i}" for i in order if np.isfinite(scores[i])}
+
+
+def measure(store, queries, k, where, truth):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        batch = query_chunks(store, query.tolist(), k, where)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & set(batch.ids)) / max(len(expected), 1))
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), float(np.mean(recalls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia y recall de Chroma vs NumPy por tamaño de corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=15)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>7} {'filtro':>6} {'backend':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    
+    for size in args.sizes:
+        vectors, metadatas, centers = synthetic_corpus(size, args.dimension, args.topics, rng)
+        queries = centers[rng.integers(0, args.topics, args.queries)]
+        queries = queries + 0.6 * rng.standard_normal(queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            chroma = build_chroma(Path(tmp), vectors, metadatas)
+            numpy_store = NumpyVectorStore.load(Path(tmp), embedding_function=None)
+            
+            for where in (None, FILTER):
+                truth = [exact_top_k(vectors, metadatas, query, args.k, where) for query in queries]
+                for label, store in (("chroma", chroma), ("numpy", numpy_store)):
+                    query_chunks(store, queries[0].tolist(), args.k, where)
+                    p50, p95, recall = measure(store, queries, args.k, where, truth)
+                    print(f"{size:>7} {'sí' if where else 'no':>6} {label:>8} {p50:>8.3f} {p95:>8.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de shards por document_type: colección global filtrada vs shard de la categoría.
+
+Crea una colección de Chroma temporal con vectores sintéticos agrupados y una mezcla
+desigual de tipos de documento, construye los shards con `build_vector_shards` y mide, por
+shard, la latencia (p50/p95) y el recall@k frente al top-k exacto de la consulta filtrada
+sobre la colección global y de la consulta enrutada al shard. También compara la consulta
+sin filtro global con el fan-out en paralelo a todos los shards.
+
+Uso:
+    python benchmarks/vector_shards.py --size 20000 --queries 200 --k 15
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_chroma import Chroma
+
+from src.io.answer_cache import write_index_version
+from src.io.chunk_records import query_chunks
+from src.io.vector_shards import ShardedVectorStore, build_vector_shards
+
+
+DOCUMENT_TYPES = {
+    "constitucion": ("Constitución Política del Perú", 0.1),
+    "decreto": ("Compendio Derecho Laboral", 0.6),
+    "faq": ("Preguntas Frecuentes", 0.3)
+}
+
+
+def build_collection(path: Path, size: int, dimension: int, topics: int, rng: np.random.Generator):
+    centers = rng.standard_normal((topics, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, topics, size)] + 0.6 * rng.standard_normal((size, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    types = rng.choice(list(DOCUMENT_TYPES), size, p=[share for _, share in DOCUMENT_TYPES.values()])
+    metadatas = [{"document_type": str(kind), "source": DOCUMENT_TYPES[kind][0]} for kind in types]
+    
+    chroma = Chroma(persist_directory=str(path))
+    for start in range(0, size, 5000):
+        end = min(start + 5000, size)
+        chroma._collection.add(
+            ids=[f"chunk-{i}" for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"texto {i}" for i in range(start, end)],
+            metadatas=metadatas[start:end]
+        )
+    return chroma, vectors, types, centers
+
+
+def measure(store, queries, k, where, truth):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        batch = query_chunks(store, query.tolist(), k, where)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & set(batch.ids)) / max(len(expected), 1))
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), float(np.mean(recalls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia por shard: colección global filtrada vs shard enrutado")
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=15)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma, vectors, types, centers = build_collection(Path(tmp), args.size, args.dimension, args.topics, rng)
+        start = time.perf_counter()
+        manifest = build_vector_shards(chroma, Path(tmp), write_index_version(Path(tmp)))
+        print(f"{args.size} chunks, shards construidos en {time.perf_counter() - start:.2f} s")
+        sharded = ShardedVectorStore.load(chroma, Path(tmp))
+        
+        queries = centers[rng.integers(0, args.topics, args.queries)]
+        queries = queries + 0.6 * rng.standard_normal(queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        
+        print(f"\n{'shard':>13} {'chunks':>7} {'consulta':>18} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+        cases = [(kind, {"document_type": {"$eq": kind}}, types == kind) for kind in manifest["shards"]]
+        cases.append(("todos", None, np.ones(args.size, dtype=bool)))
+        for label, where, allowed in cases:
+            scores = np.where(allowed, vectors @ queries.T, -np.inf).T
+            truth = [{f"chunk-{i}" for i in np.argsort(-row)[:args.k]} for row in scores]
+            chunks = int(allowed.sum())
+            modes = (("global + filtro" if where else "global", chroma), ("shard" if where else "fan-out", sharded))
+            for mode, store in modes:
+                query_chunks(store, queries[0].tolist(), args.k, where)
+                p50, p95, recall = measure(store, queries, args.k, where, truth)
+                print(f"{label:>13} {chunks:>7} {mode:>18} {p50:>8.3f} {p95:>8.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,5 @@
-
 import argparse
-import torch
 from src.indexer import create_knowledge_base
-from langchain_huggingface import HuggingFaceEmbeddings
 from config.settings import settings
 
 if __name__ == "__main__":
@@ -12,21 +9,27 @@ if __name__ == "__main__":
     parser.add_argument("--chunk_size", type=int, default=settings.CHUNK_SIZE, help="Tamaño de chunk")
     parser.add_argument("--chunk_overlap", type=int, default=settings.CHUNK_OVERLAP, help="Overlap entre chunks")
     parser.add_argument("--force_reindex", action="store_true", help="Forzar re-indexación")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de embeddings en CPU (1 = proceso actual)")
+    parser.add_argument("--batch-size", dest="batch_size", type=int, default=None,
+                       help="Textos por llamada al modelo de embeddings en cada worker")
+    parser.add_argument("--pdf-workers", dest="pdf_workers", type=int, default=None,
+                       help="Procesos para extraer el texto de los PDFs (por defecto, uno por núcleo)")
     
     args = parser.parse_args()
     
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    
-    embedding_model = HuggingFaceEmbeddings(
-        model_name=args.embedding_model,
-        model_kwargs={"device": device},
-        encode_kwargs={"batch_size": 1200, "normalize_embeddings": True}
-    )
-    
-    create_knowledge_base(
-        embedding_model=embedding_model,
+    stats = create_knowledge_base(
         embedding_model_name=args.embedding_model,
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
-        force_reindex=args.force_reindex
-    )
\ No newline at end of file
+        force_reindex=args.force_reindex,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        pdf_workers=args.pdf_workers
+    )
+    
+    if stats:
+        print(f"{stats['added']} chunks indexados en {stats['embed_seconds']} s "
+              f"({stats['chunks_per_second']} chunks/s con {args.workers} worker(s))")
+        pdf_stats = stats["pdf"]
+        print(f"PDFs: {pdf_stats['pages']} páginas de {pdf_stats['files']} archivo(s) en {pdf_stats['seconds']} s "
+              f"({pdf_stats['cached_pages']} desde caché, {pdf_stats['parsed_pages']} parseadas)")
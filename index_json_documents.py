@@ -2,6 +2,7 @@
 Script para indexar documentos JSON con metadatos en la base de datos vectorial.
 """
 
+import argparse
 import sys
 import os
 import json
@@ -13,12 +14,12 @@ from src.indexing_logic import index_json_documents
 from src.config.settings import settings
 
 
-def index_all_json_documents():
+def index_all_json_documents(workers: int = 1, batch_size: int = None):
     """Indexa todos los archivos JSON de la carpeta datajson con estrategia Small-to-Big."""
     
     embedding_model_name = "BAAI/bge-m3"
     db_identifier = "json_metadata"
-    force_reindex = True
+    force_reindex = False
     
     chunk_size = 500 
     chunk_overlap = 50 
@@ -45,16 +46,29 @@ def index_all_json_documents():
             continue
         
         try:
-            index_json_documents(
+            stats = index_json_documents(
                 json_file_path=file_path,
                 embedding_model_name=embedding_model_name,
                 db_identifier=db_identifier,
                 force_reindex=force_reindex,
                 chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap
+                chunk_overlap=chunk_overlap,
+                batch_size=batch_size,
+                workers=workers
             )
         except Exception:
             continue
+        
+        if stats:
+            throughput = f", {stats['chunks_per_second']} chunks/s" if stats["chunks_per_second"] else ""
+            print(f"{json_file['description']}: +{stats['added']} ~{stats['updated']} -{stats['deleted']} "
+                  f"={stats['unchanged']} chunks ({workers} worker(s){throughput})")
 
 if __name__ == "__main__":
-    index_all_json_documents()
+    parser = argparse.ArgumentParser(description="Indexar los JSON de datajson")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de embeddings en CPU (1 = proceso actual)")
+    parser.add_argument("--batch-size", dest="batch_size", type=int, default=None,
+                        help="Textos por llamada al modelo de embeddings en cada worker")
+    args = parser.parse_args()
+    
+    index_all_json_documents(workers=args.workers, batch_size=args.batch_size)
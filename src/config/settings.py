@@ -24,6 +24,106 @@ class Settings:
     DEFAULT_TOP_K: int = int(os.getenv("DEFAULT_TOP_K", "10"))
     DEFAULT_TEMPERATURE: float = float(os.getenv("DEFAULT_TEMPERATURE", "0.0"))
     
+    # Modo del ensamblador de recuperación: "cascade" (una consulta por estrategia)
+    # u "overfetch" (un pool de candidatos evaluado en memoria)
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "cascade")
+    OVERFETCH_K: int = int(os.getenv("OVERFETCH_K", "200"))
+    
+    # Enrutamiento: "separate" (corrector, router semántico y extractor de filtros)
+    # o "fused" (una sola llamada estructurada al LLM)
+    ROUTER_MODE: str = os.getenv("ROUTER_MODE", "separate")
+    
+    # Router semántico: "llm" o "embedding" (kNN local sobre los chunks indexados,
+    # con el LLM como respaldo cuando la confianza es menor al umbral)
+    SEMANTIC_ROUTER_MODE: str = os.getenv("SEMANTIC_ROUTER_MODE", "llm")
+    LOCAL_ROUTER_THRESHOLD: float = float(os.getenv("LOCAL_ROUTER_THRESHOLD", "0.75"))
+    LOCAL_ROUTER_K: int = int(os.getenv("LOCAL_ROUTER_K", "25"))
+    LOCAL_ROUTER_TEMPERATURE: float = float(os.getenv("LOCAL_ROUTER_TEMPERATURE", "0.02"))
+    
+    # Ruta rápida determinista para referencias explícitas (artículo, norma, FAQ)
+    ENABLE_FAST_PATH: bool = os.getenv("ENABLE_FAST_PATH", "true").lower() == "true"
+    FAST_PATH_MAX_CHUNKS: int = int(os.getenv("FAST_PATH_MAX_CHUNKS", "30"))
+    
+    # Corrector ortográfico local con el vocabulario del corpus y una lista de palabras del
+    # español (una por línea): el LLM solo corrige preguntas que no puede resolver. Sin
+    # SPELL_WORDLIST_PATH el corrector local no se activa y todo pasa por el LLM
+    ENABLE_LOCAL_SPELL_CHECK: bool = os.getenv("ENABLE_LOCAL_SPELL_CHECK", "true").lower() == "true"
+    SPELL_WORDLIST_PATH: str = os.getenv("SPELL_WORDLIST_PATH", "")
+    SPELL_MAX_EDIT_DISTANCE: int = int(os.getenv("SPELL_MAX_EDIT_DISTANCE", "2"))
+    SPELL_MIN_WORD_COUNT: int = int(os.getenv("SPELL_MIN_WORD_COUNT", "2"))
+    
+    # Caché persistente (SQLite, LRU) de las llamadas deterministas de enrutamiento y reescritura
+    ENABLE_LLM_CACHE: bool = os.getenv("ENABLE_LLM_CACHE", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "./cache/llm_cache.sqlite3")
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    
+    # Caché de respuestas completas (memoria + SQLite), invalidada al reindexar
+    ENABLE_ANSWER_CACHE: bool = os.getenv("ENABLE_ANSWER_CACHE", "true").lower() == "true"
+    ANSWER_CACHE_PATH: str = os.getenv("ANSWER_CACHE_PATH", "./cache/answer_cache.sqlite3")
+    ANSWER_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Caché semántica de paráfrasis (embeddings de preguntas en memoria)
+    ENABLE_SEMANTIC_CACHE: bool = os.getenv("ENABLE_SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+    SEMANTIC_CACHE_AUDIT_LOG: str = os.getenv("SEMANTIC_CACHE_AUDIT_LOG", "./cache/semantic_cache_audit.jsonl")
+    
+    # Caché persistente de embeddings (vectores mapeados en memoria + índice SQLite, LRU)
+    # compartido por la indexación y las consultas
+    ENABLE_EMBEDDING_CACHE: bool = os.getenv("ENABLE_EMBEDDING_CACHE", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+    
+    # Extracción de PDFs en procesos (0 = un worker por núcleo) con caché de texto por página
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+    ENABLE_PDF_PAGE_CACHE: bool = os.getenv("ENABLE_PDF_PAGE_CACHE", "true").lower() == "true"
+    PDF_PAGE_CACHE_PATH: str = os.getenv("PDF_PAGE_CACHE_PATH", "./cache/pdf_pages.sqlite3")
+    
+    # Expansión del contexto tras el re-ranking con el almacén de documentos padre:
+    # "stitch" (une chunks contiguos sin solapamiento), "parent" (documento completo
+    # dentro del presupuesto de tokens) o "none"
+    CONTEXT_EXPANSION_MODE: str = os.getenv("CONTEXT_EXPANSION_MODE", "stitch")
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+    
+    # Backend de búsqueda vectorial: "chroma" (HNSW) o "numpy" (búsqueda exacta sobre una
+    # exportación de la colección a una matriz .npy mapeada en memoria, para corpus pequeños)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma")
+    
+    # Búsqueda híbrida: índice léxico BM25 (construido al indexar, junto a cada BD) cuyos
+    # resultados se fusionan con los de la búsqueda densa mediante Reciprocal Rank Fusion
+    ENABLE_HYBRID_SEARCH: bool = os.getenv("ENABLE_HYBRID_SEARCH", "true").lower() == "true"
+    BM25_K1: float = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B: float = float(os.getenv("BM25_B", "0.75"))
+    RRF_K: int = int(os.getenv("RRF_K", "60"))
+    
+    # Una colección de Chroma por document_type, construida al indexar JSON. Las consultas que
+    # fijan el tipo o la fuente van a su shard; las demás consultan todos en paralelo. Si la
+    # categoría del router tiene confianza menor que CATEGORY_MIN_CONFIDENCE también se consultan todos
+    ENABLE_VECTOR_SHARDS: bool = os.getenv("ENABLE_VECTOR_SHARDS", "true").lower() == "true"
+    CATEGORY_MIN_CONFIDENCE: float = float(os.getenv("CATEGORY_MIN_CONFIDENCE", "0.5"))
+    
+    # Caché LRU en memoria de puntuaciones del re-ranker por (pregunta normalizada, chunk_id)
+    ENABLE_RERANK_CACHE: bool = os.getenv("ENABLE_RERANK_CACHE", "true").lower() == "true"
+    RERANK_CACHE_MAX_ENTRIES: int = int(os.getenv("RERANK_CACHE_MAX_ENTRIES", "50000"))
+    
+    # Micro-batching entre peticiones concurrentes de los embeddings de consulta y del
+    # re-ranker: se esperan hasta MICRO_BATCH_MAX_WAIT_MS o MICRO_BATCH_MAX_SIZE entradas
+    ENABLE_MICRO_BATCHING: bool = os.getenv("ENABLE_MICRO_BATCHING", "true").lower() == "true"
+    MICRO_BATCH_MAX_WAIT_MS: float = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "3"))
+    MICRO_BATCH_MAX_SIZE: int = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+    
+    # Backend de inferencia del embedder y del re-ranker en CPU: "torch" (fp32) u "onnx-int8"
+    # (exportación ONNX con cuantización dinámica int8, guardada en ONNX_CACHE_PATH la primera
+    # vez). ONNX_QUANTIZATION_CONFIG: "avx512_vnni", "avx512", "avx2" o "arm64"
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch")
+    ONNX_CACHE_PATH: str = os.getenv("ONNX_CACHE_PATH", "./cache/onnx")
+    ONNX_QUANTIZATION_CONFIG: str = os.getenv("ONNX_QUANTIZATION_CONFIG", "avx2")
+    
+    # Tokens del re-ranker de cada chunk calculados al indexar: en cada petición solo se
+    # tokeniza la pregunta
+    ENABLE_RERANK_TOKEN_CACHE: bool = os.getenv("ENABLE_RERANK_TOKEN_CACHE", "true").lower() == "true"
+    
     # Configuración de self-querying
     ENABLE_SELF_QUERY: bool = os.getenv("ENABLE_SELF_QUERY", "true").lower() == "true"
     
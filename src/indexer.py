@@ -9,17 +9,23 @@ def create_knowledge_base(
     embedding_model_name: Optional[str] = None,
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None,
-    force_reindex: bool = False
+    force_reindex: bool = False,
+    workers: int = 1,
+    batch_size: Optional[int] = None,
+    pdf_workers: Optional[int] = None
 ):
     """
     Función principal para crear la base de conocimiento.
     Esta función es llamada desde index.py
     """
-    index_raw_documents(
+    return index_raw_documents(
         embedding_model_name=embedding_model_name,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        force_reindex=force_reindex
+        force_reindex=force_reindex,
+        workers=workers,
+        batch_size=batch_size,
+        pdf_workers=pdf_workers
     )
 
 
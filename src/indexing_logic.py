@@ -2,43 +2,68 @@
 from pathlib import Path
 import torch
 import json
-from typing import List, Dict, Any, Optional
+import hashlib
+import itertools
+import re
+import time
+from collections import Counter, deque
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader, TextLoader
+from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from config import settings
+from .io.catalog import CATALOG_FIELDS, CorpusCatalogBuilder, write_corpus_catalog
+from .io.vocabulary import WORD_PATTERN, update_corpus_vocabulary, write_corpus_vocabulary
+from .io.answer_cache import IndexVersion, write_index_version
+from .io.embedding_pool import EmbeddingPool
+from .io.embedding_cache import cached_embeddings
+from .io.pdf_pages import load_pdf_documents, load_pdf_page_cache
+from .io.parent_store import ParentStoreWriter
+from .io.lexical_index import build_lexical_index
+from .io.vector_shards import ensure_vector_shards
+from .io.rerank_tokens import build_rerank_token_cache
 
-def get_embedding_model(model_name: str) -> HuggingFaceEmbeddings:
-    """Función auxiliar para inicializar el modelo de embeddings."""
+def get_embedding_model(model_name: str, batch_size: Optional[int] = None) -> Embeddings:
+    """Función auxiliar para inicializar el modelo de embeddings (con caché persistente si está activa)."""
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    return HuggingFaceEmbeddings(
+    encode_kwargs = {"normalize_embeddings": True}
+    if batch_size:
+        encode_kwargs["batch_size"] = batch_size
+    embeddings = HuggingFaceEmbeddings(
         model_name=model_name,
         model_kwargs={"device": device},
-        encode_kwargs={"normalize_embeddings": True}
+        encode_kwargs=encode_kwargs
     )
+    return cached_embeddings(embeddings, model_name, normalize=True)
 
 def index_raw_documents(
     embedding_model_name: Optional[str] = None,
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None,
-    force_reindex: bool = False
-):
+    force_reindex: bool = False,
+    workers: int = 1,
+    batch_size: Optional[int] = None,
+    pdf_workers: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
     """
     Carga, divide y crea una base de datos vectorial a partir de documentos en bruto.
     Permite sobrescribir la configuración por defecto para experimentación.
+    Con `workers > 1` los embeddings se calculan en un pool de procesos.
+    Los PDFs se parsean en `pdf_workers` procesos y los que no cambiaron salen del caché de páginas.
     """
     final_embedding_model = embedding_model_name or settings.EMBEDDER_MODEL
     final_chunk_size = chunk_size or settings.CHUNK_SIZE
     final_chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
-
+    
     safe_model_name = final_embedding_model.replace("/", "_")
     db_folder_name = f"db_{safe_model_name}_cs{final_chunk_size}_co{final_chunk_overlap}"
     persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
@@ -46,111 +71,409 @@ def index_raw_documents(
     db_exists = persist_path.is_dir() and (persist_path / "chroma.sqlite3").exists()
     if db_exists and not force_reindex:
         return
-
-    pdf_loader = DirectoryLoader(settings.DATA_PATH, glob="**/*.pdf", loader_cls=PyPDFLoader, show_progress=True, use_multithreading=True)
+    
+    pdf_docs, pdf_stats = load_pdf_documents(settings.DATA_PATH, workers=pdf_workers, cache=load_pdf_page_cache())
     txt_loader = DirectoryLoader(settings.DATA_PATH, glob="**/*.txt", loader_cls=TextLoader, show_progress=True)
-    docs = pdf_loader.load() + txt_loader.load()
-
+    docs = pdf_docs + txt_loader.load()
+    
     if not docs:
         return
-
+    
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=final_chunk_size,
         chunk_overlap=final_chunk_overlap
     )
     splits = text_splitter.split_documents(docs)
+    
+    if workers > 1:
+        embedding_pool = EmbeddingPool(final_embedding_model, workers=workers, batch_size=batch_size or 32)
+        # Arranque de los workers y carga del modelo fuera de la medición
+        embedding_pool.embed_documents(["calentamiento"] * workers)
+        embedding_function = cached_embeddings(embedding_pool, final_embedding_model)
+    else:
+        embedding_function = get_embedding_model(final_embedding_model, batch_size=batch_size)
+    
+    start = time.perf_counter()
+    try:
+        vector_store = Chroma.from_documents(
+            documents=splits,
+            embedding=embedding_function,
+            persist_directory=str(persist_path)
+        )
+    finally:
+        if workers > 1:
+            embedding_function.close()
+    elapsed = time.perf_counter() - start
+    
+    update_corpus_vocabulary(persist_path, "raw_documents", (split.page_content for split in splits))
+    index_version = write_index_version(persist_path)
+    build_lexical_index(vector_store, persist_path, index_version)
+    build_rerank_token_cache(vector_store, persist_path, index_version)
+    
+    return {
+        "added": len(splits),
+        "embed_seconds": round(elapsed, 3),
+        "chunks_per_second": round(len(splits) / elapsed, 1) if elapsed else None,
+        "pdf": pdf_stats
+    }
 
-    embedding_function = get_embedding_model(final_embedding_model)
-    Chroma.from_documents(
-        documents=splits,
-        embedding=embedding_function,
-        persist_directory=str(persist_path)
-    )
 
+MANIFEST_FILE_NAME = "index_manifest.json"
+MANIFEST_VERSION = 2
+INDEX_BATCH_SIZE = 256
+JSON_WHITESPACE = re.compile(r"\s*")
 
-def index_json_documents(
-    json_file_path: str,
-    embedding_model_name: str,
-    db_identifier: str,
-    force_reindex: bool = False,
-    chunk_size: int = 1200,
-    chunk_overlap: int = 100
-):
-    """
-    Crea una base de datos vectorial a partir de un archivo JSON con documentos pre-formateados.
-    Implementa la estrategia "Small-to-Big" con chunks pequeños que heredan metadatos del documento padre.
-    """
-    safe_model_name = embedding_model_name.replace("/", "_")
-    db_folder_name = f"db_{safe_model_name}_{db_identifier}"
-    persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
-
-    db_exists = persist_path.is_dir() and (persist_path / "chroma.sqlite3").exists()
-    if db_exists and not force_reindex:
-        return
 
+def read_index_manifest(persist_path: Path) -> Optional[Dict[str, Any]]:
+    manifest_path = persist_path / MANIFEST_FILE_NAME
+    if not manifest_path.exists():
+        return None
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            formatted_docs = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def write_index_manifest(persist_path: Path, manifest: Dict[str, Any]) -> None:
+    manifest_path = persist_path / MANIFEST_FILE_NAME
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def iter_json_array(json_file_path: str, read_size: int = 1 << 20) -> Iterator[Any]:
+    """Recorre los elementos de un arreglo JSON sin cargar el archivo completo en memoria."""
+    decoder = json.JSONDecoder()
+    
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size)
+        position = JSON_WHITESPACE.match(buffer).end()
+        if buffer[position:position + 1] != "[":
+            raise json.JSONDecodeError("Se esperaba un arreglo JSON", buffer, position)
+        position += 1
+        eof = False
+        
+        while True:
+            position = JSON_WHITESPACE.match(buffer, position).end()
+            if buffer.startswith(",", position):
+                position = JSON_WHITESPACE.match(buffer, position + 1).end()
+            if buffer.startswith("]", position):
+                return
+            
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                item, end = None, None
+            
+            if end is None or (end == len(buffer) and not eof):
+                if eof:
+                    raise json.JSONDecodeError("Arreglo JSON incompleto", buffer, position)
+                more = f.read(read_size)
+                eof = not more
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            
+            yield item
+            position = end
 
-    if not formatted_docs:
-        return
 
+def iter_json_chunks(
+    formatted_docs: Iterable[Dict[str, Any]],
+    corpus_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    parent_writer: Optional[ParentStoreWriter] = None
+) -> Iterator[Document]:
+    """
+    Divide los documentos en chunks pequeños que heredan los metadatos filtrables del padre.
+    
+    Cada chunk solo lleva los campos del catálogo (los que usan los filtros de Chroma) y
+    su posición (`corpus`, `original_doc_index`, `chunk_index`). El resto de metadatos del
+    padre y su número de chunks se guardan una sola vez en `parent_writer`; `chunk_id` es
+    el id del `Document` (y de Chroma) y `chunk_size` la longitud del texto.
+    
+    El chunk_id es un hash del corpus, el texto del chunk, los metadatos guardados, su
+    posición dentro del documento y los parámetros del splitter, así que solo cambia si
+    cambia el chunk. `original_doc_index` queda fuera del hash: reordenar el JSON solo
+    actualiza metadatos.
+    """
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         length_function=len,
     )
     
-    all_small_chunks = []
+    seen_hashes: Dict[str, int] = {}
     
     for i, doc in enumerate(formatted_docs):
         content = doc.get("content", "")
         metadata = doc.get("metadata", {})
+        filter_metadata = {field: metadata[field] for field in CATALOG_FIELDS if field in metadata}
         
-        if len(content) > chunk_size:
-            text_chunks = text_splitter.split_text(content)
+        text_chunks = text_splitter.split_text(content) if len(content) > chunk_size else [content]
+        if parent_writer is not None:
+            parent_writer.add(content, metadata, len(text_chunks))
+        
+        for j, chunk_text in enumerate(text_chunks):
+            chunk_hash = hashlib.sha256(json.dumps(
+                [corpus_name, chunk_text, filter_metadata, j, len(text_chunks), chunk_size, chunk_overlap],
+                ensure_ascii=False, sort_keys=True, default=str
+            ).encode("utf-8")).hexdigest()[:24]
+            
+            occurrence = seen_hashes.get(chunk_hash, 0)
+            seen_hashes[chunk_hash] = occurrence + 1
+            chunk_id = f"{corpus_name}-{chunk_hash}" + (f"-{occurrence}" if occurrence else "")
             
-            for j, chunk_text in enumerate(text_chunks):
-                chunk_metadata = {
-                    **metadata,
-                    "chunk_id": f"doc_{i}_chunk_{j}",
-                    "chunk_index": j,
-                    "total_chunks": len(text_chunks),
-                    "original_doc_index": i,
-                    "chunk_size": len(chunk_text)
-                }
-                
-                small_doc = Document(
-                    page_content=chunk_text,
-                    metadata=chunk_metadata
-                )
-                all_small_chunks.append(small_doc)
-                
-        else:
             chunk_metadata = {
-                **metadata,
-                "chunk_id": f"doc_{i}_chunk_0",
-                "chunk_index": 0,
-                "total_chunks": 1,
+                **filter_metadata,
+                "corpus": corpus_name,
                 "original_doc_index": i,
-                "chunk_size": len(content)
+                "chunk_index": j
             }
             
-            small_doc = Document(
-                page_content=content,
-                metadata=chunk_metadata
-            )
-            all_small_chunks.append(small_doc)
-    
-    embedding_function = get_embedding_model(embedding_model_name)
-    
-    Chroma.from_documents(
-        documents=all_small_chunks,
-        embedding=embedding_function,
-        persist_directory=str(persist_path)
-    )
+            yield Document(page_content=chunk_text, metadata=chunk_metadata, id=chunk_id)
+
+
+def existing_chunk_positions(vector_store: Chroma, corpus_name: str, page_size: int = 5000) -> Dict[str, int]:
+    """ids del corpus ya indexados con su `original_doc_index`, leídos por páginas."""
+    positions = {}
+    offset = 0
+    while True:
+        page = vector_store.get(where={"corpus": corpus_name}, include=["metadatas"], limit=page_size, offset=offset)
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            positions[chunk_id] = metadata.get("original_doc_index")
+        if len(page["ids"]) < page_size:
+            return positions
+        offset += page_size
+
+
+def index_json_documents(
+    json_file_path: str,
+    embedding_model_name: str,
+    db_identifier: str,
+    force_reindex: bool = False,
+    chunk_size: int = 1200,
+    chunk_overlap: int = 100,
+    batch_size: int = None,
+    workers: int = 1,
+    embedding_pool: Optional[EmbeddingPool] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Sincroniza un corpus JSON con la base de datos vectorial de forma incremental.
+    Implementa la estrategia "Small-to-Big" con chunks pequeños que heredan metadatos del documento padre.
+    
+    El JSON se lee en streaming y los chunks se generan a medida que se necesitan: los
+    embeddings se calculan y escriben por lotes de `batch_size`, así que la memoria no
+    crece con el tamaño del corpus. Solo se procesan los chunks nuevos o modificados; se
+    borran los chunks cuyo documento desapareció y a los demás solo se les actualizan los
+    metadatos de posición. Con `force_reindex` se recalculan todos los embeddings del corpus.
+    
+    Con `workers > 1` (o un `embedding_pool` compartido entre corpus) los embeddings se
+    calculan en procesos separados mientras el proceso principal escribe el lote anterior.
+    Los textos ya presentes en el caché persistente de embeddings no pasan por el modelo.
+    El texto completo de cada documento se guarda en el almacén de padres del corpus para
+    expandir el contexto en consulta (ver `steps.context_expansion`).
+    """
+    safe_model_name = embedding_model_name.replace("/", "_")
+    db_folder_name = f"db_{safe_model_name}_{db_identifier}"
+    persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
+    corpus_name = Path(json_file_path).stem
+    encode_batch_size = batch_size
+    batch_size = batch_size or INDEX_BATCH_SIZE
+    
+    try:
+        documents = iter_json_array(json_file_path)
+        documents = itertools.chain([next(documents)], documents)
+    except (OSError, StopIteration, json.JSONDecodeError):
+        return None
+    
+    db_exists = persist_path.is_dir() and (persist_path / "chroma.sqlite3").exists()
+    manifest = read_index_manifest(persist_path) if db_exists else None
+    
+    vector_store = Chroma(persist_directory=str(persist_path))
+    if db_exists and (manifest is None or manifest.get("embedding_model") != embedding_model_name):
+        # BD creada antes de los ids estables (o con otro modelo): se reconstruye una vez
+        vector_store.delete_collection()
+        vector_store = Chroma(persist_directory=str(persist_path))
+        manifest = None
+    
+    manifest = manifest or {"version": MANIFEST_VERSION, "embedding_model": embedding_model_name, "corpora": {}}
+    # Versión de la que parten los shards: con ella solo se les aplican los ids cambiados
+    previous_version = IndexVersion(persist_path).current()
+    upserted_ids: List[str] = []
+    deleted_ids: List[str] = []
+    
+    existing_positions = existing_chunk_positions(vector_store, corpus_name)
+    if force_reindex and existing_positions:
+        stale_ids = list(existing_positions)
+        for start in range(0, len(stale_ids), batch_size):
+            vector_store.delete(ids=stale_ids[start:start + batch_size])
+        deleted_count = len(stale_ids)
+        deleted_ids.extend(stale_ids)
+        existing_positions = {}
+    else:
+        deleted_count = 0
+    
+    embedding_store = None
+    pool_embeddings = None
+    owns_pool = embedding_pool is None and workers > 1
+    write_batch_size = batch_size * (embedding_pool.workers if embedding_pool is not None else max(1, workers))
+    in_flight = deque()
+    pending_chunks: List[Document] = []
+    pending_updates: List[Document] = []
+    stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0, "embed_seconds": 0.0}
+    catalog_builder = CorpusCatalogBuilder()
+    word_counts = Counter()
+    documents_count = 0
+    
+    def write_embedded(batch: List[Document], job) -> None:
+        vector_store._collection.add(
+            ids=[chunk.id for chunk in batch],
+            embeddings=job.get(),
+            metadatas=[chunk.metadata for chunk in batch],
+            documents=[chunk.page_content for chunk in batch]
+        )
+        upserted_ids.extend(chunk.id for chunk in batch)
+        stats["added"] += len(batch)
+    
+    def flush_additions():
+        nonlocal embedding_store, embedding_pool, pool_embeddings
+        if not pending_chunks:
+            return
+        if embedding_pool is None and workers > 1:
+            embedding_pool = EmbeddingPool(embedding_model_name, workers=workers, batch_size=encode_batch_size or 32)
+            embedding_pool.embed_query("")
+        if embedding_pool is not None and pool_embeddings is None:
+            pool_embeddings = cached_embeddings(embedding_pool, embedding_model_name)
+        
+        start = time.perf_counter()
+        batch = list(pending_chunks)
+        pending_chunks.clear()
+        
+        if embedding_pool is not None:
+            # El lote nuevo se calcula en los workers mientras se escribe el anterior
+            in_flight.append((batch, pool_embeddings.submit([chunk.page_content for chunk in batch])))
+            while len(in_flight) > 1:
+                write_embedded(*in_flight.popleft())
+        else:
+            if embedding_store is None:
+                embedding_store = Chroma(
+                    persist_directory=str(persist_path),
+                    embedding_function=get_embedding_model(embedding_model_name, batch_size=encode_batch_size)
+                )
+            embedding_store.add_documents(batch, ids=[chunk.id for chunk in batch])
+            upserted_ids.extend(chunk.id for chunk in batch)
+            stats["added"] += len(batch)
+        stats["embed_seconds"] += time.perf_counter() - start
+    
+    def drain_additions():
+        start = time.perf_counter()
+        while in_flight:
+            write_embedded(*in_flight.popleft())
+        stats["embed_seconds"] += time.perf_counter() - start
+    
+    def flush_updates():
+        if not pending_updates:
+            return
+        # Actualización solo de metadatos: `update_documents` volvería a calcular los embeddings
+        vector_store._collection.update(
+            ids=[chunk.id for chunk in pending_updates],
+            metadatas=[chunk.metadata for chunk in pending_updates]
+        )
+        upserted_ids.extend(chunk.id for chunk in pending_updates)
+        stats["updated"] += len(pending_updates)
+        pending_updates.clear()
+    
+    def publish_index_version() -> None:
+        # Nueva versión: invalida el caché de respuestas y pone al día los índices derivados
+        index_version = write_index_version(persist_path)
+        build_lexical_index(vector_store, persist_path, index_version)
+        ensure_vector_shards(vector_store, persist_path, index_version, previous_version, upserted_ids, deleted_ids)
+        build_rerank_token_cache(vector_store, persist_path, index_version)
+    
+    def count_documents(formatted_docs):
+        nonlocal documents_count
+        for doc in formatted_docs:
+            documents_count += 1
+            yield doc
+    
+    # El almacén de padres se reescribe siempre: es secuencial y no requiere embeddings
+    parent_writer = ParentStoreWriter(persist_path, corpus_name)
+    parent_written = False
+    parse_failed = False
+    try:
+        for chunk in iter_json_chunks(
+            count_documents(documents), corpus_name, chunk_size, chunk_overlap, parent_writer
+        ):
+            catalog_builder.add(chunk.metadata)
+            word_counts.update(WORD_PATTERN.findall(chunk.page_content.lower()))
+            
+            chunk_id = chunk.id
+            if chunk_id not in existing_positions:
+                pending_chunks.append(chunk)
+                if len(pending_chunks) >= write_batch_size:
+                    flush_additions()
+            elif existing_positions.pop(chunk_id) != chunk.metadata["original_doc_index"]:
+                pending_updates.append(chunk)
+                if len(pending_updates) >= batch_size:
+                    flush_updates()
+            else:
+                stats["unchanged"] += 1
+        flush_additions()
+        drain_additions()
+        flush_updates()
+        parent_writer.close()
+        parent_written = True
+    except (OSError, json.JSONDecodeError):
+        parse_failed = True
+    finally:
+        if not parent_written:
+            parent_writer.abort()
+        if owns_pool and embedding_pool is not None:
+            embedding_pool.close()
+    
+    if parse_failed:
+        # Chroma ya tiene los lotes escritos antes del error: se publica una versión nueva para
+        # que el caché de respuestas, BM25, los shards y los tokens coincidan con ella. El
+        # manifiesto, el catálogo y el vocabulario conservan la última lectura completa y los
+        # chunks no leídos no se borran; la próxima indexación termina la sincronización
+        if upserted_ids or deleted_ids:
+            publish_index_version()
+        return None
+    
+    stats["embed_seconds"] = round(stats["embed_seconds"], 3)
+    stats["chunks_per_second"] = round(stats["added"] / stats["embed_seconds"], 1) if stats["embed_seconds"] else None
+    
+    stale_ids = list(existing_positions)
+    for start in range(0, len(stale_ids), batch_size):
+        vector_store.delete(ids=stale_ids[start:start + batch_size])
+    deleted_ids.extend(stale_ids)
+    stats["deleted"] = deleted_count + len(stale_ids)
+    
+    manifest["corpora"][corpus_name] = {
+        "source_file": str(json_file_path),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "documents": documents_count,
+        "chunks": catalog_builder.total_chunks
+    }
+    persist_path.mkdir(parents=True, exist_ok=True)
+    write_index_manifest(persist_path, manifest)
+    
+    if not (stats["added"] or stats["updated"] or stats["deleted"]):
+        # BDs indexadas antes de que existieran los shards los obtienen sin reindexar
+        ensure_vector_shards(vector_store, persist_path)
+        return stats
+    
+    write_corpus_catalog(persist_path, corpus_name, catalog_builder.build())
+    write_corpus_vocabulary(persist_path, corpus_name, word_counts)
+    publish_index_version()
+    
+    return stats
 
 
 if __name__ == '__main__':
@@ -1,10 +1,60 @@
 from .vectordb import get_vector_store, get_embedding_function, get_self_query_retriever
-from .llm import get_llm, get_llm_with_structured_output
+from .llm import get_llm, get_llm_with_structured_output, invoke_llm, ainvoke_llm, record_llm_usage, summarize_llm_usage
+from .catalog import MetadataCatalog, load_metadata_catalog
+from .llm_cache import SQLiteLLMCache, get_llm_cache
+from .answer_cache import AnswerCache, get_answer_cache, write_index_version
+from .embedding_cache import CachedEmbeddings, EmbeddingStore, cached_embeddings
+from .pdf_pages import PDFPageCache, load_pdf_documents
+from .parent_store import ParentStore, load_parent_store
+from .chunk_records import ChunkBatch, ChunkRecord
+from .numpy_store import NumpyVectorStore
+from .lexical_index import LexicalIndex, build_lexical_index, load_lexical_index
+from .vector_shards import ShardedVectorStore, build_vector_shards, ensure_vector_shards
+from .micro_batcher import MicroBatcher, BatchedEmbeddings
+from .quantized_models import export_quantized_model
+from .rerank_tokens import RerankTokenCache, build_rerank_token_cache, load_rerank_token_cache
+from .vocabulary import load_vocabulary, load_wordlist, update_corpus_vocabulary
 
 __all__ = [
     'get_vector_store',
     'get_embedding_function', 
     'get_self_query_retriever',
     'get_llm',
-    'get_llm_with_structured_output'
+    'get_llm_with_structured_output',
+    'invoke_llm',
+    'ainvoke_llm',
+    'record_llm_usage',
+    'summarize_llm_usage',
+    'MetadataCatalog',
+    'load_metadata_catalog',
+    'SQLiteLLMCache',
+    'get_llm_cache',
+    'AnswerCache',
+    'get_answer_cache',
+    'write_index_version',
+    'CachedEmbeddings',
+    'EmbeddingStore',
+    'cached_embeddings',
+    'PDFPageCache',
+    'load_pdf_documents',
+    'ParentStore',
+    'load_parent_store',
+    'ChunkBatch',
+    'ChunkRecord',
+    'NumpyVectorStore',
+    'LexicalIndex',
+    'build_lexical_index',
+    'load_lexical_index',
+    'ShardedVectorStore',
+    'build_vector_shards',
+    'ensure_vector_shards',
+    'MicroBatcher',
+    'BatchedEmbeddings',
+    'export_quantized_model',
+    'RerankTokenCache',
+    'build_rerank_token_cache',
+    'load_rerank_token_cache',
+    'load_vocabulary',
+    'load_wordlist',
+    'update_corpus_vocabulary'
 ]
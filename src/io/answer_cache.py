@@ -0,0 +1,192 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config.settings import settings
+from ..text import normalize_text
+from ..types import PipelineOutput
+
+
+INDEX_VERSION_FILE_NAME = "index_version"
+# Settings que cambian la respuesta; las respuestas cacheadas con otros valores no se reutilizan.
+# Cada opción nueva que afecte a la recuperación, el re-ranking o la generación va aquí.
+ANSWER_SETTINGS = (
+    "OLLAMA_MODEL",
+    "RERANKER_MODEL",
+    "RERANKER_TOP_N",
+    "DEFAULT_TOP_K",
+    "DEFAULT_TEMPERATURE",
+    "RETRIEVAL_MODE",
+    "OVERFETCH_K",
+    "ROUTER_MODE",
+    "SEMANTIC_ROUTER_MODE",
+    "LOCAL_ROUTER_THRESHOLD",
+    "LOCAL_ROUTER_K",
+    "LOCAL_ROUTER_TEMPERATURE",
+    "ENABLE_FAST_PATH",
+    "FAST_PATH_MAX_CHUNKS",
+    "ENABLE_LOCAL_SPELL_CHECK",
+    "SPELL_WORDLIST_PATH",
+    "SPELL_MAX_EDIT_DISTANCE",
+    "SPELL_MIN_WORD_COUNT",
+    "CONTEXT_EXPANSION_MODE",
+    "CONTEXT_TOKEN_BUDGET",
+    "VECTOR_BACKEND",
+    "ENABLE_HYBRID_SEARCH",
+    "BM25_K1",
+    "BM25_B",
+    "RRF_K",
+    "ENABLE_VECTOR_SHARDS",
+    "CATEGORY_MIN_CONFIDENCE",
+    "INFERENCE_BACKEND",
+    "ONNX_QUANTIZATION_CONFIG",
+    "ENABLE_SELF_QUERY"
+)
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def write_index_version(persist_path: Path) -> str:
+    """Marca la BD con una versión nueva; invalida las respuestas cacheadas con la anterior."""
+    version = uuid.uuid4().hex
+    version_path = Path(persist_path) / INDEX_VERSION_FILE_NAME
+    version_path.parent.mkdir(parents=True, exist_ok=True)
+    version_path.write_text(version, encoding="utf-8")
+    return version
+
+
+class IndexVersion:
+    """Lee la versión del índice y solo vuelve a leerla si cambia la fecha de modificación."""
+    
+    def __init__(self, persist_path: Path):
+        self.version_path = Path(persist_path) / INDEX_VERSION_FILE_NAME
+        self.mtime_ns = None
+        self.version = "0"
+    
+    def current(self) -> str:
+        try:
+            mtime_ns = self.version_path.stat().st_mtime_ns
+        except OSError:
+            return "0"
+        if mtime_ns != self.mtime_ns:
+            self.version = self.version_path.read_text(encoding="utf-8").strip() or "0"
+            self.mtime_ns = mtime_ns
+        return self.version
+
+
+def normalize_question(question: str) -> str:
+    without_punctuation = PUNCTUATION_PATTERN.sub(" ", normalize_text(question))
+    return WHITESPACE_PATTERN.sub(" ", without_punctuation).strip()
+
+
+def answer_cache_key(question: str, fingerprint: str) -> str:
+    return hashlib.sha256(f"{fingerprint}\x00{normalize_question(question)}".encode("utf-8")).hexdigest()
+
+
+def pipeline_fingerprint(**config: Any) -> str:
+    """Huella de la configuración: los argumentos del pipeline más todos los `ANSWER_SETTINGS`."""
+    config = {**{name.lower(): getattr(settings, name) for name in ANSWER_SETTINGS}, **config}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    Caché de `PipelineOutput` completos: LRU en memoria delante de una tabla SQLite.
+    
+    Las entradas caducan tras `ttl_seconds`. Ambas capas se acotan a `max_entries`,
+    expulsando primero las de acceso más antiguo.
+    """
+    
+    def __init__(self, database_path: Path, ttl_seconds: int = None, max_entries: int = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANSWER_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.ANSWER_CACHE_MAX_ENTRIES
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(database_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS answer_cache ("
+            "key TEXT PRIMARY KEY, output TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS answer_cache_last_access ON answer_cache(last_access)")
+        self.connection.execute("DELETE FROM answer_cache WHERE expires_at < ?", (time.time(),))
+        self.connection.commit()
+    
+    def remember(self, key: str, output: PipelineOutput, expires_at: float) -> None:
+        self.memory[key] = (output, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[PipelineOutput]:
+        now = time.time()
+        with self.lock:
+            cached = self.memory.get(key)
+            if cached is not None and cached[1] >= now:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            
+            row = self.connection.execute(
+                "SELECT output, expires_at FROM answer_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.memory.pop(key, None)
+                self.misses += 1
+                return None
+            
+            output = PipelineOutput.model_validate_json(row[0])
+            self.connection.execute("UPDATE answer_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+            self.remember(key, output, row[1])
+            self.hits += 1
+            return output
+    
+    def put(self, key: str, output: PipelineOutput) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        output = output.model_copy(update={"metrics": None})
+        with self.lock:
+            self.remember(key, output, expires_at)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO answer_cache (key, output, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, output.model_dump_json(), expires_at, now)
+            )
+            self.connection.execute(
+                "DELETE FROM answer_cache WHERE key IN (SELECT key FROM answer_cache "
+                "ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.connection.commit()
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.connection.execute("DELETE FROM answer_cache")
+            self.connection.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory)
+        }
+
+
+@lru_cache(maxsize=None)
+def get_answer_cache(database_path: str = None) -> AnswerCache:
+    return AnswerCache(Path(database_path or settings.ANSWER_CACHE_PATH))
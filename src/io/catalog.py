@@ -0,0 +1,172 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from ..config.settings import settings
+from ..text import normalize_text
+
+
+CATALOG_FILE_NAME = "metadata_catalog.json"
+CATALOG_VERSION = 1
+CATALOG_FIELDS = ["source", "document_type", "topic", "title", "article_number", "year"]
+
+
+class CorpusCatalogBuilder:
+    """Cuenta los chunks por combinación completa de valores de metadatos (firma)."""
+    
+    def __init__(self, fields: List[str] = None):
+        self.fields = fields or CATALOG_FIELDS
+        self.signature_counts: Dict[Tuple, int] = {}
+        self.total_chunks = 0
+    
+    def add(self, metadata: Dict[str, Any]) -> None:
+        signature = tuple(metadata.get(field) for field in self.fields)
+        self.signature_counts[signature] = self.signature_counts.get(signature, 0) + 1
+        self.total_chunks += 1
+    
+    def build(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.total_chunks,
+            "signatures": [[*signature, count] for signature, count in self.signature_counts.items()]
+        }
+
+
+def build_corpus_catalog(metadatas: Iterable[Dict[str, Any]], fields: List[str] = None) -> Dict[str, Any]:
+    builder = CorpusCatalogBuilder(fields)
+    for metadata in metadatas:
+        builder.add(metadata)
+    return builder.build()
+
+
+def update_metadata_catalog(persist_path: Path, corpus_name: str, metadatas: Iterable[Dict[str, Any]]) -> Path:
+    """Reemplaza la sección de un corpus en el catálogo de la BD, conservando las demás."""
+    return write_corpus_catalog(persist_path, corpus_name, build_corpus_catalog(metadatas))
+
+
+def write_corpus_catalog(persist_path: Path, corpus_name: str, corpus_catalog: Dict[str, Any]) -> Path:
+    catalog_path = Path(persist_path) / CATALOG_FILE_NAME
+    catalog_data = {"version": CATALOG_VERSION, "fields": CATALOG_FIELDS, "corpora": {}}
+    
+    if catalog_path.exists():
+        try:
+            with open(catalog_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing.get("version") == CATALOG_VERSION and existing.get("fields") == CATALOG_FIELDS:
+                catalog_data["corpora"] = existing.get("corpora", {})
+        except (json.JSONDecodeError, OSError):
+            pass
+    
+    catalog_data["corpora"][corpus_name] = corpus_catalog
+    
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = catalog_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog_data, f, ensure_ascii=False)
+    os.replace(tmp_path, catalog_path)
+    
+    return catalog_path
+
+
+class MetadataCatalog:
+    """
+    Catálogo de metadatos derivado del corpus indexado.
+    
+    Guarda cuántos chunks tiene cada firma (combinación de valores de CATALOG_FIELDS),
+    de modo que el número de chunks que satisface cualquier conjunto de filtros de
+    igualdad se obtiene sin consultar la base vectorial.
+    """
+    
+    def __init__(self, fields: List[str], signatures: List[List[Any]]):
+        self.fields = list(fields)
+        self.counts = [row[-1] for row in signatures]
+        self.total_chunks = sum(self.counts)
+        self.value_rows: Dict[Tuple[str, Any], set] = {}
+        self.value_counts: Dict[Tuple[str, Any], int] = {}
+        self.normalized_values: Dict[str, Dict[str, List[Any]]] = {field: {} for field in self.fields}
+        
+        for row_index, row in enumerate(signatures):
+            for field, value in zip(self.fields, row[:-1]):
+                if value is None:
+                    continue
+                key = (field, value)
+                if key not in self.value_rows:
+                    self.value_rows[key] = set()
+                    self.value_counts[key] = 0
+                    self.normalized_values[field].setdefault(normalize_text(value), []).append(value)
+                self.value_rows[key].add(row_index)
+                self.value_counts[key] += row[-1]
+    
+    @classmethod
+    def from_file(cls, catalog_path: Path) -> "MetadataCatalog":
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            catalog_data = json.load(f)
+        
+        signatures = []
+        for corpus in catalog_data.get("corpora", {}).values():
+            signatures.extend(corpus.get("signatures", []))
+        
+        return cls(catalog_data.get("fields", CATALOG_FIELDS), signatures)
+    
+    def values(self, field: str) -> List[Any]:
+        return [value for (key_field, value) in self.value_counts if key_field == field]
+    
+    def count(self, filters: Dict[str, Any]) -> int:
+        row_sets = []
+        
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in self.normalized_values:
+                return 0
+            
+            candidates = value if isinstance(value, list) else [value]
+            rows = set()
+            for candidate in candidates:
+                rows |= self.value_rows.get((field, candidate), set())
+            if not rows:
+                return 0
+            row_sets.append(rows)
+        
+        if not row_sets:
+            return self.total_chunks
+        
+        row_sets.sort(key=len)
+        matching_rows = set.intersection(*row_sets)
+        return sum(self.counts[row] for row in matching_rows)
+    
+    def canonical_value(self, field: str, value: Any) -> Optional[Any]:
+        """Devuelve el valor indexado equivalente a `value` o None si no existe o es ambiguo."""
+        if (field, value) in self.value_counts:
+            return value
+        if field not in self.normalized_values or value is None:
+            return None
+        
+        normalized = normalize_text(value)
+        exact_matches = self.normalized_values[field].get(normalized, [])
+        if len(exact_matches) == 1:
+            return exact_matches[0]
+        if exact_matches or not isinstance(value, str) or len(normalized) < 4:
+            return None
+        
+        pattern = re.compile(rf"(?:^|[\s:\-]){re.escape(normalized)}(?:$|[\s:,])")
+        partial_matches = [
+            original
+            for candidate, originals in self.normalized_values[field].items()
+            if pattern.search(candidate)
+            for original in originals
+        ]
+        return partial_matches[0] if len(partial_matches) == 1 else None
+
+
+def load_metadata_catalog(db_folder_name: str) -> Optional[MetadataCatalog]:
+    catalog_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name / CATALOG_FILE_NAME
+    
+    if not catalog_path.exists():
+        return None
+    
+    try:
+        return MetadataCatalog.from_file(catalog_path)
+    except (json.JSONDecodeError, OSError, KeyError):
+        return None
@@ -0,0 +1,116 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class ChunkBatch:
+    """
+    Resultado de una consulta a la base vectorial guardado por columnas.
+    
+    Las listas son las que devuelve Chroma, sin copiar: filtrar, ordenar o evaluar
+    metadatos sobre el pool de candidatos no crea un `Document` por chunk. Solo los
+    chunks que salen de la recuperación se materializan con `to_documents`.
+    """
+    
+    __slots__ = ("ids", "texts", "metadatas", "distances")
+    
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        distances: Optional[Sequence[float]] = None
+    ):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.distances = np.asarray(distances, dtype=np.float32) if distances is not None else None
+    
+    @classmethod
+    def from_documents(cls, documents: List[Document]) -> "ChunkBatch":
+        return cls(
+            [doc.id or doc.metadata.get("chunk_id") for doc in documents],
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, index: int) -> "ChunkRecord":
+        return ChunkRecord(self, index)
+    
+    def column(self, field: str) -> np.ndarray:
+        return np.array([(metadata or {}).get(field) for metadata in self.metadatas], dtype=object)
+    
+    def to_document(self, index: int) -> Document:
+        chunk_id = self.ids[index]
+        text = self.texts[index]
+        # `chunk_id` y `chunk_size` no se guardan en la BD: son el id y la longitud del texto
+        metadata = {**(self.metadatas[index] or {}), "chunk_size": len(text)}
+        if chunk_id is not None:
+            metadata["chunk_id"] = chunk_id
+        return Document(page_content=text, metadata=metadata, id=chunk_id)
+    
+    def to_documents(self, indices: Optional[Sequence[int]] = None) -> List[Document]:
+        indices = range(len(self)) if indices is None else indices
+        return [self.to_document(int(index)) for index in indices]
+
+
+class ChunkRecord:
+    """Vista de una fila de `ChunkBatch` (dos referencias, sin copiar texto ni metadatos)."""
+    
+    __slots__ = ("batch", "index")
+    
+    def __init__(self, batch: ChunkBatch, index: int):
+        self.batch = batch
+        self.index = index
+    
+    @property
+    def chunk_id(self) -> str:
+        return self.batch.ids[self.index]
+    
+    @property
+    def text(self) -> str:
+        return self.batch.texts[self.index]
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.batch.metadatas[self.index] or {}
+    
+    def to_document(self) -> Document:
+        return self.batch.to_document(self.index)
+
+
+def query_chunks(vectorstore, query_embedding: List[float], k: int, where: Optional[dict] = None) -> ChunkBatch:
+    if hasattr(vectorstore, "query_chunks"):
+        return vectorstore.query_chunks(query_embedding, k, where)
+    
+    collection = getattr(vectorstore, "_collection", None)
+    if collection is None:
+        return ChunkBatch.from_documents(vectorstore.similarity_search_by_vector(query_embedding, k=k, filter=where))
+    
+    result = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances"]
+    )
+    return ChunkBatch(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])
+
+
+def get_chunks(vectorstore, where: Optional[dict] = None) -> ChunkBatch:
+    result = vectorstore.get(where=where, include=["documents", "metadatas"])
+    return ChunkBatch(result.get("ids", []), result.get("documents", []), result.get("metadatas", []))
+
+
+def iter_collection(chroma, include: List[str], page_size: int = 5000) -> Iterator[Dict[str, Any]]:
+    """Recorre toda la colección de Chroma en páginas de `page_size` registros."""
+    offset = 0
+    while True:
+        page = chroma._collection.get(include=include, limit=page_size, offset=offset)
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
@@ -0,0 +1,262 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..config.settings import settings
+
+
+VECTORS_FILE_NAME = "vectors.f32"
+INDEX_FILE_NAME = "index.sqlite3"
+INITIAL_CAPACITY = 1024
+
+
+def embedding_key(model_name: str, normalize: bool, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\x00{int(normalize)}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Almacén de embeddings direccionado por contenido en disco.
+    
+    Los vectores viven en un arreglo float32 mapeado en memoria (una fila por entrada) y
+    un índice SQLite asocia cada clave con su fila y su último acceso. Al superar
+    `max_entries` se reutiliza la fila menos usada recientemente. El archivo crece por
+    duplicación, así que su tamaño sigue al número real de entradas.
+    """
+    
+    def __init__(self, directory: Path, max_entries: int = None):
+        self.directory = Path(directory)
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self.vectors_path = self.directory / VECTORS_FILE_NAME
+        self.lock = threading.Lock()
+        self.vectors = None
+        self.capacity = 0
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(
+            str(self.directory / INDEX_FILE_NAME), check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # Es un caché: perder el último acceso ante un corte de luz es aceptable
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value TEXT)")
+        
+        row = self.connection.execute("SELECT value FROM store_meta WHERE name = 'dimension'").fetchone()
+        self.dimension = int(row[0]) if row else None
+        if self.dimension:
+            self.map_vectors()
+    
+    def map_vectors(self, min_capacity: int = 0) -> None:
+        """Mapea el archivo de vectores, ampliándolo si hace falta (otro proceso puede haberlo hecho ya)."""
+        row_bytes = self.dimension * 4
+        current_rows = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+        capacity = max(current_rows, INITIAL_CAPACITY)
+        while capacity < min_capacity:
+            capacity *= 2
+        capacity = min(capacity, max(self.max_entries, current_rows))
+        if capacity > current_rows:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if self.vectors is not None:
+            self.vectors.flush()
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self.capacity = capacity
+    
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys or not self.dimension:
+            return {}
+        found = {}
+        with self.lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT key, slot FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if not found:
+                return {}
+            if max(found.values()) >= self.capacity:
+                self.map_vectors()
+            now = time.time()
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                )
+            return {key: np.array(self.vectors[slot]) for key, slot in found.items()}
+    
+    def put_many(self, keys: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        if not keys:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self.lock:
+            # BEGIN IMMEDIATE serializa la asignación de filas entre procesos
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self.dimension is None:
+                    self.dimension = matrix.shape[1]
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO store_meta (name, value) VALUES ('dimension', ?)", (str(self.dimension),)
+                    )
+                elif matrix.shape[1] != self.dimension:
+                    raise ValueError(
+                        f"Dimensión de embedding {matrix.shape[1]} distinta de la del caché ({self.dimension})"
+                    )
+                
+                now = time.time()
+                entries, next_slot = self.connection.execute(
+                    "SELECT COUNT(*), COALESCE(MAX(slot) + 1, 0) FROM embeddings"
+                ).fetchone()
+                for key, vector in zip(keys, matrix):
+                    if self.connection.execute("SELECT 1 FROM embeddings WHERE key = ?", (key,)).fetchone():
+                        continue
+                    if entries < self.max_entries:
+                        slot = next_slot
+                        next_slot += 1
+                        entries += 1
+                    else:
+                        oldest_key, slot = self.connection.execute(
+                            "SELECT key, slot FROM embeddings ORDER BY last_access ASC LIMIT 1"
+                        ).fetchone()
+                        self.connection.execute("DELETE FROM embeddings WHERE key = ?", (oldest_key,))
+                    if self.vectors is None or slot >= self.capacity:
+                        self.map_vectors(slot + 1)
+                    self.vectors[slot] = vector
+                    self.connection.execute(
+                        "INSERT INTO embeddings (key, slot, last_access) VALUES (?, ?, ?)", (key, slot, now)
+                    )
+                self.vectors.flush()
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM embeddings")
+    
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envoltorio que consulta el `EmbeddingStore` antes de llamar al modelo.
+    
+    Documentos y consultas comparten clave (modelo, normalización, hash del texto), así
+    que un chunk ya indexado o una pregunta repetida no vuelven a pasar por el modelo.
+    Solo se calculan los textos ausentes, en un único lote y sin duplicados.
+    """
+    
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore, model_name: str, normalize: bool = True):
+        self.embeddings = embeddings
+        self.store = store
+        self.model_name = model_name
+        self.normalize = normalize
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.model_seconds = 0.0
+    
+    def __getattr__(self, name: str) -> Any:
+        # `workers`, `close`, etc. del modelo envuelto
+        if "embeddings" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.__dict__["embeddings"], name)
+    
+    def lookup(self, texts: List[str]):
+        keys = [embedding_key(self.model_name, self.normalize, text) for text in texts]
+        found = self.store.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        hits = sum(1 for key in keys if key in found)
+        with self.stats_lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return keys, found, missing
+    
+    def store_missing(self, found: Dict[str, Any], missing: Dict[str, str], vectors: List[List[float]]) -> None:
+        self.store.put_many(list(missing), vectors)
+        found.update(zip(missing, vectors))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        keys, found, missing = self.lookup(texts)
+        if missing:
+            start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            with self.stats_lock:
+                self.model_seconds += time.perf_counter() - start
+            self.store_missing(found, missing, vectors)
+        return [np.asarray(found[key], dtype=np.float32).tolist() for key in keys]
+    
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self.lookup([text])
+        if missing:
+            start = time.perf_counter()
+            vector = self.embeddings.embed_query(text)
+            with self.stats_lock:
+                self.model_seconds += time.perf_counter() - start
+            self.store_missing(found, missing, [vector])
+        return np.asarray(found[keys[0]], dtype=np.float32).tolist()
+    
+    def submit(self, texts: List[str]) -> "CachedEmbeddingJob":
+        """Variante no bloqueante para modelos con `submit` (p. ej. `EmbeddingPool`)."""
+        keys, found, missing = self.lookup(texts)
+        job = self.embeddings.submit(list(missing.values())) if missing else None
+        return CachedEmbeddingJob(self, keys, found, missing, job)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "model_seconds": round(self.model_seconds, 3)
+        }
+
+
+class CachedEmbeddingJob:
+    def __init__(self, cached: CachedEmbeddings, keys, found, missing, job):
+        self.cached = cached
+        self.keys = keys
+        self.found = found
+        self.missing = missing
+        self.job = job
+    
+    def get(self) -> List[List[float]]:
+        if self.job is not None:
+            self.cached.store_missing(self.found, self.missing, self.job.get())
+            self.job = None
+        return [np.asarray(self.found[key], dtype=np.float32).tolist() for key in self.keys]
+
+
+@lru_cache(maxsize=None)
+def get_embedding_store(model_name: str, normalize: bool = True, cache_path: str = None) -> EmbeddingStore:
+    # Un almacén por modelo: cada uno tiene su propia dimensión de vector
+    safe_model_name = model_name.replace("/", "_")
+    suffix = "norm" if normalize else "raw"
+    return EmbeddingStore(Path(cache_path or settings.EMBEDDING_CACHE_PATH) / f"{safe_model_name}_{suffix}")
+
+
+def cached_embeddings(embeddings: Embeddings, model_name: str, normalize: bool = True) -> Embeddings:
+    if not settings.ENABLE_EMBEDDING_CACHE or isinstance(embeddings, CachedEmbeddings):
+        return embeddings
+    return CachedEmbeddings(embeddings, get_embedding_store(model_name, normalize), model_name, normalize)
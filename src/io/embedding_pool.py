@@ -0,0 +1,91 @@
+import math
+import multiprocessing
+import os
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+_worker_model = None
+_worker_batch_size = 32
+
+
+def init_embedding_worker(model_name: str, threads: int, batch_size: int) -> None:
+    global _worker_model, _worker_batch_size
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+    _worker_batch_size = batch_size
+
+
+def embed_shard(texts: List[str]) -> List[List[float]]:
+    vectors = _worker_model.encode(
+        texts, batch_size=_worker_batch_size, normalize_embeddings=True, convert_to_numpy=True
+    )
+    return vectors.tolist()
+
+
+class EmbeddingPool(Embeddings):
+    """
+    Embeddings repartidos entre procesos, cada uno con su réplica del modelo en CPU.
+    
+    Los textos se dividen en fragmentos contiguos que se reparten entre los workers y los
+    resultados se devuelven en el orden de entrada. Los hilos de torch se reparten entre
+    los workers para que no compitan por los mismos núcleos.
+    """
+    
+    def __init__(self, model_name: str, workers: int, batch_size: int = 32, threads_per_worker: Optional[int] = None):
+        self.model_name = model_name
+        self.workers = workers
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(
+            processes=workers,
+            initializer=init_embedding_worker,
+            initargs=(model_name, self.threads_per_worker, batch_size)
+        )
+    
+    def shards(self, texts: List[str]) -> List[List[str]]:
+        shard_size = max(1, min(self.batch_size, math.ceil(len(texts) / self.workers)))
+        return [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    
+    def submit(self, texts: List[str]) -> "EmbeddingJob":
+        """Encola los textos sin bloquear; `EmbeddingJob.get()` devuelve los vectores en orden."""
+        return EmbeddingJob(self.pool.map_async(embed_shard, self.shards(texts)))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.submit(texts).get()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+    
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+    
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class EmbeddingJob:
+    def __init__(self, async_result):
+        self.async_result = async_result
+    
+    def get(self) -> List[List[float]]:
+        return [vector for shard in self.async_result.get() for vector in shard]
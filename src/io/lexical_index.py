@@ -0,0 +1,247 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+from ..text import normalize_text
+from .chunk_records import iter_collection
+from .numpy_store import MetadataTable, collection_fingerprint
+
+
+LEXICAL_INDEX_DIR_NAME = "lexical"
+LEXICAL_INDEX_VERSION = 1
+ARRAY_NAMES = ("indptr", "postings", "frequencies", "lengths")
+
+# Abreviaturas como "d.s." o "d.leg." y códigos como "003-97-tr" se conservan enteros
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+ABBREVIATION_PATTERN = re.compile(r"[a-z]+(?:\.[a-z]+)+")
+SEPARATOR_PATTERN = re.compile(r"[-./]")
+
+STOPWORDS = frozenset("""
+a al algo ante antes como con contra cual cuando de del desde donde durante e el ella ellas
+ellos en entre era es esa ese eso esta este esto estos fue ha han hasta hay la las le les lo
+los mas me mi mismo muy ni no nos o otra otro para pero por porque que se segun ser si sin
+sobre son su sus tambien te tiene todo tras tu un una uno unos y ya
+""".split())
+
+
+def stem(word: str) -> str:
+    """
+    Stemmer ligero para español (Savoy): quita género y número, no derivaciones.
+    
+    "gratificaciones" → "gratificacion", "trabajadoras" → "trabajador", "veces" → "vez".
+    Los tokens con dígitos no se modifican.
+    """
+    if len(word) < 5 or any(char.isdigit() for char in word):
+        return word
+    if word[-1] in "oae":
+        return word[:-1]
+    if word[-1] == "s":
+        if word.endswith("eses"):
+            return word[:-2]
+        if word.endswith("ces"):
+            return word[:-3] + "z"
+        if word[-2] in "oae":
+            return word[:-2]
+    return word
+
+
+def analyze(text: str) -> List[str]:
+    """Tokens para BM25: texto normalizado (sin tildes ni "N.º"), sin stopwords y con stemming ligero."""
+    terms = []
+    for match in TOKEN_PATTERN.finditer(normalize_text(text).replace("°", " ")):
+        token = match.group()
+        if ABBREVIATION_PATTERN.fullmatch(token):
+            token = token.replace(".", "")
+        if token in STOPWORDS:
+            continue
+        parts = SEPARATOR_PATTERN.split(token)
+        if len(parts) == 1:
+            terms.append(stem(token))
+            continue
+        # Un código como "003-97-tr" también se encuentra por sus partes
+        terms.append(token)
+        terms.extend(part for part in parts if part and part not in STOPWORDS)
+    return terms
+
+
+def lexical_index_dir(persist_path: Path) -> Path:
+    return Path(persist_path) / LEXICAL_INDEX_DIR_NAME
+
+
+def write_lexical_index(
+    persist_path: Path,
+    ids: Sequence[str],
+    texts: Sequence[str],
+    metadatas: Sequence[Optional[Dict[str, Any]]],
+    fingerprint: str
+) -> Path:
+    """
+    Escribe el índice invertido en formato CSR: para el término `t` (posición en `terms`),
+    `postings[indptr[t]:indptr[t + 1]]` son las filas de los chunks que lo contienen y
+    `frequencies` sus frecuencias.
+    """
+    term_postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths = np.zeros(len(texts), dtype=np.int32)
+    for row, text in enumerate(texts):
+        counts = Counter(analyze(text or ""))
+        lengths[row] = sum(counts.values())
+        for term, frequency in counts.items():
+            term_postings.setdefault(term, []).append((row, frequency))
+    
+    terms = sorted(term_postings)
+    sizes = [len(term_postings[term]) for term in terms]
+    arrays = {
+        "indptr": np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)]).astype(np.int64),
+        "postings": np.fromiter((row for term in terms for row, _ in term_postings[term]), dtype=np.int32),
+        "frequencies": np.fromiter(
+            (min(frequency, 65535) for term in terms for _, frequency in term_postings[term]), dtype=np.uint16
+        ),
+        "lengths": lengths
+    }
+    
+    directory = lexical_index_dir(persist_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    for name, array in arrays.items():
+        with open(directory / f"{name}.npy{suffix}", "wb") as f:
+            np.save(f, array)
+    with open(directory / f"terms.json{suffix}", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": LEXICAL_INDEX_VERSION,
+            "fingerprint": fingerprint,
+            "terms": terms,
+            "ids": list(ids),
+            "metadatas": list(metadatas)
+        }, f, ensure_ascii=False)
+    
+    # `terms.json` al final: lleva la versión con la que los lectores validan el índice
+    for name in ARRAY_NAMES:
+        os.replace(directory / f"{name}.npy{suffix}", directory / f"{name}.npy")
+    os.replace(directory / f"terms.json{suffix}", directory / "terms.json")
+    return directory
+
+
+def build_lexical_index(chroma, persist_path: Path, fingerprint: Optional[str] = None) -> Path:
+    """(Re)construye el índice léxico de toda la colección; se llama al terminar cada indexación."""
+    ids, texts, metadatas = [], [], []
+    for page in iter_collection(chroma, ["documents", "metadatas"]):
+        ids.extend(page["ids"])
+        texts.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+    return write_lexical_index(
+        persist_path, ids, texts, metadatas, fingerprint or collection_fingerprint(persist_path)
+    )
+
+
+class LexicalIndex:
+    """
+    BM25 en memoria sobre el índice CSR mapeado en memoria.
+    
+    Una consulta suma, para cada término, la contribución BM25 de su lista de postings a
+    un vector denso de puntuaciones (un chunk por fila) y aplica el filtro `where` de
+    Chroma como máscara sobre los mismos metadatos filtrables que usa la búsqueda densa.
+    """
+    
+    def __init__(
+        self,
+        terms: List[str],
+        ids: List[str],
+        metadatas: List[Optional[Dict[str, Any]]],
+        arrays: Dict[str, np.ndarray],
+        k1: float = None,
+        b: float = None,
+        fingerprint: Optional[str] = None
+    ):
+        self.fingerprint = fingerprint
+        self.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        self.ids = ids
+        self.metadatas = metadatas
+        self.table = MetadataTable(metadatas)
+        self.indptr = arrays["indptr"]
+        self.postings = arrays["postings"]
+        self.frequencies = arrays["frequencies"]
+        
+        k1 = k1 if k1 is not None else settings.BM25_K1
+        b = b if b is not None else settings.BM25_B
+        lengths = np.asarray(arrays["lengths"], dtype=np.float32)
+        average_length = float(lengths.mean()) if len(lengths) else 1.0
+        self.k1 = k1
+        # Denominador de BM25 sin la frecuencia: k1 · (1 - b + b · |d| / avgdl)
+        self.length_norms = k1 * (1 - b + b * lengths / max(average_length, 1e-9))
+    
+    @classmethod
+    def load(cls, persist_path: Path) -> Optional["LexicalIndex"]:
+        directory = lexical_index_dir(persist_path)
+        try:
+            with open(directory / "terms.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != LEXICAL_INDEX_VERSION:
+                return None
+            arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        except (OSError, ValueError):
+            return None
+        return cls(data["terms"], data["ids"], data["metadatas"], arrays, fingerprint=data.get("fingerprint"))
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def idf(self, document_frequency: int) -> float:
+        return math.log(1 + (len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+    
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term, query_frequency in Counter(analyze(query)).items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self.indptr[term_id]), int(self.indptr[term_id + 1])
+            rows = self.postings[start:end]
+            frequencies = self.frequencies[start:end].astype(np.float32)
+            weight = self.idf(end - start) * query_frequency
+            scores[rows] += weight * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[rows])
+        return scores
+    
+    def search(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> Tuple[List[str], np.ndarray]:
+        """Ids de los `k` chunks con mayor puntuación BM25 (> 0) que cumplen `where`, de mayor a menor."""
+        scores = self.scores(query)
+        if where:
+            scores[~self.table.mask(where)] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates) or k <= 0:
+            return [], np.zeros(0, dtype=np.float32)
+        
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [self.ids[row] for row in candidates[top]], candidate_scores[top]
+
+
+def load_lexical_index(db_folder_name: str) -> Optional[LexicalIndex]:
+    """
+    Carga el índice léxico de la BD. Si no existe o es de otra versión del índice (BDs
+    indexadas antes de que existiera), lo construye a partir de la colección de Chroma.
+    """
+    if not settings.ENABLE_HYBRID_SEARCH:
+        return None
+    
+    persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
+    if not (persist_path / "chroma.sqlite3").exists():
+        return None
+    
+    fingerprint = collection_fingerprint(persist_path)
+    index = LexicalIndex.load(persist_path)
+    if index is None or index.fingerprint != fingerprint:
+        from langchain_chroma import Chroma
+        build_lexical_index(Chroma(persist_directory=str(persist_path)), persist_path, fingerprint)
+        index = LexicalIndex.load(persist_path)
+    return index
@@ -1,3 +1,5 @@
+import time
+from typing import Dict, Any, Optional
 from langchain_ollama import ChatOllama
 from ..config.settings import settings
 
@@ -5,14 +7,68 @@ from ..config.settings import settings
 def get_llm(
     model_name: str = None, 
     temperature: float = None, 
-    base_url: str = None
+    base_url: str = None,
+    cache: bool = False
 ) -> ChatOllama:
+    temperature = temperature or settings.DEFAULT_TEMPERATURE
+    llm_cache = None
+    
+    if cache and settings.ENABLE_LLM_CACHE and temperature == 0:
+        from .llm_cache import get_llm_cache
+        llm_cache = get_llm_cache()
+    
     return ChatOllama(
         model=model_name or settings.OLLAMA_MODEL,
         base_url=base_url or settings.OLLAMA_URL,
-        temperature=temperature or settings.DEFAULT_TEMPERATURE
+        temperature=temperature,
+        cache=llm_cache
     )
 
 
 def get_llm_with_structured_output(llm: ChatOllama, output_class):
     return llm.with_structured_output(output_class)
+
+
+def record_llm_usage(metrics: Optional[Dict[str, Any]], stage: str, response, elapsed_ms: float) -> None:
+    if metrics is None:
+        return
+    
+    usage = getattr(response, "usage_metadata", None) or {}
+    stage_metrics = metrics.setdefault("llm", {}).setdefault(
+        stage, {"calls": 0, "cache_hits": 0, "ms": 0.0, "input_tokens": 0, "output_tokens": 0}
+    )
+    stage_metrics["calls"] += 1
+    stage_metrics["ms"] = round(stage_metrics["ms"] + elapsed_ms, 3)
+    
+    if (getattr(response, "response_metadata", None) or {}).get("cache_hit"):
+        stage_metrics["cache_hits"] += 1
+        return
+    
+    stage_metrics["input_tokens"] += usage.get("input_tokens", 0) or 0
+    stage_metrics["output_tokens"] += usage.get("output_tokens", 0) or 0
+
+
+def invoke_llm(llm, prompt, metrics: Optional[Dict[str, Any]] = None, stage: str = "llm"):
+    start = time.perf_counter()
+    response = llm.invoke(prompt)
+    record_llm_usage(metrics, stage, response, (time.perf_counter() - start) * 1000)
+    return response
+
+
+async def ainvoke_llm(llm, prompt, metrics: Optional[Dict[str, Any]] = None, stage: str = "llm"):
+    start = time.perf_counter()
+    response = await llm.ainvoke(prompt)
+    record_llm_usage(metrics, stage, response, (time.perf_counter() - start) * 1000)
+    return response
+
+
+def summarize_llm_usage(metrics: Dict[str, Any], stages) -> Dict[str, Any]:
+    summary = {"calls": 0, "cache_hits": 0, "ms": 0.0, "input_tokens": 0, "output_tokens": 0}
+    
+    for stage, stage_metrics in metrics.get("llm", {}).items():
+        if stage in stages:
+            for key in summary:
+                summary[key] += stage_metrics[key]
+    
+    summary["ms"] = round(summary["ms"], 3)
+    return summary
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from ..config.settings import settings
+
+
+# Archivos que definen los prompts de enrutamiento y reescritura; si cambian, el caché se vacía
+PROMPT_SOURCE_FILES = [
+    Path(__file__).resolve().parent.parent / "steps" / "prompts.py",
+    Path(__file__).resolve().parent.parent / "steps" / "self_query.py",
+    Path(__file__).resolve().parent.parent / "steps" / "routing.py",
+]
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def prompts_fingerprint() -> str:
+    digest = hashlib.sha256()
+    for source_file in PROMPT_SOURCE_FILES:
+        if source_file.exists():
+            digest.update(source_file.read_bytes())
+    return digest.hexdigest()
+
+
+def normalize_prompt(value: Any) -> Any:
+    if isinstance(value, str):
+        return WHITESPACE_PATTERN.sub(" ", value).strip()
+    if isinstance(value, list):
+        return [normalize_prompt(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_prompt(item) for key, item in value.items()}
+    return value
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """`llm_string` ya incluye modelo, temperatura y el esquema de salida estructurada."""
+    try:
+        normalized_prompt = json.dumps(normalize_prompt(json.loads(prompt)), ensure_ascii=False, sort_keys=True)
+    except (json.JSONDecodeError, TypeError):
+        normalized_prompt = normalize_prompt(prompt)
+    return hashlib.sha256(f"{llm_string}\x00{normalized_prompt}".encode("utf-8")).hexdigest()
+
+
+def serialize_generations(generations: Sequence[Generation]) -> str:
+    serialized = []
+    for generation in generations:
+        message = getattr(generation, "message", None)
+        if isinstance(message, AIMessage):
+            serialized.append({
+                "content": message.content,
+                "additional_kwargs": message.additional_kwargs,
+                "response_metadata": message.response_metadata,
+                "tool_calls": message.tool_calls,
+                "usage_metadata": message.usage_metadata
+            })
+        else:
+            serialized.append({"text": generation.text})
+    return json.dumps(serialized, ensure_ascii=False, default=str)
+
+
+def deserialize_generations(payload: str) -> list:
+    generations = []
+    for item in json.loads(payload):
+        if "text" in item:
+            generations.append(Generation(text=item["text"]))
+            continue
+        message = AIMessage(
+            content=item["content"],
+            additional_kwargs=item.get("additional_kwargs") or {},
+            response_metadata={**(item.get("response_metadata") or {}), "cache_hit": True},
+            tool_calls=item.get("tool_calls") or [],
+            usage_metadata=item.get("usage_metadata")
+        )
+        generations.append(ChatGeneration(message=message))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Caché persistente de respuestas del LLM en SQLite con expulsión LRU.
+    
+    Solo tiene sentido para llamadas deterministas (temperatura 0). Las entradas se
+    invalidan en bloque cuando cambia la huella de los archivos de prompts.
+    """
+    
+    def __init__(self, database_path: Path, max_entries: int = None, namespace: str = None):
+        self.database_path = Path(database_path)
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.namespace = namespace or prompts_fingerprint()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.database_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, generations TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value TEXT)")
+        
+        row = self.connection.execute("SELECT value FROM cache_meta WHERE name = 'namespace'").fetchone()
+        if row is None or row[0] != self.namespace:
+            self.connection.execute("DELETE FROM llm_cache")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('namespace', ?)", (self.namespace,)
+            )
+        self.connection.commit()
+        self.entries = self.connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with self.lock:
+            row = self.connection.execute("SELECT generations FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+        return deserialize_generations(row[0])
+    
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        payload = serialize_generations(return_val)
+        with self.lock:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO llm_cache (key, generations, last_access) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            self.entries += cursor.rowcount
+            if self.entries > self.max_entries:
+                # Otro proceso puede haber escrito o vaciado el mismo archivo
+                self.entries = self.connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if self.entries > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (self.entries - self.max_entries,)
+                )
+                self.entries = self.max_entries
+            self.connection.commit()
+    
+    def clear(self, **kwargs: Any) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM llm_cache")
+            self.connection.commit()
+            self.entries = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.entries
+        }
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache(database_path: str = None) -> SQLiteLLMCache:
+    return SQLiteLLMCache(Path(database_path or settings.LLM_CACHE_PATH))
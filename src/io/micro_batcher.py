@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from ..config.settings import settings
+
+
+class MicroBatcher:
+    """
+    Agrupa las llamadas de varias peticiones concurrentes en un solo lote del modelo.
+    
+    Un hilo trabajador toma la primera entrada de la cola y espera hasta `max_wait_ms`
+    (o hasta `max_batch_size` entradas) a que lleguen más. El lote se ordena por
+    `sort_key` (longitud del texto) para que cada sub-lote del modelo tenga un relleno
+    parecido, se ejecuta `run_batch` una vez y cada llamador recibe su resultado en su
+    `Future`. Si el lote falla, la excepción llega a todos los llamadores del lote.
+    """
+    
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = None,
+        max_wait_ms: float = None,
+        sort_key: Optional[Callable[[Any], int]] = None,
+        name: str = "micro-batcher"
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size or settings.MICRO_BATCH_MAX_SIZE
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else settings.MICRO_BATCH_MAX_WAIT_MS
+        self.sort_key = sort_key
+        self.queue: "queue.Queue[tuple]" = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.model_seconds = 0.0
+        
+        self.worker = threading.Thread(target=self.work, name=name, daemon=True)
+        self.worker.start()
+    
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        self.queue.put((item, future))
+        return future
+    
+    def submit_many(self, items: List[Any]) -> List[Future]:
+        return [self.submit(item) for item in items]
+    
+    def call(self, item: Any) -> Any:
+        return self.submit(item).result()
+    
+    def call_many(self, items: List[Any]) -> List[Any]:
+        return [future.result() for future in self.submit_many(items)]
+    
+    def collect(self) -> List[tuple]:
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            # Lo ya encolado entra sin esperar; el resto, solo hasta el plazo
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def work(self) -> None:
+        while True:
+            batch = [(item, future) for item, future in self.collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            if self.sort_key is not None:
+                batch.sort(key=lambda entry: self.sort_key(entry[0]))
+            
+            start = time.perf_counter()
+            try:
+                results = self.run_batch([item for item, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            with self.stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.model_seconds += time.perf_counter() - start
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "model_seconds": round(self.model_seconds, 3)
+        }
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings cuyas consultas pasan por un `MicroBatcher` compartido por todas las peticiones.
+    
+    `embed_documents` (indexación, lotes ya grandes) va directo al modelo.
+    """
+    
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = None, max_wait_ms: float = None):
+        self.embeddings = embeddings
+        self.batcher = MicroBatcher(
+            embeddings.embed_documents, max_batch_size, max_wait_ms, sort_key=len, name="embedding-batcher"
+        )
+    
+    def __getattr__(self, name: str) -> Any:
+        if "embeddings" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.__dict__["embeddings"], name)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.call(text)
+
+
+def batched_embeddings(embeddings: Embeddings) -> Embeddings:
+    if not settings.ENABLE_MICRO_BATCHING or isinstance(embeddings, BatchedEmbeddings):
+        return embeddings
+    return BatchedEmbeddings(embeddings)
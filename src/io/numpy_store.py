@@ -0,0 +1,341 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .answer_cache import IndexVersion
+from .chunk_records import ChunkBatch, iter_collection
+
+
+NUMPY_STORE_DIR_NAME = "numpy"
+MISSING_VALUE = -1
+
+
+def numpy_store_paths(persist_path: Path) -> Tuple[Path, Path]:
+    directory = Path(persist_path) / NUMPY_STORE_DIR_NAME
+    return directory / "vectors.npy", directory / "records.json"
+
+
+def collection_fingerprint(persist_path: Path) -> str:
+    """Versión del índice que escribe el indexador; si no existe, tamaño y fecha de la BD de Chroma."""
+    version = IndexVersion(persist_path).current()
+    if version != "0":
+        return version
+    stat = (Path(persist_path) / "chroma.sqlite3").stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def value_key(value: Any) -> Tuple[str, Any]:
+    # Como en Chroma, 2000 y 2000.0 son el mismo valor, pero "2000" y True no
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "number", float(value)
+    return type(value).__name__, value
+
+
+class MetadataColumn:
+    """Un campo de metadatos codificado: un código int32 por valor distinto (-1 si falta) y su valor numérico."""
+    
+    __slots__ = ("codes", "lookup", "numbers")
+    
+    def __init__(self, values: Sequence[Any]):
+        self.lookup: Dict[Tuple[str, Any], int] = {}
+        self.codes = np.full(len(values), MISSING_VALUE, dtype=np.int32)
+        self.numbers = np.full(len(values), np.nan, dtype=np.float64)
+        for row, value in enumerate(values):
+            if value is None:
+                continue
+            self.codes[row] = self.lookup.setdefault(value_key(value), len(self.lookup))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.numbers[row] = value
+    
+    def present(self) -> np.ndarray:
+        return self.codes != MISSING_VALUE
+    
+    def equals(self, value: Any) -> np.ndarray:
+        code = self.lookup.get(value_key(value))
+        return self.codes == code if code is not None else np.zeros(len(self.codes), dtype=bool)
+    
+    def isin(self, values: Iterable[Any]) -> np.ndarray:
+        codes = [self.lookup[key] for key in map(value_key, values) if key in self.lookup]
+        return np.isin(self.codes, codes)
+
+
+COMPARISONS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal
+}
+
+
+class MetadataTable:
+    """
+    Metadatos de todos los chunks por columnas para evaluar filtros `where` de Chroma
+    ($eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and, $or) como máscaras booleanas.
+    """
+    
+    def __init__(self, metadatas: Sequence[Optional[Dict[str, Any]]]):
+        self.size = len(metadatas)
+        fields = {field for metadata in metadatas for field in (metadata or {})}
+        self.columns = {
+            field: MetadataColumn([(metadata or {}).get(field) for metadata in metadatas])
+            for field in fields
+        }
+    
+    def mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        if not where:
+            return np.ones(self.size, dtype=bool)
+        
+        masks = []
+        for key, condition in where.items():
+            if key == "$and":
+                masks.append(np.logical_and.reduce([self.mask(clause) for clause in condition]))
+            elif key == "$or":
+                masks.append(np.logical_or.reduce([self.mask(clause) for clause in condition]))
+            else:
+                masks.append(self.field_mask(key, condition))
+        return np.logical_and.reduce(masks)
+    
+    def field_mask(self, field: str, condition: Any) -> np.ndarray:
+        column = self.columns.get(field)
+        if column is None:
+            # Igual que en Chroma, un campo que no existe no cumple ninguna condición
+            return np.zeros(self.size, dtype=bool)
+        
+        if not isinstance(condition, dict):
+            return column.equals(condition)
+        
+        (operator, value), = condition.items()
+        if operator == "$eq":
+            return column.equals(value)
+        if operator == "$ne":
+            return column.present() & ~column.equals(value)
+        if operator == "$in":
+            return column.isin(value)
+        if operator == "$nin":
+            return column.present() & ~column.isin(value)
+        if operator in COMPARISONS:
+            with np.errstate(invalid="ignore"):
+                return COMPARISONS[operator](column.numbers, float(value))
+        raise ValueError(f"Operador de filtro no soportado: {operator}")
+
+
+def export_collection(chroma, persist_path: Path, fingerprint: str) -> None:
+    """Copia vectores (normalizados, float32) y registros de la colección de Chroma a `<persist_path>/numpy`."""
+    vectors_path, records_path = numpy_store_paths(persist_path)
+    vectors_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    ids, texts, metadatas, pages = [], [], [], []
+    for page in iter_collection(chroma, ["embeddings", "documents", "metadatas"]):
+        ids.extend(page["ids"])
+        texts.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+    
+    vectors = np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1)
+    
+    space = (chroma._collection.metadata or {}).get("hnsw:space", "l2")
+    suffix = f".{os.getpid()}.tmp"
+    tmp_vectors_path = vectors_path.with_name(vectors_path.name + suffix)
+    tmp_records_path = records_path.with_name(records_path.name + suffix)
+    with open(tmp_vectors_path, "wb") as f:
+        np.save(f, vectors)
+    with open(tmp_records_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "fingerprint": fingerprint,
+            "space": space,
+            "ids": ids,
+            "texts": texts,
+            "metadatas": metadatas
+        }, f, ensure_ascii=False)
+    
+    # Los registros al final: llevan la versión con la que los lectores validan la exportación
+    os.replace(tmp_vectors_path, vectors_path)
+    os.replace(tmp_records_path, records_path)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Búsqueda exacta sobre una exportación de la colección de Chroma.
+    
+    Los vectores normalizados forman una matriz float32 contigua mapeada en memoria: cada
+    consulta es un producto matriz-vector, una máscara booleana para el filtro y un
+    `argpartition` para el top-k. Con unos pocos miles de chunks es más rápido que HNSW +
+    SQLite y el recall es exacto. Es de solo lectura: la indexación sigue escribiendo en
+    Chroma y la exportación se regenera cuando cambia la versión del índice.
+    """
+    
+    def __init__(
+        self,
+        persist_path: Path,
+        embedding_function: Embeddings,
+        vectors: np.ndarray,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Optional[Dict[str, Any]]],
+        space: str = "l2"
+    ):
+        self.persist_path = Path(persist_path)
+        self.embedding_function = embedding_function
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.space = space
+        self.table = MetadataTable(metadatas)
+        self.positions = {chunk_id: row for row, chunk_id in enumerate(ids)}
+    
+    @classmethod
+    def load(cls, persist_path: Path, embedding_function: Embeddings) -> "NumpyVectorStore":
+        persist_path = Path(persist_path)
+        vectors_path, records_path = numpy_store_paths(persist_path)
+        fingerprint = collection_fingerprint(persist_path)
+        
+        records = None
+        if records_path.exists():
+            with open(records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        
+        if records is None or records.get("fingerprint") != fingerprint:
+            from langchain_chroma import Chroma
+            export_collection(Chroma(persist_directory=str(persist_path)), persist_path, fingerprint)
+            with open(records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        
+        return cls(
+            persist_path,
+            embedding_function,
+            np.load(vectors_path, mmap_mode="r"),
+            records["ids"],
+            records["texts"],
+            records["metadatas"],
+            records.get("space", "l2")
+        )
+    
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def search_rows(
+        self,
+        embedding: List[float],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Filas del top-k y su similitud coseno, de mayor a menor."""
+        if not len(self.ids) or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        scores = self.vectors @ (query / query_norm if query_norm > 0 else query)
+        
+        candidates = np.flatnonzero(self.table.mask(where)) if where else None
+        if candidates is not None:
+            scores = scores[candidates]
+        
+        k = min(k, len(scores))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = candidates[top] if candidates is not None else top
+        return rows, scores[top]
+    
+    def distances(self, similarities: np.ndarray) -> np.ndarray:
+        # Mismas distancias que Chroma para vectores normalizados
+        return 2.0 - 2.0 * similarities if self.space == "l2" else 1.0 - similarities
+    
+    def query_chunks(self, embedding: List[float], k: int, where: Optional[Dict[str, Any]] = None) -> ChunkBatch:
+        rows, similarities = self.search_rows(embedding, k, where)
+        return ChunkBatch(
+            [self.ids[row] for row in rows],
+            [self.texts[row] for row in rows],
+            [self.metadatas[row] for row in rows],
+            self.distances(similarities)
+        )
+    
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.query_chunks(embedding, k, filter).to_documents()
+    
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        batch = self.query_chunks(embedding, k, filter)
+        return list(zip(batch.to_documents(), batch.distances.tolist()))
+    
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k, filter)
+    
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding_function.embed_query(query), k, filter)
+    
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        if self.space == "l2":
+            return self._euclidean_relevance_score_fn
+        if self.space == "ip":
+            return self._max_inner_product_relevance_score_fn
+        return self._cosine_relevance_score_fn
+    
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Misma forma de resultado que `Chroma.get`."""
+        include = include or ["documents", "metadatas"]
+        mask = self.table.mask(where)
+        if ids is not None:
+            id_mask = np.zeros(len(self.ids), dtype=bool)
+            id_mask[[self.positions[chunk_id] for chunk_id in ids if chunk_id in self.positions]] = True
+            mask &= id_mask
+        
+        rows = np.flatnonzero(mask)
+        start = offset or 0
+        rows = rows[start:start + limit] if limit is not None else rows[start:]
+        
+        result: Dict[str, Any] = {"ids": [self.ids[row] for row in rows], "included": include}
+        result["documents"] = [self.texts[row] for row in rows] if "documents" in include else None
+        result["metadatas"] = [self.metadatas[row] for row in rows] if "metadatas" in include else None
+        result["embeddings"] = np.asarray(self.vectors[rows]) if "embeddings" in include else None
+        return result
+    
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("NumpyVectorStore es de solo lectura: se genera exportando una colección de Chroma")
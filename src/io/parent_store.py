@@ -0,0 +1,180 @@
+import json
+import mmap
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+
+
+PARENT_STORE_DIR_NAME = "parents"
+MISSING_VALUE = -1
+
+
+def parent_store_paths(persist_path: Path, corpus_name: str) -> Tuple[Path, Path]:
+    directory = Path(persist_path) / PARENT_STORE_DIR_NAME
+    return directory / f"{corpus_name}.bin", directory / f"{corpus_name}.offsets.npy"
+
+
+def parent_metadata_path(persist_path: Path, corpus_name: str) -> Path:
+    return Path(persist_path) / PARENT_STORE_DIR_NAME / f"{corpus_name}.meta.json"
+
+
+class ParentMetadataTable:
+    """
+    Metadatos de los documentos padre guardados una sola vez por documento.
+    
+    Cada valor distinto aparece una vez en `values` (las cadenas se internan al cargar) y
+    `rows` es una matriz int32 documentos × campos con el índice del valor, o -1 si falta.
+    """
+    
+    def __init__(self, fields: List[str], values: List[Any], rows: np.ndarray, total_chunks: np.ndarray):
+        self.fields = fields
+        self.values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+        self.rows = rows
+        self.total_chunks = total_chunks
+    
+    @classmethod
+    def load(cls, path: Path) -> "ParentMetadataTable":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = np.asarray(data["rows"], dtype=np.int32).reshape(len(data["rows"]), len(data["fields"]))
+        return cls(data["fields"], data["values"], rows, np.asarray(data["total_chunks"], dtype=np.int32))
+    
+    def get(self, doc_index: int) -> Optional[Dict[str, Any]]:
+        if not 0 <= doc_index < len(self.rows):
+            return None
+        metadata = {
+            field: self.values[value_id]
+            for field, value_id in zip(self.fields, self.rows[doc_index].tolist())
+            if value_id != MISSING_VALUE
+        }
+        metadata["total_chunks"] = int(self.total_chunks[doc_index])
+        return metadata
+
+
+class ParentStoreWriter:
+    """
+    Escribe los documentos padre de un corpus en el orden del JSON (`original_doc_index`).
+    
+    Los textos se concatenan en UTF-8 en `<corpus>.bin` y `<corpus>.offsets.npy` guarda los
+    n+1 desplazamientos en bytes. Los metadatos del padre van una sola vez a
+    `<corpus>.meta.json` (ver `ParentMetadataTable`). Los archivos se reemplazan de forma
+    atómica al cerrar.
+    """
+    
+    def __init__(self, persist_path: Path, corpus_name: str):
+        self.data_path, self.offsets_path = parent_store_paths(persist_path, corpus_name)
+        self.metadata_path = parent_metadata_path(persist_path, corpus_name)
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_data_path = self.data_path.with_suffix(".bin.tmp")
+        self.file = open(self.tmp_data_path, "wb")
+        self.offsets = [0]
+        self.fields: Dict[str, int] = {}
+        self.value_ids: Dict[Tuple[str, str], int] = {}
+        self.values: List[Any] = []
+        self.rows: List[Dict[int, int]] = []
+        self.total_chunks: List[int] = []
+    
+    def value_id(self, value: Any) -> int:
+        key = (type(value).__name__, json.dumps(value, ensure_ascii=False, sort_keys=True, default=str))
+        if key not in self.value_ids:
+            self.value_ids[key] = len(self.values)
+            self.values.append(value)
+        return self.value_ids[key]
+    
+    def add(self, text: str, metadata: Dict[str, Any] = None, total_chunks: int = 0) -> None:
+        self.offsets.append(self.offsets[-1] + self.file.write(text.encode("utf-8")))
+        row = {}
+        for field, value in (metadata or {}).items():
+            field_id = self.fields.setdefault(field, len(self.fields))
+            row[field_id] = self.value_id(value)
+        self.rows.append(row)
+        self.total_chunks.append(total_chunks)
+    
+    def close(self) -> None:
+        self.file.close()
+        tmp_offsets_path = self.offsets_path.with_suffix(".tmp.npy")
+        np.save(tmp_offsets_path, np.asarray(self.offsets, dtype=np.int64))
+        
+        tmp_metadata_path = self.metadata_path.with_suffix(".tmp")
+        with open(tmp_metadata_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "fields": list(self.fields),
+                "values": self.values,
+                "rows": [[row.get(field_id, MISSING_VALUE) for field_id in range(len(self.fields))] for row in self.rows],
+                "total_chunks": self.total_chunks
+            }, f, ensure_ascii=False, default=str)
+        
+        # Primero los datos: los lectores detectan el cambio por la fecha de los desplazamientos
+        os.replace(self.tmp_data_path, self.data_path)
+        os.replace(tmp_metadata_path, self.metadata_path)
+        os.replace(tmp_offsets_path, self.offsets_path)
+    
+    def abort(self) -> None:
+        self.file.close()
+        self.tmp_data_path.unlink(missing_ok=True)
+
+
+class ParentStore:
+    """
+    Lectura O(1) de documentos padre por (corpus, `original_doc_index`) sin consultar Chroma.
+    
+    Cada corpus se mapea en memoria al primer acceso y se vuelve a mapear si el indexador
+    reemplazó sus archivos.
+    """
+    
+    def __init__(self, persist_path: Path):
+        self.persist_path = Path(persist_path)
+        self.lock = threading.Lock()
+        self.corpora: Dict[str, Tuple[int, Optional[mmap.mmap], np.ndarray, Optional[ParentMetadataTable]]] = {}
+    
+    def corpus(self, corpus_name: str) -> Optional[Tuple[Optional[mmap.mmap], np.ndarray, Optional[ParentMetadataTable]]]:
+        data_path, offsets_path = parent_store_paths(self.persist_path, corpus_name)
+        try:
+            mtime_ns = offsets_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        
+        cached = self.corpora.get(corpus_name)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1:]
+        
+        with self.lock:
+            try:
+                offsets = np.load(offsets_path, mmap_mode="r")
+                with open(data_path, "rb") as f:
+                    # mmap no admite archivos vacíos
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if offsets[-1] else None
+            except (OSError, ValueError):
+                return None
+            try:
+                metadata = ParentMetadataTable.load(parent_metadata_path(self.persist_path, corpus_name))
+            except (OSError, ValueError, KeyError):
+                metadata = None
+            self.corpora[corpus_name] = (mtime_ns, data, offsets, metadata)
+        return data, offsets, metadata
+    
+    def metadata(self, corpus_name: str, doc_index: int) -> Optional[Dict[str, Any]]:
+        loaded = self.corpus(corpus_name)
+        if loaded is None or loaded[2] is None:
+            return None
+        return loaded[2].get(doc_index)
+    
+    def get(self, corpus_name: str, doc_index: int) -> Optional[str]:
+        loaded = self.corpus(corpus_name)
+        if loaded is None:
+            return None
+        data, offsets, _ = loaded
+        if not 0 <= doc_index < len(offsets) - 1:
+            return None
+        start, end = int(offsets[doc_index]), int(offsets[doc_index + 1])
+        return data[start:end].decode("utf-8") if data is not None and end > start else ""
+
+
+def load_parent_store(db_folder_name: str) -> ParentStore:
+    return ParentStore(Path(settings.CHROMA_PERSIST_PATH) / db_folder_name)
@@ -0,0 +1,237 @@
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from ..config.settings import settings
+
+
+PAGES_PER_TASK = 16
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_pdf_pages(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def extract_page_range(path: str, start: int = 0, end: Optional[int] = None) -> Tuple[str, int, List[str]]:
+    """Se ejecuta en los workers: devuelve (ruta, total de páginas, textos de [start, end))."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    total_pages = len(reader.pages)
+    end = total_pages if end is None else min(end, total_pages)
+    return path, total_pages, [reader.pages[page].extract_text() for page in range(start, end)]
+
+
+class PDFPageCache:
+    """
+    Caché SQLite del texto de cada página, con clave (hash del archivo, página).
+    
+    El hash se recuerda por (ruta, tamaño, fecha de modificación), así que un PDF sin
+    cambios no se vuelve a leer ni a parsear. Un PDF solo cuenta como cacheado si están
+    todas sus páginas.
+    """
+    
+    def __init__(self, database_path: Path):
+        self.database_path = Path(database_path)
+        self.lock = threading.Lock()
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.database_path), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_pages ("
+            "file_hash TEXT NOT NULL, page INTEGER NOT NULL, text TEXT NOT NULL, PRIMARY KEY (file_hash, page))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_files (file_hash TEXT PRIMARY KEY, pages INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_paths ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, file_hash TEXT NOT NULL)"
+        )
+        self.connection.commit()
+    
+    def file_hash(self, path: Path) -> str:
+        stat = path.stat()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, file_hash FROM pdf_paths WHERE path = ?", (str(path),)
+            ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = file_sha256(path)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pdf_paths (path, size, mtime_ns, file_hash) VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime_ns, digest)
+            )
+            if row is not None and row[2] != digest:
+                # El PDF cambió: se descartan las páginas de la versión anterior si ningún otro archivo las usa
+                self.connection.execute(
+                    "DELETE FROM pdf_pages WHERE file_hash = ?1 AND NOT EXISTS "
+                    "(SELECT 1 FROM pdf_paths WHERE file_hash = ?1)", (row[2],)
+                )
+                self.connection.execute(
+                    "DELETE FROM pdf_files WHERE file_hash = ?1 AND NOT EXISTS "
+                    "(SELECT 1 FROM pdf_paths WHERE file_hash = ?1)", (row[2],)
+                )
+            self.connection.commit()
+        return digest
+    
+    def get_pages(self, file_hash: str) -> Optional[List[str]]:
+        with self.lock:
+            row = self.connection.execute("SELECT pages FROM pdf_files WHERE file_hash = ?", (file_hash,)).fetchone()
+            if row is None:
+                return None
+            texts = [text for (text,) in self.connection.execute(
+                "SELECT text FROM pdf_pages WHERE file_hash = ? ORDER BY page", (file_hash,)
+            )]
+            if len(texts) != row[0]:
+                return None
+            self.connection.execute("UPDATE pdf_files SET last_used = ? WHERE file_hash = ?", (time.time(), file_hash))
+            self.connection.commit()
+        return texts
+    
+    def put_pages(self, file_hash: str, texts: Sequence[str]) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM pdf_pages WHERE file_hash = ?", (file_hash,))
+            self.connection.executemany(
+                "INSERT INTO pdf_pages (file_hash, page, text) VALUES (?, ?, ?)",
+                [(file_hash, page, text) for page, text in enumerate(texts)]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pdf_files (file_hash, pages, last_used) VALUES (?, ?, ?)",
+                (file_hash, len(texts), time.time())
+            )
+            self.connection.commit()
+    
+    def clear(self) -> None:
+        with self.lock:
+            for table in ("pdf_pages", "pdf_files", "pdf_paths"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.commit()
+
+
+@lru_cache(maxsize=None)
+def get_pdf_page_cache(database_path: str = None) -> PDFPageCache:
+    return PDFPageCache(Path(database_path or settings.PDF_PAGE_CACHE_PATH))
+
+
+def load_pdf_page_cache() -> Optional[PDFPageCache]:
+    if not settings.ENABLE_PDF_PAGE_CACHE:
+        return None
+    return get_pdf_page_cache()
+
+
+def create_executor(executor: str, workers: int):
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    # La extracción ocurre antes de cargar cualquier modelo, así que `fork` es seguro y evita
+    # que cada worker vuelva a importar el paquete completo
+    start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+
+
+def extract_pdf_texts(
+    paths: Sequence[Path],
+    workers: int,
+    executor: str = "process"
+) -> Dict[str, List[str]]:
+    """
+    Extrae el texto de todas las páginas de `paths` en paralelo.
+    
+    Con tantos PDFs como workers (o más) cada tarea es un archivo completo; si hay pocos
+    PDFs se reparten por rangos de `PAGES_PER_TASK` páginas para que un solo documento
+    grande también aproveche todos los núcleos.
+    """
+    if not paths:
+        return {}
+    if workers <= 1:
+        return {str(path): extract_page_range(str(path))[2] for path in paths}
+    
+    if len(paths) >= workers:
+        tasks = [(str(path), 0, None) for path in paths]
+    else:
+        tasks = []
+        for path in paths:
+            total_pages = count_pdf_pages(str(path))
+            tasks.extend(
+                (str(path), start, start + PAGES_PER_TASK) for start in range(0, total_pages, PAGES_PER_TASK)
+            )
+    
+    ranges: Dict[str, List[Tuple[int, List[str]]]] = {str(path): [] for path in paths}
+    with create_executor(executor, workers) as pool:
+        futures = [(start, pool.submit(extract_page_range, path, start, end)) for path, start, end in tasks]
+        for start, future in futures:
+            path, _, texts = future.result()
+            ranges[path].append((start, texts))
+    return {
+        path: [text for _, texts in sorted(parts, key=lambda part: part[0]) for text in texts]
+        for path, parts in ranges.items()
+    }
+
+
+def load_pdf_documents(
+    data_path: str,
+    workers: Optional[int] = None,
+    executor: str = "process",
+    cache: Optional[PDFPageCache] = None
+) -> Tuple[List[Document], Dict[str, Any]]:
+    """
+    Equivalente a `DirectoryLoader(glob="**/*.pdf", loader_cls=PyPDFLoader)`: un `Document`
+    por página con `source` y `page`. Las páginas de PDFs ya vistos salen del caché.
+    """
+    workers = workers or settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+    paths = sorted(Path(data_path).glob("**/*.pdf"))
+    
+    start = time.perf_counter()
+    file_hashes = {}
+    pages_by_path: Dict[str, List[str]] = {}
+    for path in paths:
+        if cache is None:
+            continue
+        file_hashes[str(path)] = cache.file_hash(path)
+        cached_pages = cache.get_pages(file_hashes[str(path)])
+        if cached_pages is not None:
+            pages_by_path[str(path)] = cached_pages
+    cached_pages_count = sum(len(texts) for texts in pages_by_path.values())
+    
+    pending_paths = [path for path in paths if str(path) not in pages_by_path]
+    extracted = extract_pdf_texts(pending_paths, workers, executor)
+    if cache is not None:
+        for path, texts in extracted.items():
+            cache.put_pages(file_hashes[path], texts)
+    pages_by_path.update(extracted)
+    
+    documents = []
+    for path in paths:
+        texts = pages_by_path[str(path)]
+        documents.extend(
+            Document(page_content=text, metadata={"source": str(path), "page": page, "total_pages": len(texts)})
+            for page, text in enumerate(texts)
+        )
+    
+    stats = {
+        "files": len(paths),
+        "pages": len(documents),
+        "cached_pages": cached_pages_count,
+        "parsed_pages": len(documents) - cached_pages_count,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+    return documents, stats
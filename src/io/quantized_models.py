@@ -0,0 +1,74 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from ..config.settings import settings
+
+
+INFERENCE_BACKENDS = ("torch", "onnx-int8")
+EXPORT_LOCK = threading.Lock()
+
+
+def use_quantized_backend() -> bool:
+    backend = settings.INFERENCE_BACKEND
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Backend de inferencia no soportado: {backend}. Use {', '.join(INFERENCE_BACKENDS)}")
+    return backend == "onnx-int8"
+
+
+def quantized_model_dir(model_name: str) -> Path:
+    # Una carpeta por configuración: solo existe cuando su exportación está completa
+    safe_model_name = model_name.replace("/", "_")
+    return Path(settings.ONNX_CACHE_PATH) / f"{safe_model_name}_{settings.ONNX_QUANTIZATION_CONFIG}"
+
+
+def quantized_file_name() -> str:
+    # Nombre que usa `export_dynamic_quantized_onnx_model` para el modelo cuantizado
+    return f"onnx/model_qint8_{settings.ONNX_QUANTIZATION_CONFIG}.onnx"
+
+
+def export_quantized_model(model_class, model_name: str, **model_kwargs: Any) -> Path:
+    """
+    Exporta el modelo a ONNX con cuantización dinámica int8 una sola vez y devuelve su carpeta.
+    
+    Cada proceso exporta en su propia carpeta temporal, que se renombra al terminar: una
+    exportación interrumpida no deja un modelo a medias en el caché y, si dos procesos
+    arrancan a la vez, el segundo en terminar descarta su copia y usa la del primero.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    
+    target = quantized_model_dir(model_name)
+    with EXPORT_LOCK:
+        if (target / quantized_file_name()).exists():
+            return target
+        
+        tmp_dir = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model = model_class(model_name, backend="onnx", device="cpu", **model_kwargs)
+        if hasattr(model, "save_pretrained"):
+            model.save_pretrained(str(tmp_dir))
+        else:
+            model.save(str(tmp_dir))
+        export_dynamic_quantized_onnx_model(
+            model, settings.ONNX_QUANTIZATION_CONFIG, str(tmp_dir), push_to_hub=False
+        )
+        try:
+            tmp_dir.rename(target)
+        except OSError:
+            if not (target / quantized_file_name()).exists():
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def quantized_model_kwargs(model_class, model_name: str, **model_kwargs: Any) -> Dict[str, Any]:
+    """Argumentos de `model_class` para cargar la exportación int8 en lugar del modelo fp32."""
+    return {
+        "model_name_or_path": str(export_quantized_model(model_class, model_name, **model_kwargs)),
+        "backend": "onnx",
+        "device": "cpu",
+        "model_kwargs": {"file_name": quantized_file_name(), "provider": "CPUExecutionProvider"},
+        **model_kwargs
+    }
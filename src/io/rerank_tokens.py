@@ -0,0 +1,151 @@
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ..config.settings import settings
+from .chunk_records import iter_collection
+from .numpy_store import collection_fingerprint
+
+
+RERANK_TOKENS_DIR_NAME = "rerank_tokens"
+RERANK_TOKENS_VERSION = 1
+ARRAY_NAMES = ("offsets", "tokens", "text_lengths")
+TOKENIZE_BATCH_SIZE = 512
+
+
+def rerank_tokens_dir(persist_path: Path) -> Path:
+    return Path(persist_path) / RERANK_TOKENS_DIR_NAME
+
+
+def load_reranker_tokenizer(model_name: str):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+
+
+def write_rerank_token_cache(
+    persist_path: Path,
+    ids: Sequence[str],
+    texts: Sequence[str],
+    tokenizer,
+    model_name: str,
+    fingerprint: str
+) -> Path:
+    """
+    Guarda los ids de tokens del re-ranker de cada chunk, sin tokens especiales, en formato
+    CSR: los del chunk de la fila `i` son `tokens[offsets[i]:offsets[i + 1]]`.
+    
+    Cada chunk se recorta a la longitud máxima del modelo (nunca se usan más tokens) y se
+    guarda la longitud de su texto para detectar documentos cuyo texto no es el indexado.
+    """
+    max_length = tokenizer.model_max_length
+    chunks: List[np.ndarray] = []
+    for start in range(0, len(texts), TOKENIZE_BATCH_SIZE):
+        batch = [text or "" for text in texts[start:start + TOKENIZE_BATCH_SIZE]]
+        encoded = tokenizer(batch, add_special_tokens=False)["input_ids"]
+        chunks.extend(np.asarray(token_ids[:max_length], dtype=np.int32) for token_ids in encoded)
+    
+    arrays = {
+        "offsets": np.concatenate([[0], np.cumsum([len(c) for c in chunks], dtype=np.int64)]).astype(np.int64),
+        "tokens": np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32),
+        "text_lengths": np.fromiter((len(text or "") for text in texts), dtype=np.int32, count=len(texts))
+    }
+    
+    directory = rerank_tokens_dir(persist_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    for name, array in arrays.items():
+        with open(directory / f"{name}.npy{suffix}", "wb") as f:
+            np.save(f, array)
+    with open(directory / f"chunks.json{suffix}", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": RERANK_TOKENS_VERSION,
+            "fingerprint": fingerprint,
+            "model": model_name,
+            "ids": list(ids)
+        }, f, ensure_ascii=False)
+    
+    # `chunks.json` al final: lleva la versión con la que los lectores validan la caché
+    for name in ARRAY_NAMES:
+        os.replace(directory / f"{name}.npy{suffix}", directory / f"{name}.npy")
+    os.replace(directory / f"chunks.json{suffix}", directory / "chunks.json")
+    return directory
+
+
+def build_rerank_token_cache(
+    chroma,
+    persist_path: Path,
+    fingerprint: Optional[str] = None,
+    model_name: Optional[str] = None
+) -> Optional[Path]:
+    """(Re)tokeniza toda la colección con el tokenizador del re-ranker; se llama al terminar cada indexación."""
+    if not settings.ENABLE_RERANK_TOKEN_CACHE:
+        return None
+    model_name = model_name or settings.RERANKER_MODEL
+    ids, texts = [], []
+    for page in iter_collection(chroma, ["documents"]):
+        ids.extend(page["ids"])
+        texts.extend(page["documents"])
+    return write_rerank_token_cache(
+        persist_path, ids, texts, load_reranker_tokenizer(model_name), model_name,
+        fingerprint or collection_fingerprint(persist_path)
+    )
+
+
+class RerankTokenCache:
+    """Ids de tokens del re-ranker por `chunk_id`, mapeados en memoria desde la carpeta de la BD."""
+    
+    def __init__(self, ids: List[str], arrays, model_name: str, fingerprint: Optional[str] = None):
+        self.model_name = model_name
+        self.fingerprint = fingerprint
+        self.positions = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self.offsets = arrays["offsets"]
+        self.tokens = arrays["tokens"]
+        self.text_lengths = arrays["text_lengths"]
+    
+    @classmethod
+    def load(cls, persist_path: Path) -> Optional["RerankTokenCache"]:
+        directory = rerank_tokens_dir(persist_path)
+        try:
+            with open(directory / "chunks.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != RERANK_TOKENS_VERSION:
+                return None
+            arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        except (OSError, ValueError):
+            return None
+        return cls(data["ids"], arrays, data["model"], fingerprint=data.get("fingerprint"))
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def get(self, chunk_id: Optional[str], text: str) -> Optional[List[int]]:
+        """Tokens del chunk, o None si no está en la caché o su texto no es el indexado."""
+        row = self.positions.get(chunk_id) if chunk_id else None
+        if row is None or int(self.text_lengths[row]) != len(text):
+            return None
+        return self.tokens[int(self.offsets[row]):int(self.offsets[row + 1])].tolist()
+
+
+def load_rerank_token_cache(db_folder_name: str, model_name: Optional[str] = None) -> Optional[RerankTokenCache]:
+    """
+    Carga los tokens pre-calculados de la BD. Si no existen, son de otra versión del índice
+    o de otro re-ranker, los construye a partir de la colección de Chroma.
+    """
+    if not settings.ENABLE_RERANK_TOKEN_CACHE:
+        return None
+    
+    persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
+    if not (persist_path / "chroma.sqlite3").exists():
+        return None
+    
+    model_name = model_name or settings.RERANKER_MODEL
+    fingerprint = collection_fingerprint(persist_path)
+    cache = RerankTokenCache.load(persist_path)
+    if cache is None or cache.fingerprint != fingerprint or cache.model_name != model_name:
+        from langchain_chroma import Chroma
+        build_rerank_token_cache(Chroma(persist_directory=str(persist_path)), persist_path, fingerprint, model_name)
+        cache = RerankTokenCache.load(persist_path)
+    return cache
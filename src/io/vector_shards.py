@@ -0,0 +1,383 @@
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from ..config.settings import settings
+from .answer_cache import IndexVersion, write_index_version
+from .chunk_records import ChunkBatch, iter_collection, query_chunks
+from .numpy_store import collection_fingerprint
+
+
+SHARDS_FILE_NAME = "shards.json"
+# Páginas pequeñas: cada una lleva sus embeddings en memoria mientras se copia a su shard
+SHARD_PAGE_SIZE = 1000
+# Clave del shard de los chunks sin `document_type` (p. ej. documentos crudos)
+UNTYPED_SHARD = ""
+# Nombre de ese shard: los slugs de tipos reales nunca empiezan por "_", así que no colisiona
+UNTYPED_SLUG = "_untyped"
+
+SHARD_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard")
+
+
+def shard_slug(document_type: str) -> str:
+    if document_type == UNTYPED_SHARD:
+        return UNTYPED_SLUG
+    slug = re.sub(r"[^a-zA-Z0-9-]+", "_", document_type).strip("_")[:40]
+    if slug != document_type:
+        # Dos tipos que se normalizan igual ("a b" y "a_b") no comparten colección
+        slug = f"{slug}-{hashlib.sha1(document_type.encode('utf-8')).hexdigest()[:8]}"
+    return slug
+
+
+def shard_collection_name(document_type: str) -> str:
+    return f"shard_{shard_slug(document_type)}"
+
+
+def read_shard_manifest(persist_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(Path(persist_path) / SHARDS_FILE_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_shard_manifest(persist_path: Path, manifest: Dict[str, Any]) -> None:
+    manifest_path = Path(persist_path) / SHARDS_FILE_NAME
+    tmp_path = manifest_path.with_name(f"{SHARDS_FILE_NAME}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def copy_to_shards(chroma, page: Dict[str, Any], collections: Dict[str, Any], shards: Dict[str, Any]) -> None:
+    """Añade una página de la colección principal (con sus embeddings) a los shards de cada tipo."""
+    rows_by_type: Dict[str, List[int]] = {}
+    for row, metadata in enumerate(page["metadatas"]):
+        document_type = (metadata or {}).get("document_type") or UNTYPED_SHARD
+        rows_by_type.setdefault(document_type, []).append(row)
+    
+    for document_type, rows in rows_by_type.items():
+        collection = collections.get(document_type)
+        if collection is None:
+            collection = chroma._client.get_or_create_collection(
+                shard_collection_name(document_type), metadata=chroma._collection.metadata
+            )
+            collections[document_type] = collection
+        collection.add(
+            ids=[page["ids"][row] for row in rows],
+            embeddings=np.asarray([page["embeddings"][row] for row in rows], dtype=np.float32).tolist(),
+            documents=[page["documents"][row] for row in rows],
+            metadatas=[page["metadatas"][row] for row in rows]
+        )
+        shard = shards.setdefault(
+            document_type, {"collection": collection.name, "chunks": 0, "sources": []}
+        )
+        sources = {(page["metadatas"][row] or {}).get("source") for row in rows} - {None}
+        shard["sources"] = sorted(set(shard["sources"]) | sources)
+
+
+def shard_manifest(chroma, fingerprint: str, shards: Dict[str, Any], collections: Dict[str, Any]) -> Dict[str, Any]:
+    for document_type, collection in collections.items():
+        shards[document_type]["chunks"] = collection.count()
+    return {
+        "fingerprint": fingerprint,
+        "main_collection": chroma._collection.name,
+        "main_collection_id": str(chroma._collection.id),
+        "shards": shards
+    }
+
+
+def build_vector_shards(chroma, persist_path: Path, fingerprint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Copia la colección principal en una colección de Chroma por `document_type`.
+    
+    Reutiliza los vectores guardados (no vuelve a calcular embeddings) y copia página a
+    página, así que la memoria no crece con el tamaño de la colección. Los shards anteriores
+    se borran primero: un lector que aún los tenga abiertos falla y vuelve a la colección principal.
+    """
+    fingerprint = fingerprint or collection_fingerprint(persist_path)
+    for collection in chroma._client.list_collections():
+        name = getattr(collection, "name", collection)
+        if name.startswith("shard_"):
+            chroma._client.delete_collection(name)
+    
+    collections: Dict[str, Any] = {}
+    shards: Dict[str, Any] = {}
+    for page in iter_collection(chroma, ["embeddings", "documents", "metadatas"], page_size=SHARD_PAGE_SIZE):
+        copy_to_shards(chroma, page, collections, shards)
+    
+    manifest = shard_manifest(chroma, fingerprint, shards, collections)
+    write_shard_manifest(persist_path, manifest)
+    return manifest
+
+
+def update_vector_shards(
+    chroma,
+    persist_path: Path,
+    manifest: Dict[str, Any],
+    fingerprint: str,
+    upserted_ids: Sequence[str],
+    deleted_ids: Sequence[str]
+) -> Dict[str, Any]:
+    """
+    Aplica a los shards solo los cambios de una indexación incremental.
+    
+    Los ids borrados, añadidos o actualizados se quitan de todos los shards (no se sabe en
+    cuál estaban) y los añadidos o actualizados se vuelven a copiar desde la colección
+    principal. Las fuentes de un shard solo crecen: una fuente que ya no tiene chunks solo
+    hace que el enrutado consulte ese shard de más.
+    """
+    collections = {
+        document_type: chroma._client.get_collection(shard["collection"])
+        for document_type, shard in manifest["shards"].items()
+    }
+    shards = {document_type: dict(shard) for document_type, shard in manifest["shards"].items()}
+    
+    removed = list(dict.fromkeys([*deleted_ids, *upserted_ids]))
+    for start in range(0, len(removed), SHARD_PAGE_SIZE):
+        for collection in collections.values():
+            collection.delete(ids=removed[start:start + SHARD_PAGE_SIZE])
+    
+    upserted = list(dict.fromkeys(upserted_ids))
+    for start in range(0, len(upserted), SHARD_PAGE_SIZE):
+        page = chroma._collection.get(
+            ids=upserted[start:start + SHARD_PAGE_SIZE], include=["embeddings", "documents", "metadatas"]
+        )
+        if page["ids"]:
+            copy_to_shards(chroma, page, collections, shards)
+    
+    manifest = shard_manifest(chroma, fingerprint, shards, collections)
+    for document_type in [document_type for document_type, shard in shards.items() if not shard["chunks"]]:
+        chroma._client.delete_collection(shards.pop(document_type)["collection"])
+    write_shard_manifest(persist_path, manifest)
+    return manifest
+
+
+def ensure_vector_shards(
+    chroma,
+    persist_path: Path,
+    fingerprint: Optional[str] = None,
+    previous_fingerprint: Optional[str] = None,
+    upserted_ids: Optional[Sequence[str]] = None,
+    deleted_ids: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Pone los shards al día si están activados y no corresponden a la versión del índice.
+    
+    Si los shards eran de `previous_fingerprint` (la versión anterior a la indexación) y de
+    la misma colección principal, solo se aplican los ids cambiados; si no, se reconstruyen.
+    """
+    if not settings.ENABLE_VECTOR_SHARDS:
+        return None
+    if fingerprint is None and IndexVersion(persist_path).current() == "0":
+        # Sin versión, la huella depende del tamaño de chroma.sqlite3, que cambia al añadir los shards
+        fingerprint = write_index_version(persist_path)
+    fingerprint = fingerprint or collection_fingerprint(persist_path)
+    manifest = read_shard_manifest(persist_path)
+    if manifest is not None and manifest.get("fingerprint") == fingerprint:
+        return manifest
+    
+    incremental = (
+        manifest is not None
+        and upserted_ids is not None
+        and previous_fingerprint not in (None, "0")
+        and manifest.get("fingerprint") == previous_fingerprint
+        and manifest.get("main_collection_id") == str(chroma._collection.id)
+    )
+    if incremental:
+        try:
+            return update_vector_shards(chroma, persist_path, manifest, fingerprint, upserted_ids, deleted_ids or [])
+        except Exception:
+            # Un shard que falta o no se puede abrir: se reconstruyen todos
+            pass
+    return build_vector_shards(chroma, persist_path, fingerprint)
+
+
+def pinned_values(where: Optional[Dict[str, Any]], field: str) -> Optional[Set[Any]]:
+    """Valores a los que el filtro `where` restringe `field`, o None si no lo restringe."""
+    if not where:
+        return None
+    
+    pinned = None
+    for key, condition in where.items():
+        if key == "$and":
+            values = [pinned_values(clause, field) for clause in condition]
+        elif key == field:
+            if isinstance(condition, dict):
+                operator, value = next(iter(condition.items()))
+                values = [{value} if operator == "$eq" else set(value) if operator == "$in" else None]
+            else:
+                values = [{condition}]
+        else:
+            continue
+        for value_set in values:
+            if value_set is not None:
+                pinned = value_set if pinned is None else pinned & value_set
+    return pinned
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    Búsqueda vectorial con una colección de Chroma por `document_type`.
+    
+    Si el filtro `where` fija el tipo de documento o la fuente (las estrategias de una
+    categoría del router semántico), la consulta va solo a ese shard, un índice HNSW más
+    pequeño sin el filtro selectivo sobre el grafo global. Si no, se consultan todos los
+    shards en paralelo y se combinan por distancia. Con `fan_out` (categoría del router con
+    poca confianza) se consultan siempre todos los shards; el filtro se aplica igual en cada uno.
+    
+    Las lecturas por id (`get`, `get_by_ids`) van a la colección principal. Las escrituras
+    no se admiten aquí (`add_texts`, `delete` heredados fallan): la indexación escribe en la
+    colección principal y después actualiza los shards con `ensure_vector_shards`.
+    """
+    
+    def __init__(
+        self,
+        main_store,
+        shards: Dict[str, Any],
+        manifest: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None,
+        fan_out: bool = False
+    ):
+        self.main_store = main_store
+        self.shards = shards
+        self.manifest = manifest
+        self.metrics = metrics
+        self.fan_out = fan_out
+    
+    @classmethod
+    def load(cls, main_store, persist_path: Path) -> Optional["ShardedVectorStore"]:
+        """Shards de la BD, o None si no existen o no corresponden a la versión actual del índice."""
+        from langchain_chroma import Chroma
+        
+        manifest = read_shard_manifest(persist_path)
+        if not manifest or manifest.get("fingerprint") != collection_fingerprint(persist_path):
+            return None
+        shards = {
+            document_type: Chroma(
+                client=main_store._client,
+                collection_name=shard["collection"],
+                embedding_function=main_store.embeddings,
+                create_collection_if_not_exists=False
+            )
+            for document_type, shard in manifest["shards"].items()
+        }
+        return cls(main_store, shards, manifest)
+    
+    def for_request(self, metrics: Optional[Dict[str, Any]], fan_out: bool = False) -> "ShardedVectorStore":
+        """Vista que registra la latencia por shard en las métricas de una petición."""
+        return ShardedVectorStore(self.main_store, self.shards, self.manifest, metrics, fan_out)
+    
+    def __getattr__(self, name: str):
+        if name == "main_store":
+            raise AttributeError(name)
+        return getattr(self.main_store, name)
+    
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.main_store.embeddings
+    
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return self.main_store.get_by_ids(ids)
+    
+    def route(self, where: Optional[Dict[str, Any]]) -> List[str]:
+        shards = list(self.shards)
+        if self.fan_out:
+            return shards
+        document_types = pinned_values(where, "document_type")
+        if document_types is not None:
+            shards = [shard for shard in shards if shard in document_types]
+        sources = pinned_values(where, "source")
+        if sources is not None:
+            shards = [shard for shard in shards if sources & set(self.manifest["shards"][shard]["sources"])]
+        return shards
+    
+    def query_shard(self, shard: str, query_embedding: List[float], k: int, where: Optional[dict]):
+        start = time.perf_counter()
+        batch = query_chunks(self.shards[shard], query_embedding, k, where)
+        return batch, (time.perf_counter() - start) * 1000
+    
+    def query_chunks(self, query_embedding: List[float], k: int, where: Optional[dict] = None) -> ChunkBatch:
+        targets = self.route(where)
+        if not targets:
+            # Un filtro que no corresponde a ningún shard se resuelve en la colección principal
+            return query_chunks(self.main_store, query_embedding, k, where)
+        
+        try:
+            if len(targets) == 1:
+                results = [self.query_shard(targets[0], query_embedding, k, where)]
+            else:
+                futures = [
+                    SHARD_EXECUTOR.submit(self.query_shard, shard, query_embedding, k, where) for shard in targets
+                ]
+                results = [future.result() for future in futures]
+        except Exception:
+            # Un shard borrado por una reindexación posterior: la colección principal sigue siendo válida
+            return query_chunks(self.main_store, query_embedding, k, where)
+        
+        if self.metrics is not None:
+            stats = self.metrics.setdefault("shards", {"queries": 0, "fanout_queries": 0, "ms": {}})
+            stats["queries"] += 1
+            stats["fanout_queries"] += int(len(targets) > 1)
+            for shard, (_, elapsed_ms) in zip(targets, results):
+                label = shard_slug(shard)
+                stats["ms"][label] = round(stats["ms"].get(label, 0.0) + elapsed_ms, 3)
+        
+        if len(results) == 1:
+            return results[0][0]
+        
+        ids, texts, metadatas, distances = [], [], [], []
+        for batch, _ in results:
+            ids.extend(batch.ids)
+            texts.extend(batch.texts)
+            metadatas.extend(batch.metadatas)
+            distances.extend(batch.distances.tolist() if batch.distances is not None else [0.0] * len(batch))
+        order = np.argsort(np.asarray(distances, dtype=np.float32), kind="stable")[:k]
+        return ChunkBatch(
+            [ids[i] for i in order],
+            [texts[i] for i in order],
+            [metadatas[i] for i in order],
+            [distances[i] for i in order]
+        )
+    
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.query_chunks(embedding, k, filter).to_documents()
+    
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k, filter)
+    
+    def _select_relevance_score_fn(self):
+        return self.main_store._select_relevance_score_fn()
+    
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Los shards se construyen a partir de la colección principal con build_vector_shards")
+
+
+def bind_request_metrics(vectorstore, metrics: Optional[Dict[str, Any]], fan_out: bool = False):
+    """La base vectorial con las métricas de la petición y su enrutado, si los usa (shards)."""
+    if isinstance(vectorstore, ShardedVectorStore) and (metrics is not None or fan_out):
+        return vectorstore.for_request(metrics, fan_out)
+    return vectorstore
@@ -1,25 +1,50 @@
 import torch
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from langchain_chroma import Chroma
+from langchain_core.vectorstores import VectorStore
 from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain.retrievers.self_query.base import SelfQueryRetriever
 from langchain.chains.query_constructor.schema import AttributeInfo
 from langchain_community.query_constructors.chroma import ChromaTranslator
 
 from ..config.settings import settings
+from .embedding_cache import cached_embeddings
+from .micro_batcher import batched_embeddings
+from .quantized_models import quantized_model_kwargs, use_quantized_backend
+from .numpy_store import NumpyVectorStore
+from .vector_shards import ShardedVectorStore
 
 
-def get_embedding_function(model_name: str) -> HuggingFaceEmbeddings:
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+
+@lru_cache(maxsize=None)
+def get_embedding_function(model_name: str) -> Embeddings:
+    if use_quantized_backend():
+        from sentence_transformers import SentenceTransformer
+        
+        model_kwargs = quantized_model_kwargs(SentenceTransformer, model_name)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model_kwargs.pop("model_name_or_path"),
+            model_kwargs=model_kwargs,
+            encode_kwargs={"normalize_embeddings": True}
+        )
+        # Los vectores int8 no son idénticos a los fp32: cada backend tiene su propio caché
+        return cached_embeddings(batched_embeddings(embeddings), f"{model_name}@{settings.INFERENCE_BACKEND}", normalize=True)
+    
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    return HuggingFaceEmbeddings(
+    embeddings = HuggingFaceEmbeddings(
         model_name=model_name,
         model_kwargs={"device": device},
         encode_kwargs={"normalize_embeddings": True}
     )
+    return cached_embeddings(batched_embeddings(embeddings), model_name, normalize=True)
 
 
-def get_vector_store(db_folder_name: str, embedding_model_name: str) -> Chroma:
+def get_vector_store(db_folder_name: str, embedding_model_name: str, backend: Optional[str] = None) -> VectorStore:
     persist_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name
     
     if not persist_path.is_dir() or not (persist_path / "chroma.sqlite3").exists():
@@ -28,12 +53,27 @@ def get_vector_store(db_folder_name: str, embedding_model_name: str) -> Chroma:
             "Asegúrate de que el nombre de la carpeta es correcto y la base de datos ha sido indexada."
         )
     
+    backend = backend or settings.VECTOR_BACKEND
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Backend vectorial no soportado: {backend}. Use {', '.join(VECTOR_BACKENDS)}")
+    
     embedding_function = get_embedding_function(embedding_model_name)
-    return Chroma(persist_directory=str(persist_path), embedding_function=embedding_function)
+    if backend == "numpy":
+        return NumpyVectorStore.load(persist_path, embedding_function)
+    
+    vector_store = Chroma(persist_directory=str(persist_path), embedding_function=embedding_function)
+    if settings.ENABLE_VECTOR_SHARDS:
+        try:
+            sharded_store = ShardedVectorStore.load(vector_store, persist_path)
+        except Exception:
+            sharded_store = None
+        if sharded_store is not None:
+            return sharded_store
+    return vector_store
 
 
 def get_self_query_retriever(
-    vector_store: Chroma, 
+    vector_store: VectorStore, 
     llm, 
     enable_self_query: bool = True
 ) -> Optional[SelfQueryRetriever]:
@@ -0,0 +1,91 @@
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ..config.settings import settings
+
+
+VOCABULARY_FILE_NAME = "vocabulary.json"
+VOCABULARY_VERSION = 1
+WORD_PATTERN = re.compile(r"[^\W\d_ºª]+")
+
+
+def count_corpus_words(texts: Iterable[str]) -> Dict[str, int]:
+    counts = Counter()
+    for text in texts:
+        counts.update(WORD_PATTERN.findall(text.lower()))
+    return dict(counts)
+
+
+def update_corpus_vocabulary(persist_path: Path, corpus_name: str, texts: Iterable[str]) -> Path:
+    """Reemplaza el vocabulario de un corpus en la BD, conservando el de los demás."""
+    return write_corpus_vocabulary(persist_path, corpus_name, count_corpus_words(texts))
+
+
+def write_corpus_vocabulary(persist_path: Path, corpus_name: str, word_counts: Dict[str, int]) -> Path:
+    vocabulary_path = Path(persist_path) / VOCABULARY_FILE_NAME
+    vocabulary_data = {"version": VOCABULARY_VERSION, "corpora": {}}
+    
+    if vocabulary_path.exists():
+        try:
+            with open(vocabulary_path, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing.get("version") == VOCABULARY_VERSION:
+                vocabulary_data["corpora"] = existing.get("corpora", {})
+        except (json.JSONDecodeError, OSError):
+            pass
+    
+    vocabulary_data["corpora"][corpus_name] = dict(word_counts)
+    
+    vocabulary_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = vocabulary_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(vocabulary_data, f, ensure_ascii=False)
+    os.replace(tmp_path, vocabulary_path)
+    
+    return vocabulary_path
+
+
+def read_wordlist(wordlist_path: Path, min_count: int) -> Dict[str, int]:
+    """Lee una lista de palabras (una por línea, opcionalmente seguida de su frecuencia)."""
+    counts = {}
+    with open(wordlist_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            word = parts[0].lower()
+            count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else min_count
+            counts[word] = max(counts.get(word, 0), count, min_count)
+    return counts
+
+
+def load_wordlist(wordlist_path: str = None) -> Optional[Dict[str, int]]:
+    """Lista de palabras general del idioma; None si no está configurada o no existe."""
+    wordlist_path = wordlist_path if wordlist_path is not None else settings.SPELL_WORDLIST_PATH
+    if not wordlist_path or not Path(wordlist_path).exists():
+        return None
+    return read_wordlist(Path(wordlist_path), settings.SPELL_MIN_WORD_COUNT) or None
+
+
+def load_vocabulary(db_folder_name: str) -> Optional[Dict[str, int]]:
+    """Vocabulario del corpus indexado; None si la BD no tiene vocabulario."""
+    vocabulary_path = Path(settings.CHROMA_PERSIST_PATH) / db_folder_name / VOCABULARY_FILE_NAME
+    
+    if not vocabulary_path.exists():
+        return None
+    
+    try:
+        with open(vocabulary_path, "r", encoding="utf-8") as f:
+            vocabulary_data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    
+    counts = Counter()
+    for corpus_counts in vocabulary_data.get("corpora", {}).values():
+        counts.update(corpus_counts)
+    
+    return dict(counts)
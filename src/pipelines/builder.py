@@ -1,15 +1,25 @@
-from typing import Dict, Any, Optional
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
 
+from ..config.settings import settings
+from ..io.answer_cache import IndexVersion, answer_cache_key, get_answer_cache, pipeline_fingerprint
+from ..io.vectordb import get_embedding_function
+from ..steps.semantic_cache import SemanticAnswerCache
 from ..types import PipelineInput, PipelineOutput
 from .naive import create_naive_rag_pipeline, invoke_naive_pipeline
-from .dinamic import create_dynamic_rag_pipeline, invoke_dynamic_pipeline
+from .dinamic import create_dynamic_rag_pipeline, invoke_dynamic_pipeline, ainvoke_dynamic_pipeline
 
 
 class BasePipeline(ABC):
     @abstractmethod
     def invoke(self, question: str) -> PipelineOutput:
         pass
+    
+    async def ainvoke(self, question: str) -> PipelineOutput:
+        return await asyncio.to_thread(self.invoke, question)
 
 
 class NaiveRAGPipeline(BasePipeline):
@@ -41,7 +51,13 @@ class DynamicRoutedRAGPipeline(BasePipeline):
         llm_model_name: str = None,
         temperature: float = None,
         top_k: int = None,
-        enable_self_query: bool = None
+        enable_self_query: bool = None,
+        retrieval_mode: str = None,
+        router_mode: str = None,
+        semantic_router_mode: str = None,
+        context_expansion: str = None,
+        answer_cache: bool = None,
+        semantic_cache: bool = None
     ):
         self.chain = create_dynamic_rag_pipeline(
             db_folder_name=db_folder_name,
@@ -49,11 +65,120 @@ class DynamicRoutedRAGPipeline(BasePipeline):
             llm_model_name=llm_model_name,
             temperature=temperature,
             top_k=top_k,
-            enable_self_query=enable_self_query
+            enable_self_query=enable_self_query,
+            retrieval_mode=retrieval_mode,
+            router_mode=router_mode,
+            semantic_router_mode=semantic_router_mode,
+            context_expansion=context_expansion
+        )
+        
+        answer_cache = answer_cache if answer_cache is not None else settings.ENABLE_ANSWER_CACHE
+        self.answer_cache = get_answer_cache() if answer_cache else None
+        semantic_cache = semantic_cache if semantic_cache is not None else settings.ENABLE_SEMANTIC_CACHE
+        self.semantic_cache = (
+            SemanticAnswerCache(get_embedding_function(embedding_model_name)) if semantic_cache else None
+        )
+        self.index_version = IndexVersion(Path(settings.CHROMA_PERSIST_PATH) / db_folder_name)
+        self.fingerprint = pipeline_fingerprint(
+            db_folder_name=db_folder_name,
+            embedding_model_name=embedding_model_name,
+            llm_model_name=llm_model_name,
+            temperature=temperature,
+            top_k=top_k,
+            enable_self_query=enable_self_query,
+            retrieval_mode=retrieval_mode or settings.RETRIEVAL_MODE,
+            router_mode=router_mode or settings.ROUTER_MODE,
+            semantic_router_mode=semantic_router_mode or settings.SEMANTIC_ROUTER_MODE,
+            context_expansion=context_expansion or settings.CONTEXT_EXPANSION_MODE
         )
     
+    def cache_namespace(self) -> str:
+        return f"{self.fingerprint}:{self.index_version.current()}"
+    
+    def cache_key(self, question: str) -> Optional[str]:
+        if self.answer_cache is None or not question:
+            return None
+        return answer_cache_key(question, self.cache_namespace())
+    
+    def cached_answer(self, key: Optional[str], question: str) -> Optional[PipelineOutput]:
+        if key is None:
+            return None
+        
+        start = time.perf_counter()
+        cached = self.answer_cache.get(key)
+        if cached is None:
+            return None
+        
+        return cached.model_copy(update={
+            "question": question,
+            "metrics": {"answer_cache": {"hit": True, "ms": round((time.perf_counter() - start) * 1000, 4)}}
+        })
+    
+    def semantic_lookup(self, question: str) -> Tuple[Optional[PipelineOutput], Optional[List[float]], Dict[str, Any]]:
+        if self.semantic_cache is None or not question:
+            return None, None, {}
+        
+        start = time.perf_counter()
+        try:
+            embedding = self.semantic_cache.embed(question)
+            cached, match = self.semantic_cache.lookup(question, embedding, self.cache_namespace())
+        except Exception:
+            return None, None, {}
+        match["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        
+        if cached is None:
+            return None, embedding, match
+        
+        return cached.model_copy(update={"question": question, "metrics": {"semantic_cache": match}}), embedding, match
+    
+    def store_answer(
+        self,
+        key: Optional[str],
+        output: PipelineOutput,
+        question: str,
+        embedding: Optional[List[float]],
+        semantic_match: Dict[str, Any]
+    ) -> PipelineOutput:
+        if output.error is not None:
+            return output
+        
+        if key is not None:
+            self.answer_cache.put(key, output)
+            if output.metrics is not None:
+                output.metrics["answer_cache"] = {"hit": False}
+        
+        if embedding is not None:
+            self.semantic_cache.add(question, embedding, output, self.cache_namespace())
+            if output.metrics is not None:
+                output.metrics["semantic_cache"] = semantic_match
+        
+        return output
+    
     def invoke(self, question: str) -> PipelineOutput:
-        return invoke_dynamic_pipeline(self.chain, question)
+        key = self.cache_key(question)
+        cached = self.cached_answer(key, question)
+        if cached is not None:
+            return cached
+        
+        cached, embedding, semantic_match = self.semantic_lookup(question)
+        if cached is not None:
+            return cached
+        
+        output = invoke_dynamic_pipeline(self.chain, question, query_embedding=embedding)
+        return self.store_answer(key, output, question, embedding, semantic_match)
+    
+    async def ainvoke(self, question: str) -> PipelineOutput:
+        key = self.cache_key(question)
+        cached = self.cached_answer(key, question)
+        if cached is not None:
+            return cached
+        
+        cached, embedding, semantic_match = await asyncio.to_thread(self.semantic_lookup, question)
+        if cached is not None:
+            return cached
+        
+        output = await ainvoke_dynamic_pipeline(self.chain, question, query_embedding=embedding)
+        return self.store_answer(key, output, question, embedding, semantic_match)
 
 
 def create_pipeline(
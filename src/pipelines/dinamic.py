@@ -1,3 +1,5 @@
+import asyncio
+import time
 from typing import Dict, Any, List
 from langchain_core.runnables import (
     RunnablePassthrough, 
@@ -10,7 +12,13 @@ from operator import itemgetter
 
 from langchain_core.documents import Document
 from ..io.vectordb import get_vector_store, get_self_query_retriever
-from ..io.llm import get_llm
+from ..io.catalog import load_metadata_catalog
+from ..io.llm import get_llm, summarize_llm_usage
+from ..io.llm_cache import SQLiteLLMCache
+from ..io.embedding_cache import CachedEmbeddings
+from ..io.parent_store import load_parent_store
+from ..io.lexical_index import load_lexical_index
+from ..io.rerank_tokens import load_rerank_token_cache
 from ..steps.retrieval import create_retrieval_chain
 from ..steps.rerank import create_reranker
 from ..steps.routing import (
@@ -20,7 +28,10 @@ from ..steps.routing import (
     create_step_back_generator
 )
 from ..steps.self_query import create_self_query_retriever
-from ..steps.self_query import create_modular_self_query_pipeline
+from ..steps.self_query import create_modular_self_query_pipeline, aspeculative_retrieval
+from ..steps.fast_path import create_fast_path_router
+from ..steps.spelling import load_spell_checker
+from ..steps.context_expansion import create_context_expander
 from ..steps.synthesis import (
     create_rag_answer_chain,
     create_complex_branch_chain,
@@ -30,33 +41,53 @@ from ..types import PipelineInput, PipelineOutput, SemanticRouterOutput, Extract
 from ..config.settings import settings
 
 
+ROUTER_STAGES = ("quality_router", "semantic_router", "filter_extractor", "fused_router")
+
+
 def create_dynamic_rag_pipeline(
     db_folder_name: str,
     embedding_model_name: str,
     llm_model_name: str = None,
     temperature: float = None,
     top_k: int = None,
-    enable_self_query: bool = None
+    enable_self_query: bool = None,
+    retrieval_mode: str = None,
+    router_mode: str = None,
+    semantic_router_mode: str = None,
+    context_expansion: str = None
 ) -> Runnable:
     llm_model_name = llm_model_name or "llama3.1:8b"
     temperature = temperature or 0.0
     top_k = top_k or 15
     enable_self_query = enable_self_query if enable_self_query is not None else True
+    router_mode = router_mode or settings.ROUTER_MODE
     
     vector_store = get_vector_store(db_folder_name, embedding_model_name)
     llm = get_llm(model_name=llm_model_name, temperature=temperature)
-    reranker = create_reranker()
+    router_llm = get_llm(model_name=llm_model_name, temperature=temperature, cache=True)
+    reranker = create_reranker(token_cache=load_rerank_token_cache(db_folder_name))
+    catalog = load_metadata_catalog(db_folder_name)
+    spell_checker = load_spell_checker(db_folder_name)
+    context_expander = create_context_expander(load_parent_store(db_folder_name), mode=context_expansion)
+    lexical_index = load_lexical_index(db_folder_name)
+    
+    modular_components = create_modular_self_query_pipeline(
+        router_llm, vector_store, top_k=top_k, retrieval_mode=retrieval_mode, catalog=catalog,
+        semantic_router_mode=semantic_router_mode, lexical_index=lexical_index
+    )
     
-    modular_components = create_modular_self_query_pipeline(llm, vector_store, top_k=top_k)
+    self_query_retriever = create_self_query_retriever(router_llm, vector_store, top_k=top_k)
     
-    self_query_retriever = create_self_query_retriever(llm, vector_store, top_k=top_k)
+    fast_path_router = create_fast_path_router(
+        vector_store, catalog if settings.ENABLE_FAST_PATH else None, top_k=top_k
+    )
     
     def debug_quality_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
         question = inputs.get("question", "NO_QUESTION")
         
         try:
-            quality_router = create_quality_router(llm)
-            quality_result = quality_router.invoke({"question": question})
+            quality_router = create_quality_router(router_llm, spell_checker)
+            quality_result = quality_router.invoke({"question": question, "metrics": inputs.get("metrics")})
             
             if isinstance(quality_result, dict):
                 merged_result = {**inputs, **quality_result}
@@ -71,9 +102,9 @@ def create_dynamic_rag_pipeline(
                 "corrected_question": None,
                 "correction_notes": f"Error en corrección: {e}"
             }
-
+    
     quality_router_chain = RunnableLambda(debug_quality_router)
-
+    
     def rerank_docs(inputs: Dict[str, Any]) -> List[Document]:
         question = inputs.get("question", "NO_QUESTION")
         
@@ -85,44 +116,33 @@ def create_dynamic_rag_pipeline(
         if not docs:
             return []
         
+        if inputs.get("route") == "fast_path" and len(docs) <= reranker.top_n:
+            return docs
+        
         try:
             from ..steps.rerank import rerank_documents
             rerank_result = rerank_documents(question, docs, reranker)
+            if inputs.get("metrics") is not None:
+                inputs["metrics"]["rerank"] = {
+                    "pairs": rerank_result.original_count,
+                    "cache_hits": rerank_result.cache_hits,
+                    "cache_misses": rerank_result.cache_misses,
+                    "saved_ms": rerank_result.saved_ms
+                }
             return rerank_result.documents
         except Exception as e:
             return docs
-
+    
     rerank_chain = RunnableLambda(rerank_docs)
-
+    
     rag_answer_chain = create_rag_answer_chain(llm)
     
-    def modular_self_query_with_debug(inputs: Dict[str, Any]) -> List[Document]:
+    def retrieve_with_fallback(inputs: Dict[str, Any]) -> List[Document]:
         question = inputs.get("question", "NO_QUESTION")
         
         try:
-            try:
-                semantic_result = modular_components["semantic_router"].invoke(inputs)
-            except Exception as e:
-                semantic_result = {
-                    **inputs,
-                    "semantic_category": "general",
-                    "semantic_confidence": 0.5,
-                    "semantic_reasoning": f"Error en clasificación: {e}"
-                }
-            
-            try:
-                filter_result = modular_components["filter_extractor"].invoke(semantic_result)
-            except Exception as e:
-                filter_result = {
-                    **semantic_result,
-                    "extracted_filters": ExtractedFilters()
-                }
-            
-            try:
-                docs = modular_components["retrieval_assembler"].invoke(filter_result)
-                return docs
-            except Exception as e:
-                raise e
+            docs = modular_components["retrieval_assembler"].invoke(inputs)
+            return docs
                 
         except Exception as e:
             try:
@@ -136,13 +156,120 @@ def create_dynamic_rag_pipeline(
                 except Exception as e3:
                     return []
     
+    def modular_self_query_with_debug(inputs: Dict[str, Any]) -> List[Document]:
+        try:
+            semantic_result = modular_components["semantic_router"].invoke(inputs)
+        except Exception as e:
+            semantic_result = {
+                **inputs,
+                "semantic_category": "general",
+                "semantic_confidence": 0.5,
+                "semantic_reasoning": f"Error en clasificación: {e}"
+            }
+        
+        try:
+            filter_result = modular_components["filter_extractor"].invoke(semantic_result)
+        except Exception as e:
+            filter_result = {
+                **semantic_result,
+                "extracted_filters": ExtractedFilters()
+            }
+        
+        return retrieve_with_fallback(filter_result)
+    
     self_query_chain = RunnableLambda(modular_self_query_with_debug)
     
+    if router_mode == "fused":
+        routing_chain = (
+            modular_components["fused_router"]
+            | RunnablePassthrough.assign(retrieved_docs=RunnableLambda(retrieve_with_fallback))
+        )
+    else:
+        routing_chain = quality_router_chain | RunnablePassthrough.assign(retrieved_docs=self_query_chain)
+    
+    async_quality_router = create_quality_router(router_llm, spell_checker)
+    
+    def route_and_retrieve(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result = routing_chain.invoke(inputs)
+        if inputs.get("metrics") is not None:
+            inputs["metrics"]["routing_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+    
+    uses_embedding_router = (semantic_router_mode or settings.SEMANTIC_ROUTER_MODE) == "embedding"
+    
+    async def asemantic_stage(inputs: Dict[str, Any], speculative_task: asyncio.Task) -> Dict[str, Any]:
+        if uses_embedding_router:
+            try:
+                inputs = {**inputs, "speculative_retrieval": await speculative_task}
+            except Exception:
+                pass
+        return await modular_components["semantic_router"].ainvoke(inputs)
+    
+    async def aroute_and_retrieve(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Versión asíncrona del enrutamiento: las etapas independientes se solapan.
+        
+        Corrector ‖ router semántico ‖ extractor de filtros ‖ recuperación especulativa
+        sin filtros. Si el corrector cambia la pregunta, el router semántico y el extractor
+        se repiten sobre la pregunta corregida y la recuperación especulativa se descarta,
+        de modo que el resultado coincide con `invoke`.
+        """
+        question = inputs.get("question", "NO_QUESTION")
+        metrics = inputs.get("metrics")
+        start = time.perf_counter()
+        
+        precomputed = inputs.get("speculative_retrieval") or {}
+        speculative_task = asyncio.create_task(aspeculative_retrieval(
+            vector_store, question, top_k, metrics,
+            embedding=precomputed.get("embedding") if precomputed.get("question") == question else None,
+            lexical_index=lexical_index
+        ))
+        
+        if router_mode == "fused":
+            routed = await modular_components["fused_router"].ainvoke(inputs)
+        else:
+            quality_result, semantic_result, filter_result = await asyncio.gather(
+                async_quality_router.ainvoke({"question": question, "metrics": metrics}),
+                asemantic_stage(inputs, speculative_task),
+                modular_components["filter_extractor"].ainvoke(inputs)
+            )
+            routed = {**inputs, **semantic_result, **filter_result, **quality_result}
+            
+            if routed["question"] != question:
+                semantic_result, filter_result = await asyncio.gather(
+                    modular_components["semantic_router"].ainvoke(routed),
+                    modular_components["filter_extractor"].ainvoke(routed)
+                )
+                routed = {**routed, **semantic_result, **filter_result}
+        
+        try:
+            routed["speculative_retrieval"] = await speculative_task
+        except Exception:
+            pass
+        
+        docs = await asyncio.to_thread(retrieve_with_fallback, routed)
+        if metrics is not None:
+            metrics["routing_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return {**routed, "retrieved_docs": docs}
+    
+    routing_step = RunnableLambda(route_and_retrieve, afunc=aroute_and_retrieve)
+    
     final_chain = (
-        RunnablePassthrough.assign(original_question=itemgetter("question"))
-        | quality_router_chain
-        | RunnablePassthrough.assign(retrieved_docs=self_query_chain)
+        RunnablePassthrough.assign(
+            original_question=itemgetter("question"),
+            metrics=RunnableLambda(lambda x: {})
+        )
+        | fast_path_router
+        | RunnableBranch(
+            (
+                lambda x: bool(x.get("fast_path_docs")),
+                RunnablePassthrough.assign(retrieved_docs=itemgetter("fast_path_docs"))
+            ),
+            routing_step
+        )
         | RunnablePassthrough.assign(retrieved_docs=rerank_chain)
+        | RunnablePassthrough.assign(retrieved_docs=context_expander)
         | RunnablePassthrough.assign(
             generated_answer=RunnableLambda(lambda x: {
                 "context": "\n\n".join([d.page_content for d in x.get("retrieved_docs", [])]) if x.get("retrieved_docs", []) else "",
@@ -167,22 +294,36 @@ def create_dynamic_rag_pipeline(
             | rag_answer_chain
         )
     )
-
+    
     def format_output(chain_result: Dict) -> PipelineOutput:
         retrieved_docs = chain_result.get("retrieved_docs", [])
         
+        metrics = chain_result.get("metrics")
+        if metrics is not None:
+            metrics["router"] = {
+                "mode": "fast_path" if chain_result.get("route") == "fast_path" else router_mode,
+                **summarize_llm_usage(metrics, ROUTER_STAGES)
+            }
+            if isinstance(getattr(router_llm, "cache", None), SQLiteLLMCache):
+                metrics["llm_cache"] = router_llm.cache.stats()
+            if isinstance(vector_store.embeddings, CachedEmbeddings):
+                metrics["embedding_cache"] = vector_store.embeddings.stats()
+            if reranker.score_cache is not None:
+                metrics["rerank_cache"] = reranker.score_cache.stats()
+        
         route_quality_value = None
         if "has_spelling_errors" in chain_result:
             has_errors = chain_result.get("has_spelling_errors", False)
             route_quality_value = "mal_redactada" if has_errors else "simple"
-
+        
         output = PipelineOutput(
             question=chain_result["original_question"],
             generated_answer=chain_result["generated_answer"],
             retrieved_context=[doc.page_content for doc in retrieved_docs],
             route_quality=route_quality_value,
-            route="simplified",
-            corrected_question=chain_result.get("question") if chain_result.get("has_spelling_errors") else None
+            route=chain_result.get("route", "simplified"),
+            corrected_question=chain_result.get("question") if chain_result.get("has_spelling_errors") else None,
+            metrics=metrics
         )
         
         return output
@@ -190,7 +331,35 @@ def create_dynamic_rag_pipeline(
     return final_chain | RunnableLambda(format_output)
 
 
-def invoke_dynamic_pipeline(chain: Runnable, question: str) -> PipelineOutput:
+def dynamic_pipeline_inputs(question: str, query_embedding: List[float] = None) -> Dict[str, Any]:
+    inputs = {"question": question}
+    if query_embedding is not None:
+        inputs["speculative_retrieval"] = {"question": question, "embedding": query_embedding}
+    return inputs
+
+
+def invoke_dynamic_pipeline(chain: Runnable, question: str, query_embedding: List[float] = None) -> PipelineOutput:
+    if not question:
+        return PipelineOutput(
+            question=question,
+            generated_answer="",
+            retrieved_context=[],
+            error="La pregunta no puede estar vacía."
+        )
+    
+    try:
+        result = chain.invoke(dynamic_pipeline_inputs(question, query_embedding))
+        return result
+    except Exception as e:
+        return PipelineOutput(
+            question=question,
+            generated_answer=f"Error en el pipeline: {str(e)}",
+            retrieved_context=[],
+            error=str(e)
+        )
+
+
+async def ainvoke_dynamic_pipeline(chain: Runnable, question: str, query_embedding: List[float] = None) -> PipelineOutput:
     if not question:
         return PipelineOutput(
             question=question,
@@ -200,7 +369,7 @@ def invoke_dynamic_pipeline(chain: Runnable, question: str) -> PipelineOutput:
         )
     
     try:
-        result = chain.invoke({"question": question})
+        result = await chain.ainvoke(dynamic_pipeline_inputs(question, query_embedding))
         return result
     except Exception as e:
         return PipelineOutput(
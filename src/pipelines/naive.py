@@ -3,9 +3,11 @@ from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 
 from ..io.vectordb import get_vector_store
+from ..io.lexical_index import load_lexical_index
 from ..io.llm import get_llm
 from ..steps.prompts import RAG_BASIC_PROMPT
 from ..steps.retrieval import docs_to_text
+from ..steps.hybrid import create_hybrid_retriever
 from ..types import PipelineInput, PipelineOutput
 
 
@@ -23,7 +25,11 @@ def create_naive_rag_pipeline(
     vector_store = get_vector_store(db_folder_name, embedding_model_name)
     llm = get_llm(model_name=llm_model_name, temperature=temperature)
     
-    retriever = vector_store.as_retriever(search_kwargs={"k": top_k})
+    lexical_index = load_lexical_index(db_folder_name)
+    if lexical_index is not None:
+        retriever = create_hybrid_retriever(vector_store, lexical_index, top_k)
+    else:
+        retriever = vector_store.as_retriever(search_kwargs={"k": top_k})
     rag_chain_from_docs = (RAG_BASIC_PROMPT | llm | StrOutputParser())
     
     chain = (
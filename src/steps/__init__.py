@@ -1,5 +1,5 @@
 from .retrieval import retrieve_documents, create_retrieval_chain, docs_to_text
-from .rerank import create_reranker, rerank_documents, LocalJinaReranker
+from .rerank import create_reranker, rerank_documents, LocalJinaReranker, RerankScoreCache
 from .routing import (
     create_quality_router,
     create_main_router,
@@ -12,6 +12,10 @@ from .synthesis import (
     create_step_back_branch_chain
 )
 from .self_query import create_self_query_retriever
+from .fast_path import ReferenceMatcher, create_fast_path_router
+from .spelling import SpellChecker, load_spell_checker
+from .context_expansion import expand_context, create_context_expander
+from .hybrid import HybridSearcher, create_hybrid_retriever, reciprocal_rank_fusion
 from .prompts import *
 
 __all__ = [
@@ -21,6 +25,7 @@ __all__ = [
     'create_reranker',
     'rerank_documents',
     'LocalJinaReranker',
+    'RerankScoreCache',
     'create_quality_router',
     'create_main_router',
     'create_decomposition_chain',
@@ -28,5 +33,14 @@ __all__ = [
     'create_rag_answer_chain',
     'create_complex_branch_chain',
     'create_step_back_branch_chain',
-    'create_self_query_retriever'  # Función principal del Self-Query
+    'create_self_query_retriever',  # Función principal del Self-Query
+    'ReferenceMatcher',
+    'create_fast_path_router',
+    'SpellChecker',
+    'load_spell_checker',
+    'expand_context',
+    'create_context_expander',
+    'HybridSearcher',
+    'create_hybrid_retriever',
+    'reciprocal_rank_fusion'
 ]
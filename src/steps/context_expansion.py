@@ -0,0 +1,143 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from ..config.settings import settings
+from ..io.parent_store import ParentStore
+
+
+EXPANSION_MODES = ("stitch", "parent", "none")
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parent_key(doc: Document) -> Optional[Tuple[str, int]]:
+    corpus = doc.metadata.get("corpus")
+    doc_index = doc.metadata.get("original_doc_index")
+    if corpus is None or doc_index is None:
+        return None
+    return corpus, int(doc_index)
+
+
+def locate_spans(parent_text: str, chunks: List[Document]) -> Optional[List[Tuple[int, int, Document]]]:
+    """Posición de cada chunk dentro del padre; los chunks del splitter son subcadenas exactas."""
+    spans = []
+    hint = 0
+    for chunk in sorted(chunks, key=lambda doc: doc.metadata.get("chunk_index", 0)):
+        start = parent_text.find(chunk.page_content, hint)
+        if start < 0:
+            start = parent_text.find(chunk.page_content)
+        if start < 0:
+            return None
+        spans.append((start, start + len(chunk.page_content), chunk))
+        hint = start + 1
+    return spans
+
+
+def merge_spans(spans: List[Tuple[int, int, Document]]) -> List[Tuple[int, int, List[Document]]]:
+    """Une los tramos que se solapan (el `chunk_overlap`) o se tocan."""
+    merged = []
+    for start, end, chunk in sorted(spans, key=lambda span: span[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end), merged[-1][2] + [chunk])
+        else:
+            merged.append((start, end, [chunk]))
+    return merged
+
+
+def expanded_document(
+    text: str,
+    chunks: List[Document],
+    expansion: str,
+    parent_metadata: Optional[Dict[str, Any]] = None
+) -> Document:
+    # Los metadatos del padre que no viajan en cada chunk (enlace, total de chunks) se añaden aquí
+    return Document(page_content=text, metadata={
+        **(parent_metadata or {}),
+        **chunks[0].metadata,
+        "chunk_size": len(text),
+        "chunk_indices": [chunk.metadata.get("chunk_index") for chunk in chunks],
+        "expansion": expansion
+    })
+
+
+def expand_context(
+    documents: List[Document],
+    parent_store: ParentStore,
+    mode: str = "stitch",
+    token_budget: int = None
+) -> Tuple[List[Document], Dict[str, Any]]:
+    """
+    Reconstruye el contexto a partir de los chunks re-rankeados.
+    
+    `stitch` agrupa los chunks del mismo documento padre y une los contiguos sin repetir el
+    solapamiento. `parent` además sustituye cada grupo por el documento padre completo
+    mientras el total estimado no supere `token_budget`, en el orden del re-ranking. Los
+    chunks sin padre disponible se mantienen tal cual, en su posición.
+    """
+    token_budget = token_budget or settings.CONTEXT_TOKEN_BUDGET
+    chars_before = sum(len(doc.page_content) for doc in documents)
+    stats = {"mode": mode, "chunks": len(documents), "parents": 0}
+    
+    if mode == "none" or not documents:
+        return documents, {**stats, "documents": len(documents), "chars_before": chars_before, "chars_after": chars_before}
+    
+    groups: Dict[Any, List[Document]] = {}
+    for position, doc in enumerate(documents):
+        groups.setdefault(parent_key(doc) or ("", position), []).append(doc)
+    
+    expanded_groups = []
+    for key, chunks in groups.items():
+        parent_text = parent_store.get(*key) if key[0] else None
+        spans = locate_spans(parent_text, chunks) if parent_text else None
+        if spans is None:
+            expanded_groups.append((key, chunks, None))
+            continue
+        parent_metadata = parent_store.metadata(*key)
+        stitched = [
+            expanded_document(parent_text[start:end], span_chunks, "stitch", parent_metadata)
+            for start, end, span_chunks in merge_spans(spans)
+        ]
+        expanded_groups.append((key, stitched, parent_text))
+    
+    # El presupuesto se reparte en el orden del re-ranking (el de la primera aparición de cada padre)
+    tokens_used = sum(estimate_tokens(doc.page_content) for _, docs, _ in expanded_groups for doc in docs)
+    expanded = []
+    for key, docs, parent_text in expanded_groups:
+        covers_parent = len(docs) == 1 and docs[0].page_content == parent_text
+        if mode == "parent" and parent_text is not None and not covers_parent:
+            extra_tokens = estimate_tokens(parent_text) - sum(estimate_tokens(doc.page_content) for doc in docs)
+            if tokens_used + extra_tokens <= token_budget:
+                expanded.append(expanded_document(parent_text, groups[key], "parent", parent_store.metadata(*key)))
+                tokens_used += extra_tokens
+                stats["parents"] += 1
+                continue
+        expanded.extend(docs)
+    
+    chars_after = sum(len(doc.page_content) for doc in expanded)
+    return expanded, {**stats, "documents": len(expanded), "chars_before": chars_before, "chars_after": chars_after}
+
+
+def create_context_expander(parent_store: ParentStore, mode: str = None, token_budget: int = None) -> RunnableLambda:
+    mode = mode or settings.CONTEXT_EXPANSION_MODE
+    if mode not in EXPANSION_MODES:
+        raise ValueError(f"Modo de expansión de contexto no soportado: {mode}. Use {', '.join(EXPANSION_MODES)}")
+    
+    def expand_step(inputs: Dict[str, Any]) -> List[Document]:
+        documents = inputs.get("retrieved_docs", [])
+        start = time.perf_counter()
+        try:
+            expanded, stats = expand_context(documents, parent_store, mode, token_budget)
+        except Exception:
+            return documents
+        metrics = inputs.get("metrics")
+        if metrics is not None:
+            metrics["context_expansion"] = {**stats, "ms": round((time.perf_counter() - start) * 1000, 3)}
+        return expanded
+    
+    return RunnableLambda(expand_step)
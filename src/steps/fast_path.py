@@ -0,0 +1,209 @@
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from ..io.catalog import MetadataCatalog
+from ..io.chunk_records import get_chunks
+from ..text import normalize_text
+from ..config.settings import settings
+from .self_query import CATEGORY_METADATA, build_chromadb_filter, embed_question, search_by_vector
+
+
+LEGAL_REFERENCE_KINDS = [
+    ("decreto legislativo", r"decreto legislativo|d\.\s*leg\.?"),
+    ("decreto supremo", r"decreto supremo|d\.\s*s\."),
+    ("decreto ley", r"decreto ley|decreto-ley"),
+    ("resolucion ministerial", r"resolucion ministerial|r\.\s*m\."),
+    ("casacion laboral", r"casacion laboral"),
+    ("ley", r"ley"),
+]
+
+LEGAL_REFERENCE_PATTERN = re.compile(
+    r"(?<![\w.])(" + "|".join(f"(?P<kind{i}>{pattern})" for i, (_, pattern) in enumerate(LEGAL_REFERENCE_KINDS)) + r")"
+    r"\s*(?P<number>\d+(?:-\d+)*(?:-[a-z]+)?)\b"
+)
+ARTICLE_PATTERN = re.compile(r"\bart(?:iculo|\.)?\s*(\d{1,3})\b")
+FAQ_PATTERN = re.compile(r"\bpreguntas? frecuentes?\b")
+FAQ_TITLE_PATTERN = re.compile(r"^pregunta frecuente - ([ivxlc]+): (.+)$")
+FAQ_NUMERAL_PATTERN = re.compile(r"\bpreguntas? frecuentes?\s*(?:-|n)?\s*([ivxlc]+)\b")
+OTHER_DOCUMENT_PATTERN = re.compile(r"\b(?:ley|decreto|reglamento|codigo|convenio|resolucion|casacion|lpcl|tuo)\b")
+CONSTITUTION_PATTERN = re.compile(r"\bconstitucion\b")
+
+
+def normalize_reference_number(number: str) -> str:
+    parts = []
+    for part in number.split("-"):
+        parts.append(str(int(part)) if part.isdigit() else part)
+    return "-".join(parts)
+
+
+def find_legal_references(normalized_text: str) -> List[Tuple[str, str]]:
+    references = []
+    
+    for match in LEGAL_REFERENCE_PATTERN.finditer(normalized_text):
+        kind = next(
+            name for i, (name, _) in enumerate(LEGAL_REFERENCE_KINDS)
+            if match.group(f"kind{i}") is not None
+        )
+        references.append((kind, normalize_reference_number(match.group("number"))))
+    
+    return references
+
+
+class ReferenceMatcher:
+    """
+    Reconoce referencias explícitas (artículo, norma o sección de preguntas frecuentes)
+    y las resuelve contra los metadatos indexados sin invocar al LLM.
+    """
+    
+    def __init__(self, catalog: MetadataCatalog):
+        self.catalog = catalog
+        self.titles_by_reference: Dict[Tuple[str, str], List[str]] = {}
+        self.faq_titles_by_numeral: Dict[str, str] = {}
+        self.faq_section_patterns: List[Tuple[re.Pattern, str]] = []
+        self.category_by_source = {
+            metadata["source"]: category
+            for category, metadata in CATEGORY_METADATA.items()
+            if metadata
+        }
+        
+        for title in catalog.values("title"):
+            if not isinstance(title, str):
+                continue
+            normalized_title = normalize_text(title)
+            
+            faq_match = FAQ_TITLE_PATTERN.match(normalized_title)
+            if faq_match:
+                self.faq_titles_by_numeral[faq_match.group(1)] = title
+                self.faq_section_patterns.append(
+                    (re.compile(rf"\b{re.escape(faq_match.group(2))}\b"), title)
+                )
+                continue
+            
+            for reference in set(find_legal_references(normalized_title)):
+                self.titles_by_reference.setdefault(reference, []).append(title)
+    
+    def category_for(self, filters: Dict[str, Any]) -> str:
+        for source, category in self.category_by_source.items():
+            if self.catalog.count({**filters, "source": source}) > 0:
+                return category
+        return "general"
+    
+    def build_match(self, reference: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        matches = self.catalog.count(filters)
+        if matches == 0:
+            return None
+        
+        return {
+            "reference": reference,
+            "filters": filters,
+            "category": self.category_for(filters),
+            "matches": matches
+        }
+    
+    def match(self, question: str) -> Optional[Dict[str, Any]]:
+        normalized_question = normalize_text(question)
+        
+        legal_references = set(find_legal_references(normalized_question))
+        if legal_references:
+            titles = {
+                title
+                for reference in legal_references
+                for title in self.titles_by_reference.get(reference, [])
+            }
+            if len(legal_references) == 1 and len(titles) == 1:
+                title = titles.pop()
+                return self.build_match(title, {"title": title})
+            return None
+        
+        if FAQ_PATTERN.search(normalized_question):
+            numeral_match = FAQ_NUMERAL_PATTERN.search(normalized_question)
+            if numeral_match and numeral_match.group(1) in self.faq_titles_by_numeral:
+                title = self.faq_titles_by_numeral[numeral_match.group(1)]
+                return self.build_match(title, {"title": title})
+            
+            sections = [
+                title for pattern, title in self.faq_section_patterns
+                if pattern.search(normalized_question)
+            ]
+            if len(sections) == 1:
+                return self.build_match(sections[0], {"title": sections[0]})
+            return None
+        
+        article_numbers = {int(number) for number in ARTICLE_PATTERN.findall(normalized_question)}
+        if len(article_numbers) != 1:
+            return None
+        
+        mentions_constitution = CONSTITUTION_PATTERN.search(normalized_question) is not None
+        if not mentions_constitution and OTHER_DOCUMENT_PATTERN.search(normalized_question):
+            return None
+        
+        article_number = article_numbers.pop()
+        filters = {"article_number": article_number}
+        if mentions_constitution:
+            filters["source"] = CATEGORY_METADATA["constitucion"]["source"]
+        
+        return self.build_match(f"Artículo {article_number}", filters)
+
+
+def lookup_by_metadata(vectorstore, filters: Dict[str, Any]) -> List[Document]:
+    chunks = get_chunks(vectorstore, build_chromadb_filter(filters))
+    
+    order = sorted(
+        range(len(chunks)),
+        key=lambda index: (chunks[index].metadata.get("original_doc_index", 0), chunks[index].metadata.get("chunk_index", 0))
+    )
+    
+    return chunks.to_documents(order)
+
+
+def create_fast_path_router(
+    vectorstore,
+    catalog: Optional[MetadataCatalog],
+    top_k: int = 15,
+    max_chunks: int = None
+) -> RunnableLambda:
+    matcher = ReferenceMatcher(catalog) if catalog is not None else None
+    max_chunks = max_chunks or settings.FAST_PATH_MAX_CHUNKS
+    
+    def fast_path_step(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if matcher is None:
+            return inputs
+        
+        question = inputs.get("question", "")
+        metrics = inputs.get("metrics")
+        if metrics is None:
+            metrics = {}
+        
+        try:
+            reference_match = matcher.match(question)
+            if reference_match is None:
+                return inputs
+            
+            if reference_match["matches"] <= max_chunks:
+                docs = lookup_by_metadata(vectorstore, reference_match["filters"])
+            else:
+                query_embedding = embed_question(vectorstore, question, metrics)
+                docs = search_by_vector(vectorstore, query_embedding, top_k, reference_match["filters"], metrics)
+            
+            if not docs:
+                return inputs
+            
+            metrics["fast_path"] = {
+                "reference": reference_match["reference"],
+                "filters": reference_match["filters"],
+                "chunks": len(docs)
+            }
+            
+            return {
+                **inputs,
+                "route": "fast_path",
+                "semantic_category": reference_match["category"],
+                "fast_path_docs": docs
+            }
+            
+        except Exception:
+            return inputs
+    
+    return RunnableLambda(fast_path_step)
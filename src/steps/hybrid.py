@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from ..config.settings import settings
+from ..io.chunk_records import ChunkBatch, query_chunks
+from ..io.lexical_index import LexicalIndex
+
+
+# La búsqueda léxica corre en este pool mientras la densa ocupa el hilo de la petición
+LEXICAL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = None) -> List[Tuple[str, float]]:
+    """RRF: cada id suma 1 / (k + posición) en cada ranking donde aparece; empates en orden de aparición."""
+    k = k or settings.RRF_K
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class HybridSearcher:
+    """
+    Adaptador de la base vectorial para una pregunta: `query_chunks` lanza la búsqueda
+    BM25 y la densa a la vez con el mismo filtro `where` y devuelve su fusión RRF.
+    
+    Se pasa en lugar de la base vectorial a las funciones de recuperación (cascada,
+    sobre-recuperación, búsqueda especulativa), así todas las estrategias son híbridas.
+    """
+    
+    def __init__(
+        self,
+        vectorstore,
+        lexical_index: LexicalIndex,
+        question: str,
+        metrics: Optional[Dict[str, Any]] = None
+    ):
+        self.vectorstore = vectorstore
+        self.lexical_index = lexical_index
+        self.question = question
+        self.metrics = metrics
+    
+    @property
+    def embeddings(self):
+        return self.vectorstore.embeddings
+    
+    def timed_lexical_search(self, k: int, where: Optional[dict]) -> Tuple[List[str], float]:
+        start = time.perf_counter()
+        ids, _ = self.lexical_index.search(self.question, k, where)
+        return ids, (time.perf_counter() - start) * 1000
+    
+    def query_chunks(self, query_embedding: List[float], k: int, where: Optional[dict] = None) -> ChunkBatch:
+        lexical_future = LEXICAL_EXECUTOR.submit(self.timed_lexical_search, k, where)
+        dense = query_chunks(self.vectorstore, query_embedding, k, where)
+        lexical_ids, lexical_ms = lexical_future.result()
+        
+        fused_ids = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([list(dense.ids), lexical_ids])[:k]]
+        rows = {chunk_id: row for row, chunk_id in enumerate(dense.ids)}
+        missing = [chunk_id for chunk_id in fused_ids if chunk_id not in rows]
+        
+        texts, metadatas = {}, {}
+        if missing:
+            fetched = self.vectorstore.get(ids=missing, include=["documents", "metadatas"])
+            texts = dict(zip(fetched["ids"], fetched["documents"]))
+            metadatas = dict(zip(fetched["ids"], fetched["metadatas"]))
+            # Un id del índice léxico que ya no está en la BD (índice desactualizado) se descarta
+            fused_ids = [chunk_id for chunk_id in fused_ids if chunk_id in rows or chunk_id in texts]
+        
+        if self.metrics is not None:
+            hybrid = self.metrics.setdefault("hybrid", {"lexical_queries": 0, "lexical_ms": 0.0, "lexical_only": 0})
+            hybrid["lexical_queries"] += 1
+            hybrid["lexical_ms"] = round(hybrid["lexical_ms"] + lexical_ms, 3)
+            hybrid["lexical_only"] += len(missing)
+        
+        return ChunkBatch(
+            fused_ids,
+            [dense.texts[rows[chunk_id]] if chunk_id in rows else texts[chunk_id] for chunk_id in fused_ids],
+            [dense.metadatas[rows[chunk_id]] if chunk_id in rows else metadatas[chunk_id] for chunk_id in fused_ids]
+        )
+
+
+def hybrid_searcher(vectorstore, lexical_index: Optional[LexicalIndex], question: str, metrics=None):
+    """La base vectorial tal cual si no hay índice léxico; si no, un `HybridSearcher` para la pregunta."""
+    if lexical_index is None or not len(lexical_index):
+        return vectorstore
+    return HybridSearcher(vectorstore, lexical_index, question, metrics)
+
+
+def create_hybrid_retriever(vectorstore, lexical_index: LexicalIndex, top_k: int = 5) -> RunnableLambda:
+    """Sustituto de `vectorstore.as_retriever` con búsqueda híbrida (pregunta → documentos)."""
+    def hybrid_retrieve(question: str) -> List[Document]:
+        searcher = HybridSearcher(vectorstore, lexical_index, question)
+        return searcher.query_chunks(vectorstore.embeddings.embed_query(question), top_k).to_documents()
+    
+    return RunnableLambda(hybrid_retrieve)
@@ -1,27 +1,224 @@
+import hashlib
+import threading
+import time
 import torch
 import warnings
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from langchain_core.documents import Document
 from sentence_transformers import CrossEncoder
 
 from ..types import RerankResult
 from ..config.settings import settings
+from ..io.answer_cache import normalize_question
+from ..io.micro_batcher import MicroBatcher
+from ..io.quantized_models import quantized_model_kwargs, use_quantized_backend
+from ..io.rerank_tokens import RerankTokenCache
 
 warnings.filterwarnings("ignore", message="flash_attn is not installed")
 
 
+def rerank_query_hash(model_name: str, query: str) -> str:
+    return hashlib.sha256(f"{model_name}\x00{normalize_question(query)}".encode("utf-8")).hexdigest()
+
+
+def rerank_chunk_key(document: Document) -> str:
+    """Id estable del chunk; los documentos sin id (PDF crudos) se identifican por su texto."""
+    chunk_id = document.id or document.metadata.get("chunk_id")
+    if chunk_id:
+        return chunk_id
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+
+class RerankScoreCache:
+    """
+    LRU acotado de puntuaciones del cross-encoder por (hash de la pregunta normalizada, chunk_id).
+    
+    Guarda también el coste medio por par medido en el modelo, con el que se estiman
+    los milisegundos ahorrados por cada acierto.
+    """
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.RERANK_CACHE_MAX_ENTRIES
+        self.scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.scored_pairs = 0
+        self.scoring_ms = 0.0
+    
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                score = self.scores.get(key)
+                if score is not None:
+                    self.scores.move_to_end(key)
+                    found[key] = score
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, scores: Dict[Tuple[str, str], float], elapsed_ms: float) -> None:
+        with self.lock:
+            for key, score in scores.items():
+                self.scores[key] = score
+                self.scores.move_to_end(key)
+            while len(self.scores) > self.max_entries:
+                self.scores.popitem(last=False)
+            self.scored_pairs += len(scores)
+            self.scoring_ms += elapsed_ms
+    
+    def ms_per_pair(self) -> float:
+        return self.scoring_ms / self.scored_pairs if self.scored_pairs else 0.0
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.scores.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.scores),
+            "ms_per_pair": round(self.ms_per_pair(), 3)
+        }
+
+
+def truncate_longest_first(query_ids: List[int], chunk_ids: List[int], budget: int) -> Tuple[List[int], List[int]]:
+    """
+    Igual que `truncation="longest_first"` de los tokenizadores rápidos (los que carga
+    `CrossEncoder`): la secuencia corta se conserva si cabe y la larga se recorta al resto;
+    si no, cada una se queda con la mitad de `budget` (la larga, con el token impar).
+    """
+    if len(query_ids) + len(chunk_ids) <= budget:
+        return query_ids, chunk_ids
+    swap = len(query_ids) > len(chunk_ids)
+    short_length, long_length = sorted((len(query_ids), len(chunk_ids)))
+    long_length = short_length if short_length > budget else max(short_length, budget - short_length)
+    if short_length + long_length > budget:
+        short_length = budget // 2
+        long_length = short_length + budget % 2
+    query_length, chunk_length = (long_length, short_length) if swap else (short_length, long_length)
+    return query_ids[:query_length], chunk_ids[:chunk_length]
+
+
 class LocalJinaReranker:
-    def __init__(self, model_name: str = None, top_n: int = None):
+    def __init__(
+        self,
+        model_name: str = None,
+        top_n: int = None,
+        score_cache: Optional[RerankScoreCache] = None,
+        token_cache: Optional[RerankTokenCache] = None
+    ):
         self.model_name = model_name or settings.RERANKER_MODEL
         self.top_n = top_n or settings.RERANKER_TOP_N
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.score_cache = score_cache
+        self.token_cache = token_cache
+        
+        if use_quantized_backend():
+            self.device = "cpu"
+            self.model = CrossEncoder(**quantized_model_kwargs(CrossEncoder, self.model_name, trust_remote_code=True))
+        else:
+            self.model = CrossEncoder(
+                self.model_name,
+                model_kwargs={"torch_dtype": "auto"},
+                trust_remote_code=True,
+                device=self.device
+            )
+        # Los pares de peticiones concurrentes comparten una pasada del modelo
+        self.batcher = MicroBatcher(
+            self.predict_batch, sort_key=lambda pair: len(pair[0]) + len(pair[1]), name="rerank-batcher"
+        ) if settings.ENABLE_MICRO_BATCHING else None
+    
+    def predict_batch(self, pairs: List[tuple]) -> List[float]:
+        """
+        Puntúa pares (pregunta, texto) o (pregunta, texto, chunk_id). Los chunks con tokens
+        pre-calculados al indexar solo tokenizan la pregunta; el resto pasa por `predict`.
+        """
+        scores: List[Optional[float]] = [None] * len(pairs)
+        pretokenized = {}
+        if self.token_cache is not None:
+            for row, pair in enumerate(pairs):
+                chunk_tokens = self.token_cache.get(pair[2], pair[1]) if len(pair) > 2 else None
+                if chunk_tokens is not None:
+                    pretokenized[row] = chunk_tokens
+        
+        if pretokenized:
+            tokenized_scores = self.predict_tokenized([pairs[row][0] for row in pretokenized], list(pretokenized.values()))
+            for row, score in zip(pretokenized, tokenized_scores):
+                scores[row] = score
+        rest = [row for row in range(len(pairs)) if row not in pretokenized]
+        if rest:
+            for row, score in zip(rest, self.model.predict([tuple(pairs[row][:2]) for row in rest])):
+                scores[row] = float(score)
+        return scores
+    
+    def predict_tokenized(self, queries: List[str], chunk_tokens: List[List[int]], batch_size: int = 32) -> List[float]:
+        """Arma las entradas del modelo con los tokens cacheados del chunk y los de la pregunta."""
+        tokenizer = self.model.tokenizer
+        max_length = getattr(self.model, "max_length", None) or tokenizer.model_max_length
+        budget = max_length - tokenizer.num_special_tokens_to_add(pair=True)
+        query_tokens = {query: tokenizer(query, add_special_tokens=False)["input_ids"] for query in set(queries)}
+        
+        features = []
+        for query, tokens in zip(queries, chunk_tokens):
+            query_ids, chunk_ids = truncate_longest_first(query_tokens[query], tokens, budget)
+            feature = {"input_ids": tokenizer.build_inputs_with_special_tokens(query_ids, chunk_ids)}
+            if "token_type_ids" in tokenizer.model_input_names:
+                feature["token_type_ids"] = tokenizer.create_token_type_ids_from_sequences(query_ids, chunk_ids)
+            features.append(feature)
         
-        self.model = CrossEncoder(
-            self.model_name,
-            model_kwargs={"torch_dtype": "auto"},
-            trust_remote_code=True,
-            device=self.device
+        # Misma activación que aplica `CrossEncoder.predict` (según la versión de sentence-transformers)
+        activation = (
+            getattr(self.model, "activation_fn", None)
+            or getattr(self.model, "default_activation_function", None)
+            or torch.nn.Identity()
         )
+        order = sorted(range(len(features)), key=lambda row: len(features[row]["input_ids"]))
+        scores = [0.0] * len(features)
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                rows = order[start:start + batch_size]
+                batch = tokenizer.pad([features[row] for row in rows], return_tensors="pt")
+                batch = {name: tensor.to(self.model.device) for name, tensor in batch.items()}
+                logits = activation(self.model.model(**batch).logits.float())
+                for row, score in zip(rows, logits.view(len(rows), -1)[:, 0].tolist()):
+                    scores[row] = score
+        return scores
+    
+    def predict(self, pairs: List[tuple]) -> List[float]:
+        if self.batcher is not None:
+            return self.batcher.call_many(pairs)
+        return self.predict_batch(pairs)
+    
+    def score(self, query: str, documents: List[Document]) -> Tuple[List[float], int, float]:
+        """Puntuación de cada documento; solo los pares sin caché pasan por el modelo."""
+        if self.score_cache is None:
+            pairs = [(query, doc.page_content, doc.id or doc.metadata.get("chunk_id")) for doc in documents]
+            return self.predict(pairs), 0, 0.0
+        
+        query_hash = rerank_query_hash(self.model_name, query)
+        keys = [(query_hash, rerank_chunk_key(doc)) for doc in documents]
+        cached = self.score_cache.get_many(keys)
+        saved_ms = len(cached) * self.score_cache.ms_per_pair()
+        
+        pending = {}
+        for key, doc in zip(keys, documents):
+            if key not in cached:
+                pending.setdefault(key, doc.page_content)
+        if pending:
+            start = time.perf_counter()
+            scores = self.predict([(query, text, key[1]) for key, text in pending.items()])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            fresh = {key: float(score) for key, score in zip(pending, scores)}
+            self.score_cache.put_many(fresh, elapsed_ms)
+            cached = {**cached, **fresh}
+        
+        return [cached[key] for key in keys], len(keys) - len(pending), saved_ms
     
     def rerank(self, query: str, documents: List[Document]) -> RerankResult:
         if not documents:
@@ -33,24 +230,19 @@ class LocalJinaReranker:
         
         original_count = len(documents)
         
-        doc_texts = [doc.page_content for doc in documents]
-        
-        rankings = self.model.rank(
-            query, 
-            doc_texts, 
-            return_documents=True, 
-            top_k=min(self.top_n, len(documents))
-        )
+        scores, cache_hits, saved_ms = self.score(query, documents)
         
-        reranked_docs = []
-        for ranking in rankings:
-            doc_index = ranking['corpus_id']
-            reranked_docs.append(documents[doc_index])
+        # Mismo orden que `CrossEncoder.rank`: puntuación descendente, empates por posición
+        order = sorted(range(len(documents)), key=lambda i: -scores[i])
+        reranked_docs = [documents[i] for i in order[:min(self.top_n, len(documents))]]
         
         return RerankResult(
             documents=reranked_docs,
             original_count=original_count,
-            final_count=len(reranked_docs)
+            final_count=len(reranked_docs),
+            cache_hits=cache_hits,
+            cache_misses=original_count - cache_hits,
+            saved_ms=round(saved_ms, 3)
         )
     
     def compress_documents(self, documents: List[Document], query: str) -> List[Document]:
@@ -58,8 +250,13 @@ class LocalJinaReranker:
         return result.documents
 
 
-def create_reranker(model_name: str = None, top_n: int = None) -> LocalJinaReranker:
-    return LocalJinaReranker(model_name=model_name, top_n=top_n)
+def create_reranker(
+    model_name: str = None,
+    top_n: int = None,
+    token_cache: Optional[RerankTokenCache] = None
+) -> LocalJinaReranker:
+    score_cache = RerankScoreCache() if settings.ENABLE_RERANK_CACHE else None
+    return LocalJinaReranker(model_name=model_name, top_n=top_n, score_cache=score_cache, token_cache=token_cache)
 
 
 def rerank_documents(query: str, documents: List[Document], reranker: LocalJinaReranker = None) -> RerankResult:
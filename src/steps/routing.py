@@ -1,6 +1,8 @@
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 from langchain_core.runnables import RunnableLambda
 
+from ..io.llm import invoke_llm, ainvoke_llm
 from ..types import QualityRouterOutput, MainRouterOutput, SubQuestionsOutput, StepBackOutput
 from ..steps.prompts import (
     QUALITY_ROUTER_SYSTEM_PROMPT,
@@ -10,41 +12,98 @@ from ..steps.prompts import (
 )
 
 
-def create_quality_router(llm):
+def quality_router_messages(question: str):
+    return [
+        ("system", QUALITY_ROUTER_SYSTEM_PROMPT),
+        ("human", f"Analiza esta pregunta: '{question}'")
+    ]
+
+
+def parse_quality_response(x: Dict[str, Any], raw_response) -> Dict[str, Any]:
+    import json
+    result_dict = json.loads(raw_response.content.strip())
+    has_errors = result_dict.get("has_spelling_errors", False)
+    corrected_question = result_dict.get("corrected_question", None)
+    
+    final_question = corrected_question if (has_errors and corrected_question) else x['question']
+    
+    return {
+        **x, 
+        "question": final_question,
+        "original_question": x['question'],
+        "has_spelling_errors": has_errors
+    }
+
+
+def create_quality_router(llm, spell_checker=None):
+    def unchanged_question(x: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **x, 
+            "question": x['question'],
+            "original_question": x['question'],
+            "has_spelling_errors": False
+        }
+    
+    def local_spell_check(x: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resuelve la pregunta con el vocabulario del corpus; None si hace falta el LLM."""
+        if spell_checker is None:
+            return None
+        
+        start = time.perf_counter()
+        try:
+            result = spell_checker.check(x['question'])
+        except Exception:
+            return None
+        
+        skip_rate = spell_checker.record(skipped_llm=not result["needs_llm"])
+        if x.get("metrics") is not None:
+            x["metrics"]["spell_check"] = {
+                "decision": "llm" if result["needs_llm"] else ("local_correction" if result["corrections"] else "clean"),
+                "oov_tokens": result["oov_tokens"],
+                "corrections": result["corrections"],
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                "llm_skip_rate": round(skip_rate, 4)
+            }
+        
+        if result["needs_llm"]:
+            return None
+        
+        return {
+            **x,
+            "question": result["corrected_question"],
+            "original_question": x['question'],
+            "has_spelling_errors": bool(result["corrections"])
+        }
+    
     def quality_router_step(x: Dict[str, Any]) -> Dict[str, Any]:
+        local_result = local_spell_check(x)
+        if local_result is not None:
+            return local_result
+        
         try:
-            raw_response = llm.invoke([
-                ("system", QUALITY_ROUTER_SYSTEM_PROMPT),
-                ("human", f"Analiza esta pregunta: '{x['question']}'")
-            ])
+            raw_response = invoke_llm(
+                llm, quality_router_messages(x['question']), x.get("metrics"), stage="quality_router"
+            )
+            return parse_quality_response(x, raw_response)
             
-            import json
-            try:
-                result_dict = json.loads(raw_response.content.strip())
-                has_errors = result_dict.get("has_spelling_errors", False)
-                corrected_question = result_dict.get("corrected_question", None)
-                
-                final_question = corrected_question if (has_errors and corrected_question) else x['question']
-                
-                return {
-                    **x, 
-                    "question": final_question,
-                    "original_question": x['question'],
-                    "has_spelling_errors": has_errors
-                }
-                
-            except json.JSONDecodeError as json_error:
-                raise json_error
+        except Exception:
+            return unchanged_question(x)
+    
+    async def aquality_router_step(x: Dict[str, Any]) -> Dict[str, Any]:
+        local_result = local_spell_check(x)
+        if local_result is not None:
+            return local_result
+        
+        try:
+            raw_response = await ainvoke_llm(
+                llm, quality_router_messages(x['question']), x.get("metrics"), stage="quality_router"
+            )
+            return parse_quality_response(x, raw_response)
             
         except Exception:
-            return {
-                **x, 
-                "question": x['question'],
-                "original_question": x['question'],
-                "has_spelling_errors": False
-            }
+            return unchanged_question(x)
     
-    return RunnableLambda(quality_router_step)
+    return RunnableLambda(quality_router_step, afunc=aquality_router_step)
 
 
 def create_main_router(llm):
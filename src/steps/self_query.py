@@ -1,10 +1,19 @@
+import time
+import numpy as np
 from typing import Dict, Any, List, Optional, Tuple
 from langchain_core.documents import Document
 from langchain_core.runnables import RunnableLambda
 from langchain_core.prompts import PromptTemplate
 
-from ..types import SemanticRouterOutput, ExtractedFilters, StructuredRetrievalInput
-from ..io.llm import get_llm
+from ..types import SemanticRouterOutput, ExtractedFilters, FusedRouterOutput, StructuredRetrievalInput
+from ..io.llm import get_llm, invoke_llm, ainvoke_llm
+from ..io.catalog import MetadataCatalog
+from ..io.chunk_records import ChunkBatch, query_chunks
+from ..io.lexical_index import LexicalIndex
+from ..io.vector_shards import bind_request_metrics
+from ..config.settings import settings
+from ..steps.prompts import FUSED_ROUTER_SYSTEM_PROMPT
+from .hybrid import hybrid_searcher
 
 
 FILTER_PRIORITIES = {
@@ -23,13 +32,35 @@ VALID_VALUES = {
     }
 }
 
+CATEGORY_METADATA = {
+    "constitucion": {
+        "source": "Constitución Política del Perú",
+        "document_type": "constitucion", 
+        "topic": "derechos_fundamentales"
+    },
+    "derecho_laboral": {
+        "source": "Compendio Derecho Laboral",
+        "document_type": "decreto",
+        "topic": "derecho_laboral"
+    },
+    "faq": {
+        "source": "Preguntas Frecuentes", 
+        "document_type": "faq",
+        "topic": "Preguntas Frecuentes"
+    },
+    "general": {}
+}
+
 GENERIC_VALUES = {
     "title": ["Constitución", "Constitución Política", "Decreto", "Decreto Legislativo", "FAQ", "Pregunta"],
     "source": ["Constitución", "Ley", "Decreto", "FAQ"]
 }
 
 
-def validate_and_normalize_filters(filters: ExtractedFilters) -> Tuple[Dict[str, Any], List[str]]:
+def validate_and_normalize_filters(
+    filters: ExtractedFilters,
+    catalog: Optional[MetadataCatalog] = None
+) -> Tuple[Dict[str, Any], List[str]]:
     filter_dict = filters.dict() if hasattr(filters, 'dict') else filters
     validated_filters = {}
     discarded_filters = []
@@ -42,7 +73,13 @@ def validate_and_normalize_filters(filters: ExtractedFilters) -> Tuple[Dict[str,
         if field in filter_dict and filter_dict[field] is not None:
             value = filter_dict[field]
             
-            if field in VALID_VALUES and value not in VALID_VALUES[field]:
+            if catalog is not None:
+                canonical = catalog.canonical_value(field, value)
+                if canonical is None:
+                    discarded_filters.append(f"{field}: {value} (valor inválido)")
+                else:
+                    validated_filters[field] = canonical
+            elif field in VALID_VALUES and value not in VALID_VALUES[field]:
                 discarded_filters.append(f"{field}: {value} (valor inválido)")
             else:
                 validated_filters[field] = value
@@ -56,6 +93,20 @@ def validate_and_normalize_filters(filters: ExtractedFilters) -> Tuple[Dict[str,
                     discarded_filters.append(f"{field}: {value} (genérico)")
                     continue
                 
+                if catalog is not None:
+                    canonical = catalog.canonical_value(field, value)
+                    if canonical is None:
+                        discarded_filters.append(f"{field}: {value} (no existe en el corpus)")
+                        continue
+                    
+                    doc_type = validated_filters.get("document_type")
+                    if doc_type and catalog.count({"document_type": doc_type, "title": canonical}) == 0:
+                        discarded_filters.append(f"{field}: {value} (no coincide con {doc_type})")
+                        continue
+                    
+                    validated_filters[field] = canonical
+                    continue
+                
                 if "document_type" in validated_filters:
                     doc_type = validated_filters["document_type"]
                     if doc_type in VALID_VALUES["title"] and value not in VALID_VALUES["title"][doc_type]:
@@ -65,13 +116,23 @@ def validate_and_normalize_filters(filters: ExtractedFilters) -> Tuple[Dict[str,
                 validated_filters[field] = value
                 
             elif field == "article_number":
-                if isinstance(value, int) and 1 <= value <= 206:
+                if catalog is not None:
+                    is_valid = isinstance(value, int) and catalog.count({field: value}) > 0
+                else:
+                    is_valid = isinstance(value, int) and 1 <= value <= 206
+                
+                if is_valid:
                     validated_filters[field] = value
                 else:
                     discarded_filters.append(f"{field}: {value} (número inválido)")
                     
             elif field == "year":
-                if isinstance(value, int) and 1990 <= value <= 2024:
+                if catalog is not None:
+                    is_valid = isinstance(value, int) and catalog.count({field: value}) > 0
+                else:
+                    is_valid = isinstance(value, int) and 1990 <= value <= 2024
+                
+                if is_valid:
                     validated_filters[field] = value
                 else:
                     discarded_filters.append(f"{field}: {value} (año inválido)")
@@ -79,29 +140,14 @@ def validate_and_normalize_filters(filters: ExtractedFilters) -> Tuple[Dict[str,
     return validated_filters, discarded_filters
 
 
-def create_filter_strategies(validated_filters: Dict[str, Any], semantic_category: str) -> List[Dict[str, Any]]:
+def create_filter_strategies(
+    validated_filters: Dict[str, Any],
+    semantic_category: str,
+    catalog: Optional[MetadataCatalog] = None
+) -> List[Dict[str, Any]]:
     strategies = []
     
-    fixed_metadata = {
-        "constitucion": {
-            "source": "Constitución Política del Perú",
-            "document_type": "constitucion", 
-            "topic": "derechos_fundamentales"
-        },
-        "derecho_laboral": {
-            "source": "Compendio Derecho Laboral",
-            "document_type": "decreto",
-            "topic": "derecho_laboral"
-        },
-        "faq": {
-            "source": "Preguntas Frecuentes", 
-            "document_type": "faq",
-            "topic": "Preguntas Frecuentes"
-        },
-        "general": {}
-    }
-    
-    fixed_filters = fixed_metadata.get(semantic_category, {})
+    fixed_filters = CATEGORY_METADATA.get(semantic_category, {})
     
     has_variables = any(value is not None for value in validated_filters.values())
     
@@ -177,9 +223,23 @@ def create_filter_strategies(validated_filters: Dict[str, Any], semantic_categor
         "description": "Búsqueda semántica pura en toda la BD"
     })
     
+    if catalog is not None:
+        for strategy in strategies:
+            strategy["matches"] = catalog.count(strategy["filters"])
+    
     return strategies
 
 
+def parse_llm_json(response):
+    import json
+    response_text = response.content if hasattr(response, 'content') else str(response)
+    
+    try:
+        return json.loads(response_text.strip())
+    except json.JSONDecodeError:
+        return response_text.strip()
+
+
 def clean_semantic_response(json_data: dict) -> dict:
     if isinstance(json_data, str):
         import re
@@ -262,41 +322,51 @@ Clasifica esta pregunta determinando:
 3. El razonamiento detrás de tu decisión
 """)
     
+    def build_semantic_result(inputs: Dict[str, Any], response) -> Dict[str, Any]:
+        cleaned_json_data = clean_semantic_response(parse_llm_json(response))
+        
+        category = cleaned_json_data.get('category', 'general')
+        confidence = cleaned_json_data.get('confidence', 0.5)
+        reasoning = cleaned_json_data.get('reasoning', 'JSON parsing')
+        
+        return {
+            **inputs,
+            "semantic_category": category,
+            "semantic_confidence": confidence,
+            "semantic_reasoning": reasoning
+        }
+    
+    def semantic_fallback(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **inputs,
+            "semantic_category": "general",
+            "semantic_confidence": 0.5,
+            "semantic_reasoning": "Error en clasificación"
+        }
+    
     def debug_semantic_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
         question = inputs.get("question", "")
         
         try:
-            response = llm.invoke(semantic_router_prompt.format(question=question))
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            import json
-            try:
-                json_data = json.loads(response_text.strip())
-            except json.JSONDecodeError:
-                json_data = response_text.strip()
-            
-            cleaned_json_data = clean_semantic_response(json_data)
-
-            category = cleaned_json_data.get('category', 'general')
-            confidence = cleaned_json_data.get('confidence', 0.5)
-            reasoning = cleaned_json_data.get('reasoning', 'JSON parsing')
-            
-            return {
-                **inputs,
-                "semantic_category": category,
-                "semantic_confidence": confidence,
-                "semantic_reasoning": reasoning
-            }
-            
+            response = invoke_llm(
+                llm, semantic_router_prompt.format(question=question), inputs.get("metrics"), stage="semantic_router"
+            )
+            return build_semantic_result(inputs, response)
         except Exception:
-            return {
-                **inputs,
-                "semantic_category": "general",
-                "semantic_confidence": 0.5,
-                "semantic_reasoning": "Error en clasificación"
-            }
+            return semantic_fallback(inputs)
     
-    return RunnableLambda(debug_semantic_router)
+    async def adebug_semantic_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        question = inputs.get("question", "")
+        
+        try:
+            response = await ainvoke_llm(
+                llm, semantic_router_prompt.format(question=question), inputs.get("metrics"), stage="semantic_router"
+            )
+            return build_semantic_result(inputs, response)
+        except Exception:
+            return semantic_fallback(inputs)
+    
+    return RunnableLambda(debug_semantic_router, afunc=adebug_semantic_router)
 
 
 def create_filter_extractor(llm) -> RunnableLambda:
@@ -346,53 +416,133 @@ Pregunta: {question}
 Extrae SOLO los metadatos variables mencionados:
 """)
     
+    def build_filter_result(inputs: Dict[str, Any], response) -> Dict[str, Any]:
+        cleaned_data = clean_json_response(parse_llm_json(response))
+        
+        filters = ExtractedFilters(
+            article_number=cleaned_data.get('article_number'),
+            title=cleaned_data.get('title'),
+            year=cleaned_data.get('year'),
+            source=cleaned_data.get('source'),
+            document_type=cleaned_data.get('document_type'),
+            topic=cleaned_data.get('topic')
+        )
+        
+        return {
+            **inputs,
+            "extracted_filters": filters
+        }
+    
     def debug_filter_extractor(inputs: Dict[str, Any]) -> Dict[str, Any]:
         question = inputs.get("question", "")
         
         try:
-            response = llm.invoke(filter_extractor_prompt.format(question=question))
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            
-            import json
-            try:
-                json_data = json.loads(response_text.strip())
-            except json.JSONDecodeError:
-                json_data = response_text.strip()
-            
-            cleaned_data = clean_json_response(json_data)
-            
-            filters = ExtractedFilters(
-                article_number=cleaned_data.get('article_number'),
-                title=cleaned_data.get('title'),
-                year=cleaned_data.get('year'),
-                source=cleaned_data.get('source'),
-                document_type=cleaned_data.get('document_type'),
-                topic=cleaned_data.get('topic')
+            response = invoke_llm(
+                llm, filter_extractor_prompt.format(question=question), inputs.get("metrics"), stage="filter_extractor"
             )
-            
+            return build_filter_result(inputs, response)
+        except Exception:
             return {
                 **inputs,
-                "extracted_filters": filters
+                "extracted_filters": extract_filters_with_regex(question)
             }
-            
+    
+    async def adebug_filter_extractor(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        question = inputs.get("question", "")
+        
+        try:
+            response = await ainvoke_llm(
+                llm, filter_extractor_prompt.format(question=question), inputs.get("metrics"), stage="filter_extractor"
+            )
+            return build_filter_result(inputs, response)
         except Exception:
-            import re
-            filters = ExtractedFilters()
-            
-            article_match = re.search(r'artículo\s+(\d+)', question, re.IGNORECASE)
-            if article_match:
-                filters.article_number = int(article_match.group(1))
-            
-            if any(word in question.lower() for word in ['constitución', 'constitución política']):
-                filters.source = "Constitución Política del Perú"
-                filters.document_type = "constitucion"
-            
             return {
                 **inputs,
-                "extracted_filters": filters
+                "extracted_filters": extract_filters_with_regex(question)
             }
     
-    return RunnableLambda(debug_filter_extractor)
+    return RunnableLambda(debug_filter_extractor, afunc=adebug_filter_extractor)
+
+
+def extract_filters_with_regex(question: str) -> ExtractedFilters:
+    import re
+    filters = ExtractedFilters()
+    
+    article_match = re.search(r'artículo\s+(\d+)', question, re.IGNORECASE)
+    if article_match:
+        filters.article_number = int(article_match.group(1))
+    
+    if any(word in question.lower() for word in ['constitución', 'constitución política']):
+        filters.source = "Constitución Política del Perú"
+        filters.document_type = "constitucion"
+    
+    return filters
+
+
+def create_fused_router(llm) -> RunnableLambda:
+    # La salida se restringe al esquema de `FusedRouterOutput` (formato JSON schema de Ollama,
+    # lo mismo que `with_structured_output`), pero la respuesta sigue siendo un mensaje: así
+    # se registran los tokens y funciona el caché del LLM
+    structured_llm = llm.bind(format=FusedRouterOutput.model_json_schema())
+    
+    def fused_router_messages(question: str):
+        return [
+            ("system", FUSED_ROUTER_SYSTEM_PROMPT),
+            ("human", f"Analiza esta pregunta: '{question}'")
+        ]
+    
+    def build_fused_result(inputs: Dict[str, Any], response) -> Dict[str, Any]:
+        question = inputs.get("question", "")
+        content = response.content if hasattr(response, "content") else str(response)
+        routed = FusedRouterOutput.model_validate_json(content)
+        
+        return {
+            **inputs,
+            "question": routed.corrected_question if (routed.has_spelling_errors and routed.corrected_question) else question,
+            "original_question": question,
+            "has_spelling_errors": routed.has_spelling_errors,
+            "semantic_category": routed.category,
+            "semantic_confidence": routed.confidence,
+            "semantic_reasoning": routed.reasoning,
+            "extracted_filters": ExtractedFilters(
+                article_number=routed.article_number,
+                title=routed.title,
+                year=routed.year
+            )
+        }
+    
+    def fused_fallback(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        question = inputs.get("question", "")
+        return {
+            **inputs,
+            "question": question,
+            "original_question": question,
+            "has_spelling_errors": False,
+            "semantic_category": "general",
+            "semantic_confidence": 0.5,
+            "semantic_reasoning": "Error en clasificación",
+            "extracted_filters": extract_filters_with_regex(question)
+        }
+    
+    def debug_fused_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = invoke_llm(
+                structured_llm, fused_router_messages(inputs.get("question", "")), inputs.get("metrics"), stage="fused_router"
+            )
+            return build_fused_result(inputs, response)
+        except Exception:
+            return fused_fallback(inputs)
+    
+    async def adebug_fused_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await ainvoke_llm(
+                structured_llm, fused_router_messages(inputs.get("question", "")), inputs.get("metrics"), stage="fused_router"
+            )
+            return build_fused_result(inputs, response)
+        except Exception:
+            return fused_fallback(inputs)
+    
+    return RunnableLambda(debug_fused_router, afunc=adebug_fused_router)
 
 
 def clean_json_response(json_data: dict) -> dict:
@@ -467,33 +617,264 @@ def build_chromadb_filter(filters: Dict[str, Any]) -> Optional[dict]:
         return {"$and": filter_conditions}
 
 
-def create_retrieval_assembler(vectorstore, top_k: int = 15) -> RunnableLambda:
+def embed_question(vectorstore, question: str, metrics: Optional[Dict[str, Any]] = None) -> List[float]:
+    start = time.perf_counter()
+    embedding = vectorstore.embeddings.embed_query(question)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    if metrics is not None:
+        metrics["embedding_calls"] = metrics.get("embedding_calls", 0) + 1
+        metrics["embedding_ms"] = round(metrics.get("embedding_ms", 0.0) + elapsed_ms, 3)
+    
+    return embedding
+
+
+async def aembed_question(vectorstore, question: str, metrics: Optional[Dict[str, Any]] = None) -> List[float]:
+    start = time.perf_counter()
+    embedding = await vectorstore.embeddings.aembed_query(question)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    if metrics is not None:
+        metrics["embedding_calls"] = metrics.get("embedding_calls", 0) + 1
+        metrics["embedding_ms"] = round(metrics.get("embedding_ms", 0.0) + elapsed_ms, 3)
+    
+    return embedding
+
+
+def search_chunks(
+    vectorstore,
+    query_embedding: List[float],
+    k: int,
+    filters: Dict[str, Any],
+    metrics: Optional[Dict[str, Any]] = None
+) -> ChunkBatch:
+    chunks = query_chunks(vectorstore, query_embedding, k, build_chromadb_filter(filters))
+    
+    if metrics is not None:
+        metrics["vector_queries"] = metrics.get("vector_queries", 0) + 1
+    
+    return chunks
+
+
+def search_by_vector(
+    vectorstore,
+    query_embedding: List[float],
+    k: int,
+    filters: Dict[str, Any],
+    metrics: Optional[Dict[str, Any]] = None
+) -> List[Document]:
+    return search_chunks(vectorstore, query_embedding, k, filters, metrics).to_documents()
+
+
+def build_metadata_table(chunks: ChunkBatch, fields: List[str]) -> Dict[str, np.ndarray]:
+    return {field: chunks.column(field) for field in fields}
+
+
+def evaluate_filter_mask(metadata_table: Dict[str, np.ndarray], filters: Dict[str, Any], size: int) -> np.ndarray:
+    mask = np.ones(size, dtype=bool)
+    
+    for field, value in filters.items():
+        if value is None:
+            continue
+        
+        column = metadata_table.get(field)
+        if column is None:
+            return np.zeros(size, dtype=bool)
+        
+        if isinstance(value, list):
+            mask &= np.isin(column, value)
+        else:
+            mask &= column == value
+    
+    return mask
+
+
+def shared_strategy_filters(strategies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    filtered = [strategy["filters"] for strategy in strategies if strategy["filters"]]
+    if not filtered:
+        return {}
+    
+    shared = dict(filtered[0])
+    for strategy_filters in filtered[1:]:
+        shared = {
+            key: value for key, value in shared.items()
+            if key in strategy_filters and strategy_filters[key] == value
+        }
+    
+    return shared
+
+
+def search_strategy(
+    vectorstore,
+    query_embedding: List[float],
+    top_k: int,
+    strategy: Dict[str, Any],
+    metrics: Dict[str, Any],
+    unfiltered_docs: Optional[List[Document]] = None
+) -> List[Document]:
+    if not strategy["filters"] and unfiltered_docs is not None:
+        metrics["speculative_reused"] = True
+        return unfiltered_docs
+    
+    return search_by_vector(vectorstore, query_embedding, top_k, strategy["filters"], metrics)
+
+
+def run_strategy_cascade(
+    vectorstore,
+    query_embedding: List[float],
+    strategies: List[Dict[str, Any]],
+    top_k: int,
+    metrics: Dict[str, Any],
+    unfiltered_docs: Optional[List[Document]] = None
+) -> List[Document]:
+    for i, strategy in enumerate(strategies, 1):
+        docs = search_strategy(vectorstore, query_embedding, top_k, strategy, metrics, unfiltered_docs)
+        metrics["strategies_tried"] = i
+        
+        if docs:
+            metrics["strategy"] = strategy["name"]
+            return docs
+    
+    return []
+
+
+def run_overfetch_strategies(
+    vectorstore,
+    query_embedding: List[float],
+    strategies: List[Dict[str, Any]],
+    top_k: int,
+    overfetch_k: int,
+    metrics: Dict[str, Any],
+    unfiltered_docs: Optional[List[Document]] = None,
+    searcher=None
+) -> List[Document]:
+    """
+    Evalúa todas las estrategias en memoria sobre un único pool de candidatos.
+    
+    El pool se recupera con los filtros comunes a todas las estrategias filtradas
+    (nivel de categoría). Una estrategia queda resuelta sin consultar la BD cuando
+    el pool contiene al menos `top_k` coincidencias (son exactamente sus top_k más
+    cercanos), cuando el pool agotó la colección o cuando contiene todos los chunks
+    que el catálogo cuenta para la estrategia. En cualquier otro caso se ejecuta
+    la consulta filtrada real, por lo que la estrategia elegida coincide con la cascada.
+    
+    Con búsqueda híbrida (`searcher`) el pool es solo denso: el orden RRF restringido a un
+    filtro no es el de la consulta filtrada. La estrategia se elige igual (una estrategia
+    tiene resultados híbridos si y solo si tiene resultados densos) y solo la elegida se
+    consulta con `searcher`, así los documentos coinciden con los de la cascada.
+    """
+    searcher = searcher if searcher is not None else vectorstore
+    pool_filters = shared_strategy_filters(strategies)
+    pool = search_chunks(vectorstore, query_embedding, overfetch_k, pool_filters, metrics)
+    pool_exhausted = len(pool) < overfetch_k
+    
+    fields = sorted({field for strategy in strategies for field in strategy["filters"]})
+    metadata_table = build_metadata_table(pool, fields)
+    metrics["overfetch_pool_size"] = len(pool)
+    metrics["overfetch_fallbacks"] = 0
+    
+    for i, strategy in enumerate(strategies, 1):
+        strategy_filters = strategy["filters"]
+        metrics["strategies_tried"] = i
+        
+        covered = all(strategy_filters.get(key) == value for key, value in pool_filters.items())
+        
+        if covered:
+            matches = np.flatnonzero(evaluate_filter_mask(metadata_table, strategy_filters, len(pool)))
+            
+            all_matches_in_pool = strategy.get("matches") == len(matches)
+            
+            if len(matches) >= top_k or pool_exhausted or all_matches_in_pool:
+                if len(matches) > 0:
+                    metrics["strategy"] = strategy["name"]
+                    if searcher is not vectorstore:
+                        return search_strategy(searcher, query_embedding, top_k, strategy, metrics, unfiltered_docs)
+                    return pool.to_documents(matches[:top_k])
+                continue
+        
+        metrics["overfetch_fallbacks"] += 1
+        docs = search_strategy(searcher, query_embedding, top_k, strategy, metrics, unfiltered_docs)
+        
+        if docs:
+            metrics["strategy"] = strategy["name"]
+            return docs
+    
+    return []
+
+
+async def aspeculative_retrieval(
+    vectorstore,
+    question: str,
+    top_k: int,
+    metrics: Optional[Dict[str, Any]] = None,
+    embedding: Optional[List[float]] = None,
+    lexical_index: Optional[LexicalIndex] = None
+) -> Dict[str, Any]:
+    import asyncio
+    if embedding is None:
+        embedding = await aembed_question(vectorstore, question, metrics)
+    searcher = hybrid_searcher(bind_request_metrics(vectorstore, metrics), lexical_index, question, metrics)
+    unfiltered_docs = await asyncio.to_thread(search_by_vector, searcher, embedding, top_k, {}, metrics)
+    
+    return {
+        "question": question,
+        "embedding": embedding,
+        "unfiltered_docs": unfiltered_docs
+    }
+
+
+def create_retrieval_assembler(
+    vectorstore,
+    top_k: int = 15,
+    mode: str = None,
+    overfetch_k: int = None,
+    catalog: Optional[MetadataCatalog] = None,
+    lexical_index: Optional[LexicalIndex] = None
+) -> RunnableLambda:
+    mode = mode or settings.RETRIEVAL_MODE
+    overfetch_k = max(overfetch_k or settings.OVERFETCH_K, top_k)
+    
     def debug_retrieval_assembler(inputs: Dict[str, Any]) -> List[Document]:
         question = inputs.get("question", "")
         filters = inputs.get("extracted_filters", ExtractedFilters())
         semantic_category = inputs.get("semantic_category", "general")
+        metrics = inputs.get("metrics")
+        if metrics is None:
+            metrics = {}
+        
+        # Con poca confianza las estrategias no cambian, pero la consulta no se limita al shard de la categoría
+        low_confidence = inputs.get("semantic_confidence", 1.0) < settings.CATEGORY_MIN_CONFIDENCE
+        if low_confidence:
+            metrics["low_confidence_category"] = semantic_category
         
         try:
-            validated_filters, discarded_filters = validate_and_normalize_filters(filters)
+            validated_filters, discarded_filters = validate_and_normalize_filters(filters, catalog)
             
-            strategies = create_filter_strategies(validated_filters, semantic_category)
+            strategies = create_filter_strategies(validated_filters, semantic_category, catalog)
             
-            for i, strategy in enumerate(strategies, 1):
-                chroma_filter = build_chromadb_filter(strategy['filters'])
-                
-                if chroma_filter:
-                    retriever = vectorstore.as_retriever(
-                        search_kwargs={"k": top_k, "filter": chroma_filter}
-                    )
-                else:
-                    retriever = vectorstore.as_retriever(search_kwargs={"k": top_k})
-                
-                docs = retriever.invoke(question)
-                
-                if docs:
-                    return docs
+            feasible_strategies = [strategy for strategy in strategies if strategy.get("matches") != 0]
+            metrics["strategies_skipped"] = len(strategies) - len(feasible_strategies)
+            strategies = feasible_strategies
             
-            return []
+            speculative = inputs.get("speculative_retrieval") or {}
+            if speculative.get("question") == question:
+                query_embedding = speculative["embedding"]
+                unfiltered_docs = speculative.get("unfiltered_docs")
+            else:
+                query_embedding = embed_question(vectorstore, question, metrics)
+                unfiltered_docs = None
+            metrics["retrieval_mode"] = mode
+            dense_store = bind_request_metrics(vectorstore, metrics, fan_out=low_confidence)
+            searcher = hybrid_searcher(dense_store, lexical_index, question, metrics)
+            
+            if mode == "overfetch" and len(strategies) > 1:
+                return run_overfetch_strategies(
+                    dense_store, query_embedding, strategies, top_k, overfetch_k, metrics, unfiltered_docs, searcher
+                )
+            
+            return run_strategy_cascade(
+                searcher, query_embedding, strategies, top_k, metrics, unfiltered_docs
+            )
             
         except Exception:
             try:
@@ -506,14 +887,29 @@ def create_retrieval_assembler(vectorstore, top_k: int = 15) -> RunnableLambda:
     return RunnableLambda(debug_retrieval_assembler)
 
 
-def create_modular_self_query_pipeline(llm, vectorstore, top_k: int = 15):
+def create_modular_self_query_pipeline(
+    llm,
+    vectorstore,
+    top_k: int = 15,
+    retrieval_mode: str = None,
+    catalog: Optional[MetadataCatalog] = None,
+    semantic_router_mode: str = None,
+    lexical_index: Optional[LexicalIndex] = None
+):
     semantic_router = create_semantic_router(llm)
+    if (semantic_router_mode or settings.SEMANTIC_ROUTER_MODE) == "embedding":
+        from .semantic_classifier import create_embedding_semantic_router
+        semantic_router = create_embedding_semantic_router(vectorstore, semantic_router)
     filter_extractor = create_filter_extractor(llm)
-    retrieval_assembler = create_retrieval_assembler(vectorstore, top_k)
+    fused_router = create_fused_router(llm)
+    retrieval_assembler = create_retrieval_assembler(
+        vectorstore, top_k, mode=retrieval_mode, catalog=catalog, lexical_index=lexical_index
+    )
     
     return {
         "semantic_router": semantic_router,
         "filter_extractor": filter_extractor,
+        "fused_router": fused_router,
         "retrieval_assembler": retrieval_assembler
     }
 
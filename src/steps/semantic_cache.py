@@ -0,0 +1,162 @@
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import settings
+from ..text import normalize_text
+from ..types import PipelineOutput
+from .fast_path import ARTICLE_PATTERN, FAQ_NUMERAL_PATTERN, CONSTITUTION_PATTERN, find_legal_references
+
+
+NUMBER_PATTERN = re.compile(r"\b\d+(?:-\d+)*\b")
+
+
+def question_references(question: str) -> Tuple:
+    """
+    Referencias explícitas de la pregunta que deben coincidir para reutilizar una respuesta.
+    
+    Son las mismas que usan los filtros (artículo, norma, sección de preguntas frecuentes,
+    Constitución) más cualquier otro número: dos preguntas casi idénticas sobre el artículo 2
+    y el artículo 3 no son intercambiables aunque sus embeddings lo sean.
+    """
+    normalized = normalize_text(question)
+    references = set(find_legal_references(normalized))
+    references.update(("articulo", number.lstrip("0") or "0") for number in ARTICLE_PATTERN.findall(normalized))
+    references.update(("faq", numeral) for numeral in FAQ_NUMERAL_PATTERN.findall(normalized))
+    references.update(("numero", number) for number in NUMBER_PATTERN.findall(normalized))
+    if CONSTITUTION_PATTERN.search(normalized):
+        references.add(("constitucion", ""))
+    return tuple(sorted(references))
+
+
+class SemanticAnswerCache:
+    """
+    Caché de respuestas para paráfrasis: índice en memoria de embeddings de preguntas.
+    
+    Una pregunta nueva reutiliza la respuesta de la más parecida si la similitud coseno
+    supera el umbral y ambas tienen las mismas referencias explícitas. Los aciertos y los
+    candidatos descartados por referencias se anotan en un log JSONL para auditar
+    falsos positivos.
+    """
+    
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = None,
+        max_entries: int = None,
+        ttl_seconds: int = None,
+        audit_log_path: str = None
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold if threshold is not None else settings.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANSWER_CACHE_TTL_SECONDS
+        audit_log_path = audit_log_path if audit_log_path is not None else settings.SEMANTIC_CACHE_AUDIT_LOG
+        self.audit_log_path = Path(audit_log_path) if audit_log_path else None
+        
+        self.lock = threading.Lock()
+        self.matrix: Optional[np.ndarray] = None
+        self.entries: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self.expires_at = np.zeros(self.max_entries)
+        self.last_access = np.zeros(self.max_entries)
+        self.namespace = None
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+    
+    def embed(self, question: str) -> List[float]:
+        return self.embeddings.embed_query(question)
+    
+    def reset(self, namespace: str) -> None:
+        self.entries = [None] * self.max_entries
+        self.expires_at[:] = 0
+        self.last_access[:] = 0
+        self.namespace = namespace
+    
+    def audit(self, record: Dict[str, Any]) -> None:
+        if self.audit_log_path is None:
+            return
+        self.audit_log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.audit_log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"), **record}, ensure_ascii=False) + "\n")
+    
+    def lookup(self, question: str, embedding: List[float], namespace: str) -> Tuple[Optional[PipelineOutput], Dict[str, Any]]:
+        now = time.time()
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        references = question_references(question)
+        
+        with self.lock:
+            if namespace != self.namespace:
+                self.reset(namespace)
+            if self.matrix is None:
+                self.misses += 1
+                return None, {"hit": False, "similarity": None}
+            
+            similarities = self.matrix @ query
+            similarities[self.expires_at < now] = -1.0
+            candidates = np.flatnonzero(similarities >= self.threshold)
+            best_similarity = float(similarities.max())
+            
+            for slot in candidates[np.argsort(-similarities[candidates])]:
+                entry = self.entries[slot]
+                record = {
+                    "question": question,
+                    "cached_question": entry["question"],
+                    "similarity": round(float(similarities[slot]), 4),
+                    "threshold": self.threshold
+                }
+                if entry["references"] != references:
+                    self.rejected += 1
+                    self.audit({
+                        "decision": "rejected_references", **record,
+                        "references": references, "cached_references": entry["references"]
+                    })
+                    continue
+                
+                self.last_access[slot] = now
+                self.hits += 1
+                self.audit({"decision": "hit", **record})
+                return entry["output"], {"hit": True, **record}
+            
+            self.misses += 1
+            return None, {"hit": False, "similarity": round(best_similarity, 4)}
+    
+    def add(self, question: str, embedding: List[float], output: PipelineOutput, namespace: str) -> None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        now = time.time()
+        
+        with self.lock:
+            if namespace != self.namespace:
+                self.reset(namespace)
+            if self.matrix is None:
+                self.matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            
+            free_slots = np.flatnonzero(self.expires_at < now)
+            slot = int(free_slots[0]) if len(free_slots) else int(np.argmin(self.last_access))
+            
+            self.matrix[slot] = vector
+            self.entries[slot] = {
+                "question": question,
+                "references": question_references(question),
+                "output": output.model_copy(update={"metrics": None})
+            }
+            self.expires_at[slot] = now + self.ttl_seconds
+            self.last_access[slot] = now
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected_by_references": self.rejected,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": int((self.expires_at >= time.time()).sum())
+        }
@@ -0,0 +1,132 @@
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.runnables import RunnableLambda
+
+from ..config.settings import settings
+from .self_query import CATEGORY_METADATA, embed_question, aembed_question
+
+
+CATEGORY_BY_SOURCE = {
+    metadata["source"]: category
+    for category, metadata in CATEGORY_METADATA.items()
+    if metadata
+}
+
+
+class EmbeddingCategoryClassifier:
+    """
+    Clasificador kNN de categoría sobre los embeddings de los chunks indexados.
+    
+    La confianza es la fracción del voto de los k vecinos más cercanos, ponderado con
+    un softmax de temperatura sobre la similitud coseno (los vectores están normalizados).
+    """
+    
+    def __init__(self, embeddings: np.ndarray, labels: List[str], k: int = None, temperature: float = None):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.categories = sorted(set(labels))
+        self.label_ids = np.array([self.categories.index(label) for label in labels], dtype=np.int64)
+        self.k = min(k or settings.LOCAL_ROUTER_K, len(labels))
+        self.temperature = temperature or settings.LOCAL_ROUTER_TEMPERATURE
+    
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs) -> Optional["EmbeddingCategoryClassifier"]:
+        result = vectorstore.get(include=["embeddings", "metadatas"])
+        
+        embeddings, labels = [], []
+        for embedding, metadata in zip(result.get("embeddings", []), result.get("metadatas", [])):
+            category = CATEGORY_BY_SOURCE.get((metadata or {}).get("source"))
+            if category is not None:
+                embeddings.append(embedding)
+                labels.append(category)
+        
+        if not labels:
+            return None
+        
+        return cls(np.asarray(embeddings, dtype=np.float32), labels, **kwargs)
+    
+    def classify(self, query_embedding: List[float]) -> Tuple[str, float, Dict[str, float]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self.embeddings @ query
+        
+        neighbors = np.argpartition(-similarities, self.k - 1)[:self.k]
+        neighbor_similarities = similarities[neighbors]
+        weights = np.exp((neighbor_similarities - neighbor_similarities.max()) / self.temperature)
+        
+        votes = np.bincount(self.label_ids[neighbors], weights=weights, minlength=len(self.categories))
+        votes /= votes.sum()
+        
+        best = int(np.argmax(votes))
+        scores = {category: round(float(vote), 4) for category, vote in zip(self.categories, votes)}
+        return self.categories[best], float(votes[best]), scores
+
+
+def create_embedding_semantic_router(
+    vectorstore,
+    fallback_router: RunnableLambda,
+    threshold: float = None,
+    classifier: Optional[EmbeddingCategoryClassifier] = None
+) -> RunnableLambda:
+    classifier = classifier or EmbeddingCategoryClassifier.from_vectorstore(vectorstore)
+    threshold = threshold if threshold is not None else settings.LOCAL_ROUTER_THRESHOLD
+    
+    def classify_locally(inputs: Dict[str, Any], embedding: List[float]) -> Optional[Dict[str, Any]]:
+        metrics = inputs.get("metrics")
+        start = time.perf_counter()
+        category, confidence, scores = classifier.classify(embedding)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        accepted = confidence >= threshold
+        if metrics is not None:
+            metrics["local_router"] = {
+                "category": category,
+                "confidence": round(confidence, 4),
+                "ms": round(elapsed_ms, 3),
+                "llm_fallback": not accepted
+            }
+        
+        if not accepted:
+            return None
+        
+        return {
+            **inputs,
+            "semantic_category": category,
+            "semantic_confidence": confidence,
+            "semantic_reasoning": f"Clasificador kNN local: {scores}"
+        }
+    
+    def with_embedding(inputs: Dict[str, Any], embedding: List[float]) -> Dict[str, Any]:
+        speculative = inputs.get("speculative_retrieval") or {}
+        if speculative.get("question") == inputs.get("question"):
+            return inputs
+        return {**inputs, "speculative_retrieval": {"question": inputs.get("question"), "embedding": embedding}}
+    
+    def local_semantic_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if classifier is None:
+            return fallback_router.invoke(inputs)
+        
+        speculative = inputs.get("speculative_retrieval") or {}
+        if speculative.get("question") == inputs.get("question"):
+            embedding = speculative["embedding"]
+        else:
+            embedding = embed_question(vectorstore, inputs.get("question", ""), inputs.get("metrics"))
+        inputs = with_embedding(inputs, embedding)
+        
+        result = classify_locally(inputs, embedding)
+        return result if result is not None else fallback_router.invoke(inputs)
+    
+    async def alocal_semantic_router(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if classifier is None:
+            return await fallback_router.ainvoke(inputs)
+        
+        speculative = inputs.get("speculative_retrieval") or {}
+        if speculative.get("question") == inputs.get("question"):
+            embedding = speculative["embedding"]
+        else:
+            embedding = await aembed_question(vectorstore, inputs.get("question", ""), inputs.get("metrics"))
+        inputs = with_embedding(inputs, embedding)
+        
+        result = classify_locally(inputs, embedding)
+        return result if result is not None else await fallback_router.ainvoke(inputs)
+    
+    return RunnableLambda(local_semantic_router, afunc=alocal_semantic_router)
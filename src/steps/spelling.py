@@ -0,0 +1,220 @@
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..config.settings import settings
+from ..io.vocabulary import WORD_PATTERN, load_vocabulary, load_wordlist
+from ..text import fold_accents
+
+
+# Abreviaturas de chat que el corrector LLM expande (q→qué, xq→por qué, pa→para)
+INFORMAL_TOKENS = {"q", "k", "xq", "pq", "porq", "x", "pa", "d", "tb", "tmb", "dnd", "xfa", "porfa"}
+
+# Una palabra fuera del vocabulario se corrige localmente solo si es larga y su mejor
+# candidato es mucho más frecuente que el siguiente; las palabras cortas tienen demasiados
+# vecinos a distancia 1 (dice→doce) y se dejan al LLM
+CONFIDENT_MIN_LENGTH = 6
+CONFIDENT_COUNT_RATIO = 5
+
+# Preguntas bien escritas que el corrector debe dejar intactas; si cambia alguna, la
+# lista de palabras no cubre el español común y se vuelve al corrector LLM
+WELL_FORMED_QUESTIONS = (
+    "¿Cómo funciona el despido arbitrario?",
+    "Quiero saber cuántos días de vacaciones me corresponden",
+    "¿Qué dice la Constitución sobre el derecho al trabajo?",
+    "¿Cuánto me deben pagar por las horas extras?",
+    "¿Puedo renunciar sin dar aviso a mi empleador?",
+    "¿Qué pasa si la empresa no me paga la gratificación?",
+    "¿Cuáles son mis derechos si trabajo medio tiempo?",
+    "Necesito información sobre la compensación por tiempo de servicios",
+    "¿Me pueden descontar del sueldo los días que falté por enfermedad?",
+    "¿Cuándo se considera que un contrato es indefinido?"
+)
+
+
+def generate_deletes(word: str, max_distance: int) -> set:
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:i] + candidate[i + 1:]
+            for candidate in frontier if len(candidate) > 1
+            for i in range(len(candidate))
+        }
+        deletes |= frontier
+    return deletes
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Distancia de Damerau-Levenshtein (transposiciones adyacentes), acotada por `max_distance`."""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    
+    previous_row = None
+    row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        before_previous, previous_row = previous_row, row
+        row = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                row[j] = min(row[j], before_previous[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return row[-1]
+
+
+class SpellChecker:
+    """
+    Corrector ortográfico de borrado simétrico sobre el vocabulario del corpus más una
+    lista de palabras general del idioma.
+    
+    Las palabras se comparan sin tildes, así que "constitucion" cuenta como escrita
+    correctamente. Una palabra desconocida se corrige localmente solo si su mejor candidato
+    es un término del corpus claramente mejor que el resto; si no, la pregunta se deriva al
+    corrector LLM. Sin lista general no hay correcciones locales: una palabra común que no
+    aparece en los textos legales ("funciona") no es una errata.
+    """
+    
+    def __init__(
+        self,
+        word_counts: Dict[str, int],
+        general_counts: Optional[Dict[str, int]] = None,
+        max_edit_distance: int = None,
+        min_count: int = None,
+        prefix_length: int = 7
+    ):
+        self.max_edit_distance = max_edit_distance if max_edit_distance is not None else settings.SPELL_MAX_EDIT_DISTANCE
+        self.prefix_length = prefix_length
+        min_count = min_count if min_count is not None else settings.SPELL_MIN_WORD_COUNT
+        
+        self.word_counts: Dict[str, int] = {}
+        self.surface_forms: Dict[str, Tuple[str, int]] = {}
+        for word, count in word_counts.items():
+            if count < min_count:
+                continue
+            folded = fold_accents(word)
+            self.word_counts[folded] = self.word_counts.get(folded, 0) + count
+            if count > self.surface_forms.get(folded, ("", 0))[1]:
+                self.surface_forms[folded] = (word, count)
+        # Las correcciones locales solo llevan a términos del corpus
+        self.corpus_words = set(self.word_counts)
+        
+        for word, count in (general_counts or {}).items():
+            folded = fold_accents(word)
+            self.word_counts[folded] = max(self.word_counts.get(folded, 0), count)
+        self.local_corrections = bool(general_counts)
+        
+        self.deletes: Dict[str, List[str]] = {}
+        for folded in self.word_counts:
+            for deleted in generate_deletes(folded[:self.prefix_length], self.max_edit_distance):
+                self.deletes.setdefault(deleted, []).append(folded)
+        
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.llm_skipped = 0
+    
+    @classmethod
+    def from_db(cls, db_folder_name: str, general_counts: Optional[Dict[str, int]] = None) -> Optional["SpellChecker"]:
+        word_counts = load_vocabulary(db_folder_name)
+        return cls(word_counts, general_counts) if word_counts else None
+    
+    def candidates(self, folded: str) -> List[Tuple[str, int, int]]:
+        max_distance = 1 if len(folded) <= 4 else self.max_edit_distance
+        seen = set()
+        candidates = []
+        
+        for deleted in generate_deletes(folded[:self.prefix_length], max_distance):
+            for word in self.deletes.get(deleted, []):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = edit_distance(folded, word, max_distance)
+                if distance <= max_distance:
+                    candidates.append((word, distance, self.word_counts[word]))
+        
+        candidates.sort(key=lambda candidate: (candidate[1], -candidate[2]))
+        return candidates
+    
+    def confident_correction(self, folded: str) -> Optional[str]:
+        if not self.local_corrections or len(folded) < CONFIDENT_MIN_LENGTH:
+            return None
+        
+        candidates = self.candidates(folded)
+        if not candidates:
+            return None
+        
+        best_word, best_distance, best_count = candidates[0]
+        if best_word not in self.corpus_words or (best_distance == 2 and len(folded) < 8):
+            return None
+        
+        for word, distance, count in candidates[1:]:
+            if distance > best_distance:
+                break
+            if best_count < CONFIDENT_COUNT_RATIO * count:
+                return None
+        
+        return self.surface_forms[best_word][0]
+    
+    def check(self, question: str) -> Dict[str, Any]:
+        oov_tokens = []
+        corrections = {}
+        needs_llm = False
+        
+        for token in dict.fromkeys(WORD_PATTERN.findall(question)):
+            lowered = token.lower()
+            if lowered in INFORMAL_TOKENS:
+                oov_tokens.append(token)
+                needs_llm = True
+                continue
+            if len(token) > 1 and token.isupper():
+                continue
+            
+            folded = fold_accents(lowered)
+            if folded in self.word_counts:
+                continue
+            
+            oov_tokens.append(token)
+            correction = self.confident_correction(folded)
+            if correction is None:
+                needs_llm = True
+            else:
+                corrections[token] = correction.capitalize() if token[0].isupper() else correction
+        
+        corrected_question = question
+        if corrections and not needs_llm:
+            corrected_question = WORD_PATTERN.sub(
+                lambda match: corrections.get(match.group(0), match.group(0)), question
+            )
+        
+        return {
+            "oov_tokens": oov_tokens,
+            "corrections": corrections,
+            "needs_llm": needs_llm,
+            "corrected_question": corrected_question
+        }
+    
+    def changed_questions(self, questions) -> List[str]:
+        """Preguntas que el corrector modificaría sin pasar por el LLM."""
+        return [question for question in questions if self.check(question)["corrected_question"] != question]
+    
+    def record(self, skipped_llm: bool) -> float:
+        with self.lock:
+            self.requests += 1
+            self.llm_skipped += int(skipped_llm)
+            return self.llm_skipped / self.requests
+
+
+def load_spell_checker(db_folder_name: str) -> Optional[SpellChecker]:
+    """Corrector local, o None (todo pasa por el LLM) sin lista de palabras general."""
+    if not settings.ENABLE_LOCAL_SPELL_CHECK:
+        return None
+    try:
+        general_counts = load_wordlist()
+        spell_checker = SpellChecker.from_db(db_folder_name, general_counts) if general_counts else None
+    except (OSError, ValueError):
+        return None
+    if spell_checker is None or spell_checker.changed_questions(WELL_FORMED_QUESTIONS):
+        return None
+    return spell_checker
@@ -0,0 +1,18 @@
+import re
+import unicodedata
+
+
+NUMBER_MARKER_PATTERN = re.compile(r"\b(?:n|nro|num|numero)\s*\.?\s*°?\s*\.?\s*(?=\d)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def fold_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.replace("º", "°"))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto legal para comparaciones: sin tildes, minúsculas y sin el marcador 'N.º'."""
+    folded = fold_accents(str(text)).lower()
+    folded = NUMBER_MARKER_PATTERN.sub("", folded)
+    return WHITESPACE_PATTERN.sub(" ", folded).strip()
@@ -56,6 +56,9 @@ class RerankResult(BaseModel):
     documents: List[Document] = Field(description="Documentos re-rankeados")
     original_count: int = Field(description="Número original de documentos")
     final_count: int = Field(description="Número final de documentos")
+    cache_hits: int = Field(default=0, description="Pares (pregunta, chunk) con puntuación cacheada")
+    cache_misses: int = Field(default=0, description="Pares puntuados por el cross-encoder")
+    saved_ms: float = Field(default=0.0, description="Milisegundos estimados ahorrados por la caché")
 
 
 class PipelineInput(BaseModel):
@@ -74,6 +77,7 @@ class PipelineOutput(BaseModel):
     route: Optional[str] = Field(default=None, description="Ruta tomada en el pipeline")
     corrected_question: Optional[str] = Field(default=None, description="Pregunta corregida ortográficamente")
     error: Optional[str] = Field(default=None, description="Mensaje de error si ocurre algún problema")
+    metrics: Optional[Dict[str, Any]] = Field(default=None, description="Métricas de ejecución (embeddings, estrategias, latencias)")
 
 
 class SelfQueryOutput(BaseModel):
@@ -145,6 +149,35 @@ class ExtractedFilters(BaseModel):
     )
 
 
+class FusedRouterOutput(BaseModel):
+    """Corrección, clasificación y filtros obtenidos en una sola llamada al LLM."""
+    has_spelling_errors: bool = Field(
+        default=False,
+        description="True si la pregunta tiene errores ortográficos"
+    )
+    corrected_question: Optional[str] = Field(
+        default=None,
+        description="Pregunta corregida ortográficamente"
+    )
+    category: Literal["constitucion", "derecho_laboral", "faq", "general"] = Field(
+        default="general",
+        description="Categoría del documento más probable"
+    )
+    confidence: float = Field(
+        default=0.5,
+        description="Nivel de confianza en la clasificación (0.0 a 1.0)",
+        ge=0.0,
+        le=1.0
+    )
+    reasoning: str = Field(
+        default="Sin razonamiento",
+        description="Explicación de la clasificación"
+    )
+    article_number: Optional[int] = Field(default=None, description="Número de artículo mencionado")
+    title: Optional[str] = Field(default=None, description="Título de norma o documento mencionado")
+    year: Optional[int] = Field(default=None, description="Año mencionado")
+
+
 class StructuredRetrievalInput(BaseModel):
     """Input estructurado para el ensamblador de recuperación."""
     semantic_query: str = Field(